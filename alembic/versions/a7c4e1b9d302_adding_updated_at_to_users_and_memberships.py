@@ -0,0 +1,26 @@
+"""adding updated_at to users and memberships
+
+Revision ID: a7c4e1b9d302
+Revises: f3b6a0d8c215
+Create Date: 2026-10-19 17:41:09.214730
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7c4e1b9d302'
+down_revision = 'f3b6a0d8c215'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=True))
+    op.add_column('organization_users', sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('organization_users', 'updated_at')
+    op.drop_column('users', 'updated_at')
@@ -0,0 +1,30 @@
+"""adding system settings table
+
+Revision ID: b5d9f3a1c704
+Revises: a7c4e1b9d302
+Create Date: 2026-10-19 18:26:53.607182
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5d9f3a1c704'
+down_revision = 'a7c4e1b9d302'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('system_settings',
+    sa.Column('key', sa.String(), nullable=False),
+    sa.Column('value', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('key')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('system_settings')
@@ -0,0 +1,25 @@
+"""adding stripe customer status to organization
+
+Revision ID: c4a8e2f19d37
+Revises: b7d3c91a4e52
+Create Date: 2026-10-19 11:03:27.184920
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4a8e2f19d37'
+down_revision = 'b7d3c91a4e52'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Existing organizations already have their customer
+    op.add_column('organizations', sa.Column('stripe_customer_status', sa.String(), server_default='provisioned', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('organizations', 'stripe_customer_status')
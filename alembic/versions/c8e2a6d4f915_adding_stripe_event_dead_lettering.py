@@ -0,0 +1,26 @@
+"""adding stripe event dead lettering
+
+Revision ID: c8e2a6d4f915
+Revises: b5d9f3a1c704
+Create Date: 2026-10-19 19:12:30.551904
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c8e2a6d4f915'
+down_revision = 'b5d9f3a1c704'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('stripe_events', sa.Column('attempts', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('stripe_events', sa.Column('dead_lettered_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('stripe_events', 'dead_lettered_at')
+    op.drop_column('stripe_events', 'attempts')
@@ -0,0 +1,43 @@
+"""adding stripe events table
+
+Revision ID: d91f5b7c2a64
+Revises: c4a8e2f19d37
+Create Date: 2026-10-19 13:40:12.662031
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'd91f5b7c2a64'
+down_revision = 'c4a8e2f19d37'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('stripe_events',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('stripe_event_id', sa.String(), nullable=False),
+    sa.Column('type', sa.String(), nullable=False),
+    sa.Column('customer_id', sa.String(), nullable=True),
+    sa.Column('stripe_created', sa.BigInteger(), nullable=False),
+    sa.Column('payload', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('received_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('processed_at', sa.DateTime(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('stripe_event_id')
+    )
+    op.create_index(op.f('ix_stripe_events_id'), 'stripe_events', ['id'], unique=False)
+    op.create_index('ix_stripe_events_customer_id_processed_at', 'stripe_events', ['customer_id', 'processed_at', 'stripe_created'], unique=False)
+    op.add_column('subscriptions', sa.Column('stripe_event_created', sa.BigInteger(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('subscriptions', 'stripe_event_created')
+    op.drop_index('ix_stripe_events_customer_id_processed_at', table_name='stripe_events')
+    op.drop_index(op.f('ix_stripe_events_id'), table_name='stripe_events')
+    op.drop_table('stripe_events')
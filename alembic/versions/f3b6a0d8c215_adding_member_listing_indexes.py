@@ -0,0 +1,28 @@
+"""adding member listing indexes
+
+Revision ID: f3b6a0d8c215
+Revises: d91f5b7c2a64
+Create Date: 2026-10-19 15:02:47.318455
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3b6a0d8c215'
+down_revision = 'd91f5b7c2a64'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_organization_users_organization_id_id', 'organization_users', ['organization_id', 'id'], unique=False)
+    op.create_index('ix_organization_users_organization_id_role_id', 'organization_users', ['organization_id', 'role', 'id'], unique=False)
+    op.create_index('ix_users_email_pattern', 'users', ['email'], unique=False, postgresql_ops={'email': 'text_pattern_ops'})
+
+
+def downgrade() -> None:
+    op.drop_index('ix_users_email_pattern', table_name='users')
+    op.drop_index('ix_organization_users_organization_id_role_id', table_name='organization_users')
+    op.drop_index('ix_organization_users_organization_id_id', table_name='organization_users')
@@ -1,10 +1,13 @@
 from celery import Celery
 from .config import CELERY_BROKER_URL, CELERY_RESULT_BACKEND, CeleryConfig
+from . import serialization  # registers the json_compressed result serializer
 
 celery_app = Celery(
     "celery_app",
     broker=CELERY_BROKER_URL,
     backend=CELERY_RESULT_BACKEND,
+    # Imported by the workers and beat only, the API sends tasks by name
+    include=["celery_app.tasks"],
 )
 
 # Configure using the CeleryConfig class
@@ -13,8 +16,12 @@ celery_app.config_from_object(CeleryConfig)
 # Optional: Set namespace for environment variables
 celery_app.conf.namespace = 'CELERY'
 
-# Import all tasks
-from celery_app import tasks   
+# Connect signal handlers
+from celery_app import signals
+from celery_app import worker_metrics
+
+# Remote control commands (celery control profile)
+from celery_app import control
 
 if __name__ == "__main__":
     celery_app.start()
@@ -4,12 +4,37 @@ from celery.schedules import crontab
 CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL", "redis://redis:6379/0")
 CELERY_RESULT_BACKEND = os.getenv("CELERY_RESULT_BACKEND", "redis://redis:6379/0")
 
+# Each queue is consumed by its own worker pool (see docker-compose.yml) so slow
+# image generation jobs cannot starve quick tasks.
+DEFAULT_QUEUE = "default"
+IMAGE_GENERATION_QUEUE = "image_generation"
+
+# When enabled, tools tasks are held in per-organization lists and fed to the
+# Celery queues by celery_app/fair_scheduler.py instead of being sent directly.
+FAIR_SCHEDULING_ENABLED = os.getenv("FAIR_SCHEDULING_ENABLED", "False") == "True"
+# How many tasks the scheduler lets wait in each Celery queue. Keep it close to
+# the queue's worker concurrency so the backlog stays in the fair lists.
+FAIR_SCHEDULER_MAX_BACKLOG = int(os.getenv("FAIR_SCHEDULER_MAX_BACKLOG", 4))
+
+# Seconds task results are kept in the result backend. Tasks can keep theirs
+# for less with register_task(result_expires=...).
+RESULT_EXPIRES = int(os.getenv("CELERY_RESULT_EXPIRES", 24 * 3600))
+# Compress stored results of at least RESULT_COMPRESSION_MIN_BYTES:
+# none, zlib or zstd (needs the zstandard package). See celery_app/serialization.py
+RESULT_COMPRESSION = os.getenv("CELERY_RESULT_COMPRESSION", "none").lower()
+RESULT_COMPRESSION_MIN_BYTES = int(os.getenv("CELERY_RESULT_COMPRESSION_MIN_BYTES", 1024))
+
+# How often celery beat starts a drain of the transactional email outbox
+EMAIL_OUTBOX_POLL_SECONDS = float(os.getenv("EMAIL_OUTBOX_POLL_SECONDS", 5))
+
 class CeleryConfig:
     broker_url = CELERY_BROKER_URL
     result_backend = CELERY_RESULT_BACKEND
     task_serializer = 'json'
-    result_serializer = 'json'
+    result_serializer = 'json_compressed'
     accept_content = ['json']
+    result_accept_content = ['json', 'json_compressed']
+    result_expires = RESULT_EXPIRES
     timezone = 'UTC'
     enable_utc = True
     worker_prefetch_multiplier = 1
@@ -18,3 +43,29 @@ class CeleryConfig:
     worker_send_task_events = True
     task_send_sent_event = True
     broker_connection_retry_on_startup = True
+    task_default_queue = DEFAULT_QUEUE
+    task_routes = ('celery_app.registry.route_task',)
+    # Redis has no native priorities, kombu emulates them with one list per step
+    broker_transport_options = {
+        'queue_order_strategy': 'priority',
+        'priority_steps': list(range(10)),
+        'sep': ':',
+    }
+    beat_schedule = {
+        'drain-email-outbox': {
+            'task': 'celery_app.tasks.drain_email_outbox_task',
+            'schedule': EMAIL_OUTBOX_POLL_SECONDS,
+            # Drop runs that waited longer than the interval, the next one covers them
+            'options': {'expires': EMAIL_OUTBOX_POLL_SECONDS},
+        },
+        'sweep-pending-stripe-customers': {
+            'task': 'celery_app.tasks.sweep_pending_stripe_customers_task',
+            'schedule': 60.0,
+            'options': {'expires': 60},
+        },
+        'sweep-stripe-events': {
+            'task': 'celery_app.tasks.sweep_stripe_events_task',
+            'schedule': 60.0,
+            'options': {'expires': 60},
+        },
+    }
@@ -0,0 +1,77 @@
+"""
+Remote control commands for the Celery workers.
+
+    celery -A celery_app.celery_app control profile 30 5 -d image_generation@host
+
+profile samples every task the worker starts in the next 30 seconds, every 5
+milliseconds, and writes one speedscope profile per task to PROFILE_DIR on
+the worker's host (see utils/profiler.py). Control commands run in the
+worker's main process while prefork tasks run in its children, so the command
+only sets a flag in Redis that the children check before each task, at most
+once a second.
+"""
+
+import logging
+import threading
+import time
+from celery.signals import task_postrun, task_prerun
+from celery.worker.control import control_command
+from utils.profiler import PROFILE_DIR, SamplingProfiler, write_profile
+from utils.redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+FLAG_CHECK_SECONDS = 1.0
+
+# (checked at, interval in ms or None) of the flag of this process's worker
+_flag = [0.0, None]
+# task_id -> SamplingProfiler of the tasks being profiled in this process
+_task_profilers = {}
+
+
+def _flag_key(hostname: str) -> str:
+    return f"profiler:worker:{hostname}"
+
+
+@control_command(
+    args=[("seconds", float), ("interval_ms", float)],
+    signature="[seconds=10 [interval_ms=5]]",
+)
+def profile(state, seconds=10, interval_ms=5):
+    """Profile the tasks this worker starts in the next seconds."""
+    hostname = state.consumer.hostname
+    redis_client.set(_flag_key(hostname), interval_ms, px=int(seconds * 1000))
+    return {"ok": f"profiling tasks started in the next {seconds:g}s, profiles are written to {PROFILE_DIR}"}
+
+
+def _profiling_interval(hostname: str):
+    now = time.monotonic()
+    if now - _flag[0] >= FLAG_CHECK_SECONDS:
+        value = redis_client.get(_flag_key(hostname))
+        _flag[0], _flag[1] = now, float(value) if value else None
+    return _flag[1]
+
+
+@task_prerun.connect
+def start_task_profile(sender=None, task_id=None, task=None, **kwargs):
+    try:
+        interval_ms = _profiling_interval(task.request.hostname or "")
+    except Exception as e:
+        logger.error(f"Failed to read the profiler flag: {e}")
+        return
+    if interval_ms:
+        _task_profilers[task_id] = SamplingProfiler(
+            interval=interval_ms / 1000, thread_ids=[threading.get_ident()], skip_idle=False,
+        ).start()
+
+
+@task_postrun.connect
+def write_task_profile(sender=None, task_id=None, **kwargs):
+    profiler = _task_profilers.pop(task_id, None)
+    if profiler is None:
+        return
+    try:
+        path = write_profile(profiler.stop().to_speedscope(sender.name), f"{sender.name}-{task_id}")
+        logger.info(f"Profile of task {task_id} written to {path}")
+    except Exception as e:
+        logger.error(f"Failed to write the profile of task {task_id}: {e}")
@@ -0,0 +1,101 @@
+"""
+Per-organization task lists for fair scheduling.
+
+With a single FIFO Celery queue a burst from one organization delays every
+other organization. When FAIR_SCHEDULING_ENABLED is on, the API pushes tools
+tasks onto per-organization Redis lists instead, and celery_app/fair_scheduler.py
+moves them to the Celery queues in weighted round-robin order.
+
+Lists are kept per Celery queue as well, so a full image_generation queue
+never holds back an organization's quick tasks.
+
+Keys (all in the broker's Redis):
+    fairq:queues                  set of Celery queues that have held tasks
+    fairq:{queue}:org:{org_id}    list of JSON task envelopes, oldest first
+    fairq:{queue}:active          set of organization ids with queued tasks
+    fairq:weights                 hash of organization id to round-robin weight
+"""
+
+import json
+import time
+from typing import Any, Dict, List
+import redis
+from utils import tracing
+from .config import CELERY_BROKER_URL
+
+QUEUES_KEY = "fairq:queues"
+WEIGHTS_KEY = "fairq:weights"
+
+# Pops up to ARGV[1] envelopes and drops the org from the active set once its
+# list is empty, atomically so a concurrent enqueue can never be stranded.
+_POP_SCRIPT = """
+local items = {}
+for i = 1, tonumber(ARGV[1]) do
+    local item = redis.call('LPOP', KEYS[1])
+    if not item then break end
+    items[#items + 1] = item
+end
+if redis.call('LLEN', KEYS[1]) == 0 then
+    redis.call('SREM', KEYS[2], ARGV[2])
+end
+return items
+"""
+
+broker_redis = redis.Redis.from_url(CELERY_BROKER_URL, decode_responses=True)
+_pop = broker_redis.register_script(_POP_SCRIPT)
+
+
+def org_queue_key(queue: str, org_id) -> str:
+    return f"fairq:{queue}:org:{org_id}"
+
+
+def active_key(queue: str) -> str:
+    return f"fairq:{queue}:active"
+
+
+def enqueue(org_id: int, weight: int, spec, task_id: str, kwargs: Dict[str, Any]) -> None:
+    """
+    Hold a task in its organization's list until the scheduler forwards it.
+
+    Args:
+        org_id: Organization the task is billed to
+        weight: Round-robin weight of the organization's tier
+        spec: The task's TaskSpec from celery_app.registry
+        task_id: The Celery task ID to send the task with
+        kwargs: Validated task parameters
+    """
+    envelope = json.dumps({
+        "task_id": task_id,
+        "celery_name": spec.celery_name,
+        "kwargs": kwargs,
+        "queue": spec.queue,
+        "priority": spec.priority,
+        "soft_time_limit": spec.soft_time_limit,
+        "time_limit": spec.time_limit,
+        "enqueued_at": time.time(),
+        # Continues the API request's trace when the scheduler sends the task
+        "trace_headers": tracing.inject_headers(),
+    })
+
+    pipe = broker_redis.pipeline(transaction=True)
+    pipe.rpush(org_queue_key(spec.queue, org_id), envelope)
+    pipe.hset(WEIGHTS_KEY, str(org_id), weight)
+    pipe.sadd(active_key(spec.queue), str(org_id))
+    pipe.sadd(QUEUES_KEY, spec.queue)
+    pipe.execute()
+
+
+def pop(queue: str, org_id: str, count: int) -> List[Dict[str, Any]]:
+    """Take up to count envelopes from the front of an organization's list."""
+    items = _pop(keys=[org_queue_key(queue, org_id), active_key(queue)], args=[count, org_id])
+    return [json.loads(item) for item in items]
+
+
+def requeue(queue: str, org_id: str, envelopes: List[Dict[str, Any]]) -> None:
+    """Put envelopes back at the front of an organization's list, keeping their order."""
+    if not envelopes:
+        return
+    pipe = broker_redis.pipeline(transaction=True)
+    pipe.lpush(org_queue_key(queue, org_id), *[json.dumps(envelope) for envelope in reversed(envelopes)])
+    pipe.sadd(active_key(queue), org_id)
+    pipe.execute()
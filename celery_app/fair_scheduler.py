@@ -0,0 +1,142 @@
+"""
+Fair scheduler that feeds tools tasks from the per-organization lists in
+celery_app/fair_queue.py to the Celery queues.
+
+Workers run with worker_prefetch_multiplier = 1, so the Celery queue itself is
+strict FIFO. The scheduler keeps it short (FAIR_SCHEDULER_MAX_BACKLOG tasks per
+queue) and fills the free room in weighted round-robin order across
+organizations: each organization gets up to its tier weight of tasks per turn
+before the next organization is served.
+
+Run one instance next to the workers:
+    python -m celery_app.fair_scheduler
+"""
+
+import logging
+import os
+import time
+from typing import Dict, List, Optional
+from prometheus_client import start_http_server
+from celery_app.celery_app import celery_app
+from celery_app.config import FAIR_SCHEDULER_MAX_BACKLOG
+from celery_app import fair_queue
+from utils.metrics import FAIR_QUEUE_WAIT
+
+logger = logging.getLogger(__name__)
+
+IDLE_SLEEP_SECONDS = 0.1
+METRICS_PORT = int(os.getenv("FAIR_SCHEDULER_METRICS_PORT", 9102))
+
+
+class QueueRoundRobin:
+    """
+    Deficit round-robin position for one Celery queue.
+    Remembers whose turn it is and how much of its weight is left, so an
+    organization whose turn was cut short by a full queue picks up where it left off.
+    """
+
+    def __init__(self):
+        self.current: Optional[str] = None
+        self.remaining = 0
+
+    def advance(self, orgs: List[str], weights: Dict[str, str]) -> str:
+        """Move the turn to the next organization after the current one."""
+        ordered = sorted(orgs, key=int)
+        if self.current is None:
+            following = ordered
+        else:
+            following = [org for org in ordered if int(org) > int(self.current)] or ordered
+        self.current = following[0]
+        self.remaining = max(1, int(weights.get(self.current, 1)))
+        return self.current
+
+
+class FairScheduler:
+    def __init__(self, max_backlog: int = FAIR_SCHEDULER_MAX_BACKLOG):
+        self.max_backlog = max_backlog
+        self.redis = fair_queue.broker_redis
+        self.positions: Dict[str, QueueRoundRobin] = {}
+        transport_options = celery_app.conf.broker_transport_options
+        self.priority_steps = transport_options.get("priority_steps", [0])
+        self.priority_sep = transport_options.get("sep", ":")
+
+    def broker_backlog(self, queue: str) -> int:
+        """Number of messages waiting in a Celery queue, over all priority lists."""
+        pipe = self.redis.pipeline(transaction=False)
+        for step in self.priority_steps:
+            pipe.llen(queue if step == 0 else f"{queue}{self.priority_sep}{step}")
+        return sum(pipe.execute())
+
+    def dispatch(self, envelope: dict) -> None:
+        celery_app.send_task(
+            envelope["celery_name"],
+            kwargs=envelope["kwargs"],
+            task_id=envelope["task_id"],
+            queue=envelope["queue"],
+            priority=envelope["priority"],
+            soft_time_limit=envelope["soft_time_limit"],
+            time_limit=envelope["time_limit"],
+            headers=envelope.get("trace_headers") or None,
+        )
+
+    def fill_queue(self, queue: str, weights: Dict[str, str]) -> int:
+        """Forward tasks to one Celery queue until it is full or every list is empty."""
+        capacity = self.max_backlog - self.broker_backlog(queue)
+        orgs = list(self.redis.smembers(fair_queue.active_key(queue)))
+        position = self.positions.setdefault(queue, QueueRoundRobin())
+        dispatched = 0
+
+        while capacity > 0 and orgs:
+            if position.current not in orgs or position.remaining <= 0:
+                position.advance(orgs, weights)
+
+            org_id = position.current
+            wanted = min(position.remaining, capacity)
+            envelopes = fair_queue.pop(queue, org_id, wanted)
+
+            now = time.time()
+            for i, envelope in enumerate(envelopes):
+                try:
+                    self.dispatch(envelope)
+                except Exception:
+                    # Keep the undelivered tasks at the head of the organization's list
+                    fair_queue.requeue(queue, org_id, envelopes[i:])
+                    raise
+                FAIR_QUEUE_WAIT.labels(queue=queue).observe(now - envelope["enqueued_at"])
+            if envelopes:
+                # Per organization in the log only, a label per organization would grow without bound
+                logger.debug(f"Dispatched {len(envelopes)} {queue} tasks of organization {org_id}, oldest waited {now - envelopes[0]['enqueued_at']:.2f}s")
+
+            capacity -= len(envelopes)
+            position.remaining -= len(envelopes)
+            dispatched += len(envelopes)
+
+            if len(envelopes) < wanted:
+                # The organization's list ran dry, its turn is over
+                orgs.remove(org_id)
+                position.remaining = 0
+
+        return dispatched
+
+    def run_once(self) -> int:
+        weights = self.redis.hgetall(fair_queue.WEIGHTS_KEY)
+        dispatched = 0
+        for queue in self.redis.smembers(fair_queue.QUEUES_KEY):
+            dispatched += self.fill_queue(queue, weights)
+        return dispatched
+
+    def run_forever(self) -> None:
+        logger.info(f"Fair scheduler started, max backlog {self.max_backlog} per queue")
+        while True:
+            try:
+                if not self.run_once():
+                    time.sleep(IDLE_SLEEP_SECONDS)
+            except Exception as e:
+                logger.error(f"Fair scheduler round failed: {e}", exc_info=True)
+                time.sleep(1)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    start_http_server(METRICS_PORT)
+    FairScheduler().run_forever()
@@ -0,0 +1,140 @@
+"""
+Declarative registry of the Celery tasks that can be started through the API.
+
+Tasks are declared in celery_app/task_catalog.py with declare_task(), which
+records how the task is dispatched (queue, priority, time limits, per-user
+concurrency cap) and the Pydantic model its parameters are validated against
+before enqueueing. The catalog imports nothing heavy, so the API validates and
+sends tasks by name without importing their implementations (Replicate, PIL,
+Cloud Storage), which only the workers load.
+
+The implementation binds itself to its declaration with @register_task:
+
+    declare_task(
+        "example_streaming",
+        celery_name='celery_app.tasks.example_streaming_task',
+        queue=DEFAULT_QUEUE,
+        params_model=ExampleStreamingParams,
+    )
+
+    @register_task("example_streaming")
+    @celery_app.task(bind=True, name='celery_app.tasks.example_streaming_task')
+    def example_streaming_task(self, ...):
+        ...
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Optional, Type
+from pydantic import BaseModel
+from .config import DEFAULT_QUEUE
+
+# Redis emulates priorities with one list per step and 0 is served first
+DEFAULT_PRIORITY = 5
+
+
+@dataclass(frozen=True)
+class TaskSpec:
+    name: str  # public name used by POST /tools/task/{task_name}
+    celery_name: str  # registered Celery task name
+    queue: str
+    priority: int
+    soft_time_limit: Optional[int]
+    time_limit: Optional[int]
+    max_concurrency_per_user: Optional[int]
+    params_model: Type[BaseModel]
+    result_expires: Optional[int] = None
+    ignore_result: bool = False
+
+
+TASK_REGISTRY: Dict[str, TaskSpec] = {}
+_specs_by_celery_name: Dict[str, TaskSpec] = {}
+
+
+def declare_task(
+    name: str,
+    *,
+    celery_name: str,
+    params_model: Type[BaseModel],
+    queue: str = DEFAULT_QUEUE,
+    priority: int = DEFAULT_PRIORITY,
+    soft_time_limit: Optional[int] = None,
+    time_limit: Optional[int] = None,
+    max_concurrency_per_user: Optional[int] = None,
+    result_expires: Optional[int] = None,
+    ignore_result: bool = False,
+) -> TaskSpec:
+    """
+    Declare a Celery task so the API can dispatch it by name.
+
+    Args:
+        name: Public task name exposed by the tools endpoints
+        celery_name: Name the implementation is registered under with @celery_app.task
+        params_model: Pydantic model the task parameters must validate against
+        queue: Queue the task is routed to. Each queue has its own worker pool.
+        priority: 0 (highest) to 9 (lowest)
+        soft_time_limit: Seconds before SoftTimeLimitExceeded is raised in the task
+        time_limit: Seconds before the worker process running the task is killed
+        max_concurrency_per_user: Maximum number of running tasks per user, None for no cap
+        result_expires: Seconds to keep the result in the backend, None for CELERY_RESULT_EXPIRES
+        ignore_result: Never store the result, for fire-and-forget tasks nobody polls
+    """
+    if name in TASK_REGISTRY:
+        raise ValueError(f"Task '{name}' is already registered")
+
+    spec = TaskSpec(
+        name=name,
+        celery_name=celery_name,
+        queue=queue,
+        priority=priority,
+        soft_time_limit=soft_time_limit,
+        time_limit=time_limit,
+        max_concurrency_per_user=max_concurrency_per_user,
+        params_model=params_model,
+        result_expires=result_expires,
+        ignore_result=ignore_result,
+    )
+    TASK_REGISTRY[name] = spec
+    _specs_by_celery_name[celery_name] = spec
+    return spec
+
+
+def register_task(name: str):
+    """Bind a Celery task implementation to its declaration in the task catalog."""
+    from . import task_catalog  # noqa: F401, declares the specs
+
+    def decorator(task):
+        spec = TASK_REGISTRY.get(name)
+        if spec is None:
+            raise ValueError(f"Task '{name}' is not declared in celery_app/task_catalog.py")
+        if spec.celery_name != task.name:
+            raise ValueError(f"Task '{name}' is declared as {spec.celery_name}, not {task.name}")
+
+        # Worker side reads the limits from the task when the message carries none
+        task.soft_time_limit = spec.soft_time_limit
+        task.time_limit = spec.time_limit
+        if spec.ignore_result:
+            task.ignore_result = True
+        return task
+
+    return decorator
+
+
+def get_task_spec(name: str) -> Optional[TaskSpec]:
+    """Look up a registered task by its public name."""
+    return TASK_REGISTRY.get(name)
+
+
+def get_task_spec_for_celery_name(celery_name: str) -> Optional[TaskSpec]:
+    """Look up a registered task by its Celery task name."""
+    return _specs_by_celery_name.get(celery_name)
+
+
+def route_task(name, args, kwargs, options, task=None, **kw):
+    """
+    Celery router that sends registered tasks to their queue even when they are
+    called directly with .delay() instead of through the API.
+    """
+    spec = _specs_by_celery_name.get(name)
+    if spec is None:
+        return None
+    return {"queue": spec.queue, "priority": spec.priority}
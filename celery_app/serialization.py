@@ -0,0 +1,73 @@
+"""
+Result serializer that compresses large task results.
+
+Results are stored as plain JSON, the same bytes the 'json' serializer writes,
+unless they are at least RESULT_COMPRESSION_MIN_BYTES long and
+RESULT_COMPRESSION is 'zlib' or 'zstd'. Compressed payloads start with a NUL
+byte and a codec marker, which JSON text never does, so the loader can read
+both kinds and results written before compression was turned on.
+
+zstd needs the optional zstandard package on every process that reads
+results. Without it the serializer falls back to zlib when writing.
+"""
+
+import logging
+import zlib
+from kombu.serialization import register
+from kombu.utils.json import dumps as json_dumps, loads as json_loads
+from .config import RESULT_COMPRESSION, RESULT_COMPRESSION_MIN_BYTES
+
+try:
+    import zstandard
+except ImportError:  # optional dependency
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+SERIALIZER_NAME = "json_compressed"
+CONTENT_TYPE = "application/x-json-compressed"
+
+_ZLIB_MARKER = b"\x00z"
+_ZSTD_MARKER = b"\x00s"
+
+if RESULT_COMPRESSION == "zstd" and zstandard is None:
+    logger.warning("RESULT_COMPRESSION is zstd but zstandard is not installed, using zlib")
+    RESULT_COMPRESSION = "zlib"
+
+
+def _compress(raw: bytes) -> bytes:
+    if RESULT_COMPRESSION == "zstd":
+        return _ZSTD_MARKER + zstandard.ZstdCompressor(level=3).compress(raw)
+    return _ZLIB_MARKER + zlib.compress(raw, 6)
+
+
+def dumps(obj) -> bytes:
+    raw = json_dumps(obj).encode("utf-8")
+    if RESULT_COMPRESSION in ("zlib", "zstd") and len(raw) >= RESULT_COMPRESSION_MIN_BYTES:
+        compressed = _compress(raw)
+        # Small or already dense payloads can grow, keep whichever is shorter
+        if len(compressed) < len(raw):
+            return compressed
+    return raw
+
+
+def loads(data):
+    if isinstance(data, str):
+        return json_loads(data)
+    marker = data[:2]
+    if marker == _ZLIB_MARKER:
+        return json_loads(zlib.decompress(data[2:]))
+    if marker == _ZSTD_MARKER:
+        if zstandard is None:
+            raise RuntimeError("Result is zstd compressed but zstandard is not installed")
+        return json_loads(zstandard.ZstdDecompressor().decompress(data[2:]))
+    return json_loads(data)
+
+
+register(
+    SERIALIZER_NAME,
+    dumps,
+    loads,
+    content_type=CONTENT_TYPE,
+    content_encoding="binary",
+)
@@ -0,0 +1,126 @@
+"""
+Celery signal handlers.
+Imported by celery_app.celery_app so they are connected in every worker.
+"""
+
+from celery.signals import before_task_publish, task_prerun, task_postrun, task_revoked, worker_process_init
+from celery_app.registry import get_task_spec_for_celery_name
+from services import task_limiter
+from utils import tracing
+from utils.database import reset_engine_after_fork
+from utils.metrics import TASK_QUEUE_WAIT_SECONDS, TASK_RESULT_SIZE, TASK_RUNTIME_SECONDS
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# task_id -> perf_counter() at task_prerun, for the tasks this process is running
+_task_started = {}
+# task_id -> tracing handle of the task's span
+_task_spans = {}
+
+TRACE_HEADERS = ("traceparent", "tracestate")
+
+
+@worker_process_init.connect
+def configure_worker_tracing(**kwargs):
+    # In each pool child, the span exporter thread does not survive the fork
+    tracing.configure_tracing("woopdi-worker")
+
+
+@worker_process_init.connect
+def reset_database_pool(**kwargs):
+    # Connections are not safe to share with the parent process
+    reset_engine_after_fork()
+
+
+@before_task_publish.connect
+def stamp_published_at(headers=None, **kwargs):
+    """
+    Record when the task was sent so the worker can measure how long it queued,
+    and the trace context of the sender. Headers given to send_task win.
+    """
+    if headers is None:
+        return
+    headers.setdefault("published_at", time.time())
+    for key, value in tracing.inject_headers().items():
+        headers.setdefault(key, value)
+
+
+def _request_header(request, key):
+    return getattr(request, key, None) or (request.headers or {}).get(key)
+
+
+@task_prerun.connect
+def record_task_start(sender=None, task_id=None, task=None, **kwargs):
+    """
+    Observe the queue wait of the task and remember when it started.
+    The wait compares wall clocks of the publishing and consuming hosts, so it
+    is only as accurate as their clock sync. Retries count from the retry's publish.
+    """
+    _task_started[task_id] = time.perf_counter()
+    request = task.request
+    queue = (request.delivery_info or {}).get("routing_key") or "unknown"
+    carrier = {key: _request_header(request, key) for key in TRACE_HEADERS if _request_header(request, key)}
+    _task_spans[task_id] = tracing.start_span(
+        f"celery.task {sender.name}", carrier, task_id=task_id, task_name=sender.name, queue=queue,
+    )
+    published_at = _request_header(request, "published_at")
+    if published_at is None:
+        return
+    TASK_QUEUE_WAIT_SECONDS.labels(task_name=sender.name, queue=queue).observe(max(0.0, time.time() - float(published_at)))
+
+
+@task_postrun.connect
+def record_task_runtime(sender=None, task_id=None, state=None, retval=None, **kwargs):
+    started = _task_started.pop(task_id, None)
+    if started is not None:
+        TASK_RUNTIME_SECONDS.labels(task_name=sender.name, state=state or "unknown").observe(time.perf_counter() - started)
+    error = retval if state == "FAILURE" and isinstance(retval, BaseException) else None
+    tracing.end_span(_task_spans.pop(task_id, None), error=error, state=state)
+
+
+@task_postrun.connect
+def release_task_limits(sender=None, task_id=None, state=None, **kwargs):
+    """Give back the task's concurrent slots once it finished, unless it will run again."""
+    if state == "RETRY":
+        return
+    try:
+        task_limiter.release(task_id, task_name=sender.name)
+    except Exception as e:
+        # The slot lease expires on its own, so never fail the task over this
+        logger.error(f"Failed to release task limits for {task_id}: {e}")
+
+
+@task_postrun.connect
+def apply_result_policy(sender=None, task_id=None, **kwargs):
+    """
+    Shorten the stored result's expiry to the task's result_expires and record its size.
+    The backend has already written the result when task_postrun is sent.
+    """
+    if sender.ignore_result:
+        return
+    spec = get_task_spec_for_celery_name(sender.name)
+    try:
+        backend = sender.backend
+        key = backend.get_key_for_task(task_id)
+        pipe = backend.client.pipeline(transaction=False)
+        pipe.strlen(key)
+        if spec is not None and spec.result_expires:
+            pipe.expire(key, spec.result_expires)
+        size = pipe.execute()[0]
+        if size:
+            TASK_RESULT_SIZE.labels(task_name=sender.name).observe(size)
+    except Exception as e:
+        logger.error(f"Failed to apply result policy for {task_id}: {e}")
+
+
+@task_revoked.connect
+def release_revoked_task_limits(sender=None, request=None, **kwargs):
+    """Revoked tasks never reach task_postrun, release their slots here."""
+    _task_started.pop(request.id, None)
+    tracing.end_span(_task_spans.pop(request.id, None), state="REVOKED")
+    try:
+        task_limiter.release(request.id, task_name=sender.name)
+    except Exception as e:
+        logger.error(f"Failed to release task limits for revoked task {request.id}: {e}")
@@ -6,10 +6,16 @@ This allows Celery tasks to publish progress and status updates via Redis.
 import redis
 import json
 import datetime
+import time
 from contextlib import contextmanager
 from typing import Any, Dict, Optional
 from celery.app.task import Task
 import os
+from utils import tracing
+from utils.metrics import TASK_STAGE_SECONDS
+
+# stage label of stages started without a name
+UNNAMED_STAGE = "unnamed"
 
 
 class TaskStreamer:
@@ -19,7 +25,7 @@ class TaskStreamer:
     that can be consumed by WebSocket clients.
     """
     
-    def __init__(self, task_id: str, redis_client: Optional[redis.Redis] = None):
+    def __init__(self, task_id: str, redis_client: Optional[redis.Redis] = None, task_name: Optional[str] = None):
         """
         Initialize the TaskStreamer.
         
@@ -27,8 +33,10 @@ class TaskStreamer:
             task_id: The ID of the Celery task
             redis_client: Optional Redis client instance. If not provided,
                          a new one will be created using environment settings.
+            task_name: Celery name of the task, the label stage timings are recorded under
         """
         self.task_id = task_id
+        self.task_name = task_name or "unknown"
         if redis_client:
             self.redis_client = redis_client
         else:
@@ -60,24 +68,36 @@ class TaskStreamer:
             "timestamp": datetime.datetime.utcnow().isoformat(),
             **kwargs
         }
+        trace_id = tracing.current_trace_id()
+        if trace_id:
+            update["trace_id"] = trace_id
         
         # Serialize to JSON and publish
         self.redis_client.publish(f"task:{self.task_id}", json.dumps(update))
     
     @contextmanager
-    def stage(self, message: str, stage_num: Optional[int] = None, total: Optional[int] = None):
+    def stage(self, message: str, stage_num: Optional[int] = None, total: Optional[int] = None, name: Optional[str] = None):
         """
         Context manager for tracking stages in a task.
+        The stage's duration is recorded in the celery_task_stage_seconds histogram
+        and, when tracing is on, as a span of the task's trace.
         
         Args:
             message: Description of the stage
             stage_num: Current stage number (1-indexed)
             total: Total number of stages
+            name: Short, fixed name to record the duration under. Stages without one
+                are recorded as UNNAMED_STAGE, the message would make a label per value
         """
         self.update(message, type="stage_start", stage=stage_num, total_stages=total)
+        start = time.perf_counter()
+        outcome = "error"
         try:
-            yield self
+            with tracing.span(f"stage {name or message}", stage=stage_num, total_stages=total):
+                yield self
+            outcome = "success"
         finally:
+            TASK_STAGE_SECONDS.labels(task_name=self.task_name, stage=name or UNNAMED_STAGE, outcome=outcome).observe(time.perf_counter() - start)
             self.update(f"Completed: {message}", type="stage_end")
     
     def progress(self, message: str, current: int, total: int, **data: Any) -> None:
@@ -110,4 +130,4 @@ def get_task_streamer(task: Task) -> TaskStreamer:
     Returns:
         TaskStreamer: Instance for streaming updates
     """
-    return TaskStreamer(task.request.id)
\ No newline at end of file
+    return TaskStreamer(task.request.id, task_name=task.name)
\ No newline at end of file
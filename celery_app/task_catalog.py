@@ -0,0 +1,31 @@
+"""
+The tasks the API can start by name, see celery_app/registry.py.
+Keep this module light: it is imported by the API, which never imports the
+task implementations in celery_app/tasks.
+"""
+
+from .config import DEFAULT_QUEUE, IMAGE_GENERATION_QUEUE
+from .registry import declare_task
+from types_definitions.tools import ExampleStreamingParams, GenerateImageWithLogoParams
+
+declare_task(
+    "example_streaming",
+    celery_name='celery_app.tasks.example_streaming_task',
+    queue=DEFAULT_QUEUE,
+    priority=3,
+    soft_time_limit=90,
+    time_limit=120,
+    result_expires=3600,
+    params_model=ExampleStreamingParams,
+)
+
+declare_task(
+    "generate_image_with_logo",
+    celery_name='celery_app.tasks.generate_image_with_logo_task',
+    queue=IMAGE_GENERATION_QUEUE,
+    priority=5,
+    soft_time_limit=240,
+    time_limit=300,
+    max_concurrency_per_user=2,
+    params_model=GenerateImageWithLogoParams,
+)
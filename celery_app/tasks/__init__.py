@@ -1,9 +1,17 @@
 from celery_app.celery_app import celery_app
 from .example_streaming_task import example_streaming_task
 from .generate_image_with_logo_task import generate_image_with_logo_task
+from .email_outbox_task import drain_email_outbox_task
+from .stripe_provisioning_task import provision_stripe_customer_task, sweep_pending_stripe_customers_task
+from .stripe_events_task import apply_stripe_events_task, sweep_stripe_events_task
 
 # Re-export the tasks
 __all__ = [
     'example_streaming_task',
-    'generate_image_with_logo_task'
+    'generate_image_with_logo_task',
+    'drain_email_outbox_task',
+    'provision_stripe_customer_task',
+    'sweep_pending_stripe_customers_task',
+    'apply_stripe_events_task',
+    'sweep_stripe_events_task'
 ]
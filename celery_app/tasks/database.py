@@ -1,18 +1,16 @@
 from contextlib import contextmanager
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy import create_engine
 import os
 import sys
 
 # Add the parent directory to the Python path to import models
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
+from utils.database import new_session
+
+
 def get_db_session():
-    """Create a database session for Celery tasks"""
-    DATABASE_URL = os.environ['DATABASE_URL']
-    engine = create_engine(DATABASE_URL)
-    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-    return SessionLocal()
+    """Create a database session for Celery tasks, on the worker process's pooled engine"""
+    return new_session()
 
 @contextmanager
 def get_db_context():
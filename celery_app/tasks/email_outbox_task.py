@@ -0,0 +1,20 @@
+"""
+Periodic task that sends the emails queued in the email_outbox table.
+Scheduled by celery beat every EMAIL_OUTBOX_POLL_SECONDS (celery_app/config.py).
+"""
+
+from celery_app.celery_app import celery_app
+from celery_app.tasks.database import get_db_context
+from services import email_outbox
+
+# Upper bound on batches per run so one run never hogs a worker
+MAX_BATCHES_PER_RUN = 20
+
+
+@celery_app.task(name='celery_app.tasks.drain_email_outbox_task', ignore_result=True)
+def drain_email_outbox_task() -> None:
+    """Send due emails batch by batch until the outbox is empty."""
+    with get_db_context() as db:
+        for _ in range(MAX_BATCHES_PER_RUN):
+            if email_outbox.drain(db) < email_outbox.BATCH_SIZE:
+                break
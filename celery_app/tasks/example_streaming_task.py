@@ -3,10 +3,12 @@ Simple example task demonstrating how to use the TaskStreamer.
 """
 
 from celery_app.celery_app import celery_app
+from celery_app.registry import register_task
 from celery_app.streamer import get_task_streamer
 import time
 
 
+@register_task("example_streaming")
 @celery_app.task(bind=True, name='celery_app.tasks.example_streaming_task')
 def example_streaming_task(self,user_id: int = None, duration: int = 10) -> dict:
     """
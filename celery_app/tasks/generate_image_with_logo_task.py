@@ -11,6 +11,7 @@ from io import BytesIO
 from PIL import Image, ImageOps
 import replicate
 from celery_app.celery_app import celery_app
+from celery_app.registry import register_task
 from celery_app.streamer import get_task_streamer
 from celery_app.tasks.database import get_db_context
 from models.asset import Asset
@@ -25,7 +26,9 @@ LOGO_URL = "https://storage.googleapis.com/woopdi-cloud-assets/woopdi-light-back
 LOGO_POSITION = "bottom_left"  # bottom_left, bottom_right, top_left, top_right
 LOGO_SIZE_PERCENT = 0.15  # Logo size as percentage of image width
 TARGET_SIZE = (1024, 1024)  # 1:1 aspect ratio target size
+TOTAL_STAGES = 5  # inference, download, overlay, upload, db_save
 
+@register_task("generate_image_with_logo")
 @celery_app.task(bind=True, name='celery_app.tasks.generate_image_with_logo_task')
 def generate_image_with_logo_task(
     self,
@@ -44,7 +47,8 @@ def generate_image_with_logo_task(
         num_inference_steps: Number of inference steps (default: 50)
 
     Returns:
-        dict: Asset details including ID, URL, and metadata
+        dict: Status and the ID of the saved asset. The URL and metadata live on
+        the Asset row and are streamed with the task_end update.
     """
     # Get the task streamer for progress updates
     streamer = get_task_streamer(self)
@@ -54,115 +58,109 @@ def generate_image_with_logo_task(
         streamer.update("Starting image generation task", type="task_start")
 
         # Step 1: Generate image with Qwen
-        streamer.update("Generating image with Qwen AI...", type="progress")
-        logger.info(f"Generating image for prompt: {prompt}")
-
-        # Generate a random seed for unique image generation
-        import random
-        random_seed = random.randint(0, 1000000)
-
-        input_params = {
-            "prompt": prompt,
-            "guidance": guidance,
-            "num_inference_steps": num_inference_steps,
-            "aspect_ratio": "1:1",  # Use Qwen's built-in aspect ratio
-            "seed": random_seed  # Add random seed for unique generation
-        }
+        with streamer.stage("Generating image with Qwen AI...", stage_num=1, total=TOTAL_STAGES, name="inference"):
+            logger.info(f"Generating image for prompt: {prompt}")
+
+            # Generate a random seed for unique image generation
+            import random
+            random_seed = random.randint(0, 1000000)
+
+            input_params = {
+                "prompt": prompt,
+                "guidance": guidance,
+                "num_inference_steps": num_inference_steps,
+                "aspect_ratio": "1:1",  # Use Qwen's built-in aspect ratio
+                "seed": random_seed  # Add random seed for unique generation
+            }
+
+            output = replicate.run(
+                "qwen/qwen-image",
+                input=input_params
+            )
 
-        output = replicate.run(
-            "qwen/qwen-image",
-            input=input_params
-        )
-
-        # Debug logging to understand output format
-        logger.info(f"Replicate output type: {type(output)}")
-        logger.info(f"Replicate output content: {output}")
-        if isinstance(output, list) and len(output) > 0:
-            logger.info(f"First output item type: {type(output[0])}")
-            logger.info(f"First output item content: {output[0]}")
-
-        # Get the first image URL
-        # Handle different output formats from Replicate
-        if isinstance(output, list) and len(output) > 0:
-            first_item = output[0]
-            if hasattr(first_item, 'url') and callable(getattr(first_item, 'url')):
-                image_url = first_item.url()
-                logger.info(f"Using object.url() method: {image_url}")
+            # Debug logging to understand output format
+            logger.info(f"Replicate output type: {type(output)}")
+            logger.info(f"Replicate output content: {output}")
+            if isinstance(output, list) and len(output) > 0:
+                logger.info(f"First output item type: {type(output[0])}")
+                logger.info(f"First output item content: {output[0]}")
+
+            # Get the first image URL
+            # Handle different output formats from Replicate
+            if isinstance(output, list) and len(output) > 0:
+                first_item = output[0]
+                if hasattr(first_item, 'url') and callable(getattr(first_item, 'url')):
+                    image_url = first_item.url()
+                    logger.info(f"Using object.url() method: {image_url}")
+                else:
+                    image_url = str(first_item)
+                    logger.info(f"Using direct string conversion: {image_url}")
             else:
-                image_url = str(first_item)
-                logger.info(f"Using direct string conversion: {image_url}")
-        else:
-            raise ValueError(f"Unexpected output format from Replicate: {output}")
-
-        streamer.update("Image generated successfully, downloading...", type="progress")
+                raise ValueError(f"Unexpected output format from Replicate: {output}")
 
-        # Step 2: Download generated image
-        response = requests.get(image_url)
-        response.raise_for_status()
-        generated_image = Image.open(BytesIO(response.content))
+        # Steps 2 and 3: Download generated image and logo
+        with streamer.stage("Image generated successfully, downloading image and logo...", stage_num=2, total=TOTAL_STAGES, name="download"):
+            response = requests.get(image_url)
+            response.raise_for_status()
+            generated_image = Image.open(BytesIO(response.content))
 
-        # Step 3: Download and process logo
-        streamer.update("Downloading and processing logo...", type="progress")
-        logo_response = requests.get(LOGO_URL)
-        logo_response.raise_for_status()
-        logo = Image.open(BytesIO(logo_response.content))
+            logo_response = requests.get(LOGO_URL)
+            logo_response.raise_for_status()
+            logo = Image.open(BytesIO(logo_response.content))
 
         # Step 4: Process images
-        streamer.update("Processing images and overlaying logo...", type="progress")
+        with streamer.stage("Processing images and overlaying logo...", stage_num=3, total=TOTAL_STAGES, name="overlay"):
+            # Resize logo based on percentage of image width
+            logo_width = int(generated_image.width * LOGO_SIZE_PERCENT)
+            logo_height = int(logo.height * (logo_width / logo.width))
+            logo = logo.resize((logo_width, logo_height), Image.Resampling.LANCZOS)
 
-        # Resize logo based on percentage of image width
-        logo_width = int(generated_image.width * LOGO_SIZE_PERCENT)
-        logo_height = int(logo.height * (logo_width / logo.width))
-        logo = logo.resize((logo_width, logo_height), Image.Resampling.LANCZOS)
+            # Resize to target dimensions (Qwen should already provide 1:1, but ensure it)
+            final_image = generated_image.resize(TARGET_SIZE, Image.Resampling.LANCZOS)
 
-        # Resize to target dimensions (Qwen should already provide 1:1, but ensure it)
-        final_image = generated_image.resize(TARGET_SIZE, Image.Resampling.LANCZOS)
-
-        # Overlay logo in bottom-left corner
-        final_image = _overlay_logo(final_image, logo, LOGO_POSITION)
+            # Overlay logo in bottom-left corner
+            final_image = _overlay_logo(final_image, logo, LOGO_POSITION)
 
         # Step 5: Upload to Google Cloud Storage
-        streamer.update("Uploading to cloud storage...", type="progress")
-
-        # Generate unique filename
-        filename = f"generated_{uuid.uuid4().hex}.png"
-        bucket_name = os.getenv("GCP_BUCKET_NAME")
-        blob_name = f"generated-images/{filename}"
+        with streamer.stage("Uploading to cloud storage...", stage_num=4, total=TOTAL_STAGES, name="upload"):
+            # Generate unique filename
+            filename = f"generated_{uuid.uuid4().hex}.png"
+            bucket_name = os.getenv("GCP_BUCKET_NAME")
+            blob_name = f"generated-images/{filename}"
 
-        # Upload to GCP
-        public_url = _upload_to_gcp(final_image, blob_name, bucket_name)
+            # Upload to GCP
+            public_url = _upload_to_gcp(final_image, blob_name, bucket_name)
 
         # Step 6: Save to database
-        streamer.update("Saving asset to database...", type="progress")
-
-        asset_id = None
-        with get_db_context() as db:
-            asset = Asset(
-                filename=filename,
-                bucket_name=bucket_name,
-                file_path=blob_name,
-                content_type="image/png",
-                file_size=len(_image_to_bytes(final_image)),
-                user_id=user_id,
-                preserve=False,
-                public_url=public_url,
-                upload_source="ai_generation",
-                meta={
-                    "prompt": prompt,
-                    "guidance": guidance,
-                    "num_inference_steps": num_inference_steps,
-                    "ai_model": "qwen-image",
-                    "logo_overlay": True,
-                    "logo_position": LOGO_POSITION,
-                    "aspect_ratio": "1:1",
-                    "target_size": f"{TARGET_SIZE[0]}x{TARGET_SIZE[1]}"
-                }
-            )
-
-            db.add(asset)
-            db.commit()
-            db.refresh(asset)
-            asset_id = asset.id  # Get the ID while session is still active
+        with streamer.stage("Saving asset to database...", stage_num=5, total=TOTAL_STAGES, name="db_save"):
+            asset_id = None
+            with get_db_context() as db:
+                asset = Asset(
+                    filename=filename,
+                    bucket_name=bucket_name,
+                    file_path=blob_name,
+                    content_type="image/png",
+                    file_size=len(_image_to_bytes(final_image)),
+                    user_id=user_id,
+                    preserve=False,
+                    public_url=public_url,
+                    upload_source="ai_generation",
+                    meta={
+                        "prompt": prompt,
+                        "guidance": guidance,
+                        "num_inference_steps": num_inference_steps,
+                        "ai_model": "qwen-image",
+                        "logo_overlay": True,
+                        "logo_position": LOGO_POSITION,
+                        "aspect_ratio": "1:1",
+                        "target_size": f"{TARGET_SIZE[0]}x{TARGET_SIZE[1]}"
+                    }
+                )
+
+                db.add(asset)
+                db.commit()
+                db.refresh(asset)
+                asset_id = asset.id  # Get the ID while session is still active
 
         # Send final result via WebSocket
         final_result = {
@@ -175,7 +173,11 @@ def generate_image_with_logo_task(
 
         streamer.update("Image generation completed successfully!", type="task_end", data=final_result)
 
-        return final_result
+        # Only what the Asset row does not already hold goes to the result backend
+        return {
+            "status": "completed",
+            "asset_id": asset_id,
+        }
 
     except Exception as e:
         error_message = f"Task failed with error: {str(e)}"
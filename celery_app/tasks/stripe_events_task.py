@@ -0,0 +1,30 @@
+"""
+Tasks that apply stored Stripe webhook events (services/stripe_events.py).
+"""
+
+from celery_app.celery_app import celery_app
+from celery_app.tasks.database import get_db_context
+from services import stripe_events
+
+# Customers with events unprocessed for longer than this get their request sent again
+SWEEP_AFTER_SECONDS = 60
+
+
+@celery_app.task(bind=True, name='celery_app.tasks.apply_stripe_events_task', ignore_result=True, max_retries=30)
+def apply_stripe_events_task(self, customer_id: str) -> None:
+    """Apply the unprocessed events of a Stripe customer in order."""
+    with get_db_context() as db:
+        applied = stripe_events.apply_customer_events(db, customer_id)
+    if applied is None:
+        # Another worker is applying this customer's events, run again once it is done
+        # so events stored after it read the queue are not left for the sweep
+        raise self.retry(countdown=1)
+
+
+@celery_app.task(name='celery_app.tasks.sweep_stripe_events_task', ignore_result=True)
+def sweep_stripe_events_task() -> None:
+    """Re-request customers whose events were not applied."""
+    with get_db_context() as db:
+        customer_ids = stripe_events.customers_with_unprocessed_events(db, SWEEP_AFTER_SECONDS)
+    for customer_id in customer_ids:
+        apply_stripe_events_task.delay(customer_id)
@@ -0,0 +1,42 @@
+"""
+Tasks for the Stripe customer provisioning saga (services/stripe_provisioning.py).
+"""
+
+import stripe
+from celery_app.celery_app import celery_app
+from celery_app.tasks.database import get_db_context
+from services import stripe_provisioning
+
+# Organizations pending for longer than this get their request sent again
+SWEEP_AFTER_SECONDS = 120
+
+
+@celery_app.task(bind=True, name='celery_app.tasks.provision_stripe_customer_task', ignore_result=True, max_retries=8)
+def provision_stripe_customer_task(self, organization_id: int) -> None:
+    """Create and backfill the Stripe customer of a pending organization."""
+    try:
+        with get_db_context() as db:
+            stripe_provisioning.provision_customer(db, organization_id)
+    except stripe_provisioning.RETRYABLE_ERRORS as e:
+        if self.request.retries >= self.max_retries:
+            with get_db_context() as db:
+                stripe_provisioning.mark_failed(db, organization_id, str(e))
+            stripe_provisioning.release_request(organization_id)
+            return
+        stripe_provisioning.extend_request(organization_id)
+        # 5s, 10s, 20s ... capped at 10 minutes
+        raise self.retry(exc=e, countdown=min(5 * 2 ** self.request.retries, 600))
+    except stripe.error.StripeError as e:
+        with get_db_context() as db:
+            stripe_provisioning.mark_failed(db, organization_id, str(e))
+    stripe_provisioning.release_request(organization_id)
+
+
+@celery_app.task(name='celery_app.tasks.sweep_pending_stripe_customers_task', ignore_result=True)
+def sweep_pending_stripe_customers_task() -> None:
+    """Re-request organizations whose provisioning request was lost, skipping those with one in flight."""
+    with get_db_context() as db:
+        organization_ids = stripe_provisioning.stale_pending_organization_ids(db, SWEEP_AFTER_SECONDS)
+    for organization_id in organization_ids:
+        if stripe_provisioning.claim_request(organization_id):
+            provision_stripe_customer_task.delay(organization_id)
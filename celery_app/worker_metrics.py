@@ -0,0 +1,59 @@
+"""
+Prometheus exporter for the Celery workers.
+
+The metrics in utils/metrics.py are recorded by the prefork children that run
+the tasks, so the exporter is started once in the worker's main process and
+reads the children's samples from PROMETHEUS_MULTIPROC_DIR. Without that
+directory only the main process's own samples would be served, so set it for
+workers that use the prefork pool.
+
+CELERY_METRICS_PORT chooses the port, 0 disables the exporter. Workers that
+share a host need different ports and directories.
+"""
+
+import logging
+import os
+import shutil
+from celery.signals import worker_init, worker_process_shutdown
+from prometheus_client import CollectorRegistry, start_http_server
+from prometheus_client import multiprocess
+
+logger = logging.getLogger(__name__)
+
+CELERY_METRICS_PORT = int(os.getenv("CELERY_METRICS_PORT", 0))
+
+
+def _clear_multiproc_dir(path: str) -> None:
+    """Drop the samples of children from a previous run of the worker."""
+    os.makedirs(path, exist_ok=True)
+    for entry in os.listdir(path):
+        entry_path = os.path.join(path, entry)
+        if os.path.isdir(entry_path):
+            shutil.rmtree(entry_path, ignore_errors=True)
+        else:
+            os.remove(entry_path)
+
+
+@worker_init.connect
+def start_metrics_exporter(**kwargs):
+    if not CELERY_METRICS_PORT:
+        return
+    multiproc_dir = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+    try:
+        if multiproc_dir:
+            _clear_multiproc_dir(multiproc_dir)
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+            start_http_server(CELERY_METRICS_PORT, registry=registry)
+        else:
+            start_http_server(CELERY_METRICS_PORT)
+        logger.info(f"Serving Celery worker metrics on port {CELERY_METRICS_PORT}")
+    except OSError as e:
+        # A port clash must not keep the worker from consuming
+        logger.error(f"Failed to start the Celery metrics exporter on port {CELERY_METRICS_PORT}: {e}")
+
+
+@worker_process_shutdown.connect
+def mark_child_dead(pid=None, **kwargs):
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(pid or os.getpid())
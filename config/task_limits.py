@@ -0,0 +1,51 @@
+# Limits for tools tasks (POST /tools/task/{task_name})
+# Every task start takes one token from the user's and the organization's token
+# bucket and one concurrent slot for the user and the organization. Slots are
+# handed back when the Celery task finishes.
+
+class TaskLimits:
+    # Turn off to skip all limit checks (e.g. for local load testing)
+    ENABLED = True
+
+    # Limits per subscription tier, keyed by Subscription.price_id.
+    # rate: tasks per minute refilled into the bucket
+    # burst: bucket capacity, i.e. how many tasks can start back to back
+    # concurrent: how many tasks may be queued or running at the same time
+    # Add your Stripe price ids here to give paid plans their own limits.
+    TIERS = {
+        # users without an active subscription
+        "default": {
+            "user_rate": 4, "user_burst": 4, "user_concurrent": 2,
+            "org_rate": 10, "org_burst": 10, "org_concurrent": 4,
+        },
+        "free_plan": {
+            "user_rate": 6, "user_burst": 6, "user_concurrent": 2,
+            "org_rate": 20, "org_burst": 20, "org_concurrent": 6,
+        },
+        # any active subscription whose price_id is not listed above
+        "paid": {
+            "user_rate": 30, "user_burst": 20, "user_concurrent": 6,
+            "org_rate": 120, "org_burst": 60, "org_concurrent": 30,
+        },
+    }
+    DEFAULT_TIER = "default"
+    PAID_TIER = "paid"
+
+    # Fair scheduling weights per tier (celery_app/fair_scheduler.py).
+    # In every round the scheduler forwards up to this many queued tasks per
+    # organization, so a paid org gets 4x the throughput of a free one when
+    # both have a backlog.
+    TIER_WEIGHTS = {
+        "default": 1,
+        "free_plan": 1,
+        "paid": 4,
+    }
+
+    # Subscription statuses that count as an active plan
+    ACTIVE_SUBSCRIPTION_STATUSES = ("active", "trialing")
+
+    # Slots are leased so a worker that dies mid task cannot hold one forever.
+    # The lease is the task's hard time limit plus this margin, or the default
+    # lease for tasks without a time limit.
+    SLOT_LEASE_MARGIN_SECONDS = 60
+    DEFAULT_SLOT_LEASE_SECONDS = 60 * 60
@@ -1,3 +1,3 @@
 from .get import get
-from .list import list_assets, count_assets
+from .list import list_assets, assets_version
 from .delete import delete
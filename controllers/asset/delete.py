@@ -1,10 +1,10 @@
 from sqlalchemy.orm import Session
 from models.asset import Asset
 from models.user import User
-from google.cloud import storage
 from google.cloud.exceptions import GoogleCloudError
 import os
 import logging
+from middleware import measure
 
 logger = logging.getLogger(__name__)
 
@@ -37,16 +37,19 @@ def delete(db: Session, asset_id: int, current_user: User):
             # Initialize GCP client
             service_account_key = os.getenv("GCP_SERVICE_ACCOUNT_KEY")
             if service_account_key:
-                client = storage.Client.from_service_account_json(service_account_key)
-                bucket = client.get_bucket(asset.bucket_name)
-                blob = bucket.blob(asset.file_path)
+                # Imported on first use, google.cloud.storage is slow to import
+                from google.cloud import storage
+                with measure("storage"):
+                    client = storage.Client.from_service_account_json(service_account_key)
+                    bucket = client.get_bucket(asset.bucket_name)
+                    blob = bucket.blob(asset.file_path)
                 
-                # Check if blob exists before trying to delete
-                if blob.exists():
-                    blob.delete()
-                    logger.info(f"Successfully deleted file from GCP: {asset.bucket_name}/{asset.file_path}")
-                else:
-                    logger.warning(f"File not found in GCP (may have been already deleted): {asset.bucket_name}/{asset.file_path}")
+                    # Check if blob exists before trying to delete
+                    if blob.exists():
+                        blob.delete()
+                        logger.info(f"Successfully deleted file from GCP: {asset.bucket_name}/{asset.file_path}")
+                    else:
+                        logger.warning(f"File not found in GCP (may have been already deleted): {asset.bucket_name}/{asset.file_path}")
                 
                 gcp_deletion_success = True
             else:
@@ -1,3 +1,4 @@
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from models.asset import Asset
 from models.user import User
@@ -24,19 +25,21 @@ def list_assets(db: Session, current_user: User, skip: int = 0, limit: int = 100
     assets = query.order_by(Asset.created_at.desc()).offset(skip).limit(limit).all()
     return assets
 
-def count_assets(db: Session, current_user: User, user_id: Optional[int] = None, upload_source: Optional[str] = None):
-    """Get total count of assets with permission filtering"""
-    query = db.query(Asset)
-    
+def assets_version(db: Session, current_user: User, user_id: Optional[int] = None, upload_source: Optional[str] = None):
+    """
+    (count, newest id, newest created_at) of the assets list_assets filters, in one query.
+    Assets are never edited, so any insert or delete changes it. The count is the listing's total.
+    """
+    query = db.query(func.count(Asset.id), func.max(Asset.id), func.max(Asset.created_at))
+
     # Permission filtering (same logic as list_assets)
     if current_user.role in ["superadmin", "admin"]:
         if user_id is not None:
             query = query.filter(Asset.user_id == user_id)
     else:
         query = query.filter(Asset.user_id == current_user.id)
-    
-    # Upload source filtering
+
     if upload_source is not None:
         query = query.filter(Asset.upload_source == upload_source)
-    
-    return query.count() 
\ No newline at end of file
+
+    return tuple(query.one())
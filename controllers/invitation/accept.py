@@ -6,25 +6,13 @@ from models.organization import OrganizationUser, Organization
 from types_definitions.invitation import InvitationAccept, SuccessResponse
 from types_definitions.organization_user import OrganizationUserRole
 from utils.password import get_password_hash
+from services import memberships, stripe_provisioning
 from datetime import datetime, timedelta
 import jwt
 import os
-import stripe
-from dotenv import load_dotenv
 
 JWT_SECRET = os.environ.get('JWT_SECRET')
 
-# Global variable to store stripe api key
-_stripe_api_key = None
-
-def _get_stripe_api_key():
-    """Get Stripe API key, loading it if not already loaded"""
-    global _stripe_api_key
-    if _stripe_api_key is None:
-        load_dotenv()
-        _stripe_api_key = os.getenv("STRIPE_SECRET_KEY")
-    return _stripe_api_key
-
 def accept(db: Session, invitation_accept_data: InvitationAccept):
     # 1. Validate the invitation token
     invitation = db.query(Invitation).filter(Invitation.token == invitation_accept_data.token).first()
@@ -53,39 +41,16 @@ def accept(db: Session, invitation_accept_data: InvitationAccept):
         db.add(new_user)
         db.flush() # Flush to get the new_user.id
 
-        # Initialize Stripe with API key if not already done
-        stripe.api_key = _get_stripe_api_key()
-
-        # Create the Stripe Customer for solo organization
-        try:
-            solo_stripe_customer = stripe.Customer.create(
-                email=new_user.email,
-                name=f"{new_user.email} - SOLO",
-                metadata={"role": new_user.role, "org_type": "solo"}
-            )
-        except stripe.error.StripeError as e:
-            if "email" in str(e).lower() and "already exists" in str(e).lower():
-                # If customer with this email already exists, create with a unique email
-                import uuid
-                unique_suffix = str(uuid.uuid4())[:8]
-                unique_email = f"{new_user.email.split('@')[0]}+solo+{unique_suffix}@{new_user.email.split('@')[1]}"
-                solo_stripe_customer = stripe.Customer.create(
-                    email=unique_email,
-                    name=f"{new_user.email} - SOLO",
-                    metadata={"role": new_user.role, "org_type": "solo", "original_email": new_user.email}
-                )
-            else:
-                raise e
-
-        # Create the solo Organization for the user
+        # Create the solo Organization for the user, its Stripe customer is created after commit
         db_solo_organization = Organization(
             name=f"{new_user.email}'s SOLO Team",
             is_solo=True,
             org_owner=new_user.id,
-            stripe_customer_id=solo_stripe_customer.id
+            stripe_customer_status=stripe_provisioning.PENDING
         )
         db.add(db_solo_organization)
         db.flush()
+        solo_organization_id = db_solo_organization.id
 
         # Link the user to the solo organization with an ADMIN role
         db_solo_org_user_link = OrganizationUser(
@@ -114,6 +79,8 @@ def accept(db: Session, invitation_accept_data: InvitationAccept):
         db.add(new_token_record)
 
         db.commit()
+        memberships.invalidate_user(new_user.id, db)
+        stripe_provisioning.request_customer(solo_organization_id)
 
         return {"token": jwt_token}
 
@@ -129,40 +96,18 @@ def accept(db: Session, invitation_accept_data: InvitationAccept):
         ).first()
 
         # If user doesn't have a solo organization, create one
+        solo_organization_id = None
         if not existing_solo_org:
-            # Initialize Stripe with API key if not already done
-            stripe.api_key = _get_stripe_api_key()
-
-            # Create the Stripe Customer for solo organization
-            try:
-                solo_stripe_customer = stripe.Customer.create(
-                    email=existing_user.email,
-                    name=f"{existing_user.email} - SOLO",
-                    metadata={"role": existing_user.role, "org_type": "solo"}
-                )
-            except stripe.error.StripeError as e:
-                if "email" in str(e).lower() and "already exists" in str(e).lower():
-                    # If customer with this email already exists, create with a unique email
-                    import uuid
-                    unique_suffix = str(uuid.uuid4())[:8]
-                    unique_email = f"{existing_user.email.split('@')[0]}+solo+{unique_suffix}@{existing_user.email.split('@')[1]}"
-                    solo_stripe_customer = stripe.Customer.create(
-                        email=unique_email,
-                        name=f"{existing_user.email} - SOLO",
-                        metadata={"role": existing_user.role, "org_type": "solo", "original_email": existing_user.email}
-                    )
-                else:
-                    raise e
-
-            # Create the solo Organization for the user
+            # Create the solo Organization for the user, its Stripe customer is created after commit
             db_solo_organization = Organization(
                 name=f"{existing_user.email}'s SOLO Team",
                 is_solo=True,
                 org_owner=existing_user.id,
-                stripe_customer_id=solo_stripe_customer.id
+                stripe_customer_status=stripe_provisioning.PENDING
             )
             db.add(db_solo_organization)
             db.flush()
+            solo_organization_id = db_solo_organization.id
 
             # Link the user to the organization with an ADMIN role
             db_solo_org_user_link = OrganizationUser(
@@ -182,5 +127,9 @@ def accept(db: Session, invitation_accept_data: InvitationAccept):
 
         invitation.status = 'accepted'
         db.commit()
+        memberships.invalidate_user(existing_user.id, db)
+
+        if solo_organization_id is not None:
+            stripe_provisioning.request_customer(solo_organization_id)
 
         return {"message": "Invitation accepted successfully. You can now access the new organization."}
@@ -6,7 +6,7 @@ from models.user import User
 from models.organization import Organization
 from types_definitions.invitation import InvitationCreate, InvitationRead
 from fastapi import HTTPException, status
-from services.email_service import woopdi_mail
+from services.email_outbox import enqueue_email
 import os
 
 
@@ -30,26 +30,23 @@ def create(db: Session, invitation: InvitationCreate, inviter: User) -> Invitati
     )
 
     db.add(db_invitation)
+
+    # Queue the invitation email, it is sent by the email outbox worker once committed
+    frontend_url = os.environ.get("FRONTEND_URL", "http://localhost:3000")
+    accept_link = f"{frontend_url}/accept-invitation?token={token}"
+    enqueue_email(
+        db,
+        template_name="invitation",
+        recipient_email=invitation.email,
+        params={
+            "inviter_email": inviter.email,
+            "organization_name": organization.name,
+            "accept_link": accept_link
+        },
+        idempotency_key=f"invitation:{token}"
+    )
+
     db.commit()
     db.refresh(db_invitation)
 
-    # Send invitation email
-    try:
-        frontend_url = os.environ.get("FRONTEND_URL", "http://localhost:3000")
-        accept_link = f"{frontend_url}/accept-invitation?token={token}"
-        
-        woopdi_mail.notify(
-            template_name="invitation",
-            recipient_email=invitation.email,
-            params={
-                "inviter_email": inviter.email,
-                "organization_name": organization.name,
-                "accept_link": accept_link
-            }
-        )
-    except Exception as e:
-        # Log the error, but don't fail the request if the email fails to send.
-        # The user can still be invited manually.
-        print(f"Error sending invitation email: {e}")
-
     return db_invitation
\ No newline at end of file
@@ -1,2 +1,2 @@
-from .list import list_organizations
+from .list import list_organizations, organizations_version
 from .create_nonsolo import create_nonsolo_organization as create_user_organization
@@ -3,6 +3,8 @@ from fastapi import HTTPException, status
 from models.organization import Organization, OrganizationUser
 from models.user import User
 from types_definitions.organization_user import OrganizationUserRole
+from middleware import measure
+from services import memberships
 import stripe
 from dotenv import load_dotenv
 import os
@@ -40,27 +42,28 @@ def create_nonsolo_organization(db: Session, current_user: User):
     stripe.api_key = _get_stripe_api_key()
 
     # Create the Stripe Customer for non-solo organization
-    try:
-        non_solo_stripe_customer = stripe.Customer.create(
-            email=current_user.email,
-            name=f"{current_user.email} - TEAM",
-            metadata={"role": current_user.role, "org_type": "team"}
-        )
-    except stripe.error.StripeError as e:
-        if "email" in str(e).lower() and "already exists" in str(e).lower():
-            # If customer with this email already exists, create with a unique email
-            unique_suffix = str(uuid.uuid4())[:8]
-            unique_email = f"{current_user.email.split('@')[0]}+team+{unique_suffix}@{current_user.email.split('@')[1]}"
+    with measure("external"):
+        try:
             non_solo_stripe_customer = stripe.Customer.create(
-                email=unique_email,
+                email=current_user.email,
                 name=f"{current_user.email} - TEAM",
-                metadata={"role": current_user.role, "org_type": "team", "original_email": current_user.email}
-            )
-        else:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Stripe error: {str(e)}"
+                metadata={"role": current_user.role, "org_type": "team"}
             )
+        except stripe.error.StripeError as e:
+            if "email" in str(e).lower() and "already exists" in str(e).lower():
+                # If customer with this email already exists, create with a unique email
+                unique_suffix = str(uuid.uuid4())[:8]
+                unique_email = f"{current_user.email.split('@')[0]}+team+{unique_suffix}@{current_user.email.split('@')[1]}"
+                non_solo_stripe_customer = stripe.Customer.create(
+                    email=unique_email,
+                    name=f"{current_user.email} - TEAM",
+                    metadata={"role": current_user.role, "org_type": "team", "original_email": current_user.email}
+                )
+            else:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Stripe error: {str(e)}"
+                )
 
     # Create the non-solo Organization for the user
     db_non_solo_organization = Organization(
@@ -83,5 +86,6 @@ def create_nonsolo_organization(db: Session, current_user: User):
     # Commit the transaction
     db.commit()
     db.refresh(db_non_solo_organization)
+    memberships.invalidate_user(current_user.id, db)
 
     return db_non_solo_organization
@@ -1,3 +1,4 @@
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from models.organization import Organization
@@ -23,3 +24,13 @@ def list_organizations(db: Session, skip: int = 0, limit: int = 100, is_solo: Op
         
     organizations = query.offset(skip).limit(limit).all()
     return organizations
+
+
+def organizations_version(db: Session, is_solo: Optional[bool] = None):
+    """(count, newest id, newest updated_at) of the organizations list_organizations filters, in one query."""
+    query = db.query(func.count(Organization.id), func.max(Organization.id), func.max(Organization.updated_at))
+
+    if is_solo is not None:
+        query = query.filter(Organization.is_solo == is_solo)
+
+    return tuple(query.one())
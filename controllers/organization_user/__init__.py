@@ -1,3 +1,4 @@
-from .list import list_users_in_organization
+from .list import list_users_in_organization, members_version
 from .update_role import update_user_role
-from .remove import remove_user_from_organization
\ No newline at end of file
+from .remove import remove_user_from_organization
+from .stream import stream_users_in_organization
\ No newline at end of file
@@ -1,29 +1,101 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import func
+from sqlalchemy.orm import Query, Session
 from models.organization import OrganizationUser
 from models.user import User
-from typing import List
-from types_definitions.organization_user import OrganizationUserRead
+from typing import Optional
+from fastapi import HTTPException
+from types_definitions.organization_user import OrganizationUserPage, OrganizationUserRead, OrganizationUserRole
 
-def list_users_in_organization(db: Session, org_id: int) -> List[OrganizationUserRead]:
-    """List all users in an organization with enriched user information."""
-    # Query organization users with joined user information
-    organization_users = db.query(OrganizationUser)\
+
+def members_query(db: Session, org_id: int, cursor: Optional[str] = None, role: Optional[OrganizationUserRole] = None, email_prefix: Optional[str] = None) -> Query:
+    """
+    Members of an organization ordered by membership id, as column rows rather than ORM entities.
+    Paging is by keyset: cursor is the last membership id of the previous page.
+    """
+    after_id = None
+    if cursor is not None:
+        try:
+            after_id = int(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    query = db.query(
+            OrganizationUser.id,
+            OrganizationUser.user_id,
+            OrganizationUser.organization_id,
+            OrganizationUser.role,
+            User.email,
+            User.confirmed,
+            User.role.label("user_role"),
+        )\
+        .join(User, OrganizationUser.user_id == User.id)\
+        .filter(OrganizationUser.organization_id == org_id)
+
+    if after_id is not None:
+        query = query.filter(OrganizationUser.id > after_id)
+    if role is not None:
+        query = query.filter(OrganizationUser.role == role)
+    if email_prefix:
+        query = query.filter(User.email.startswith(email_prefix, autoescape=True))
+
+    return query.order_by(OrganizationUser.id)
+
+
+def members_version(db: Session, org_id: int, role: Optional[OrganizationUserRole] = None, email_prefix: Optional[str] = None):
+    """
+    (count, newest membership id, newest membership and user updated_at) of the
+    members members_query filters, in one query on the member listing indexes.
+    """
+    query = db.query(
+            func.count(OrganizationUser.id),
+            func.max(OrganizationUser.id),
+            func.max(OrganizationUser.updated_at),
+            func.max(User.updated_at),
+        )\
         .join(User, OrganizationUser.user_id == User.id)\
-        .filter(OrganizationUser.organization_id == org_id)\
-        .all()
-    
-    # Convert to the enriched schema
-    enriched_users = []
-    for org_user in organization_users:
-        enriched_user = OrganizationUserRead(
-            id=org_user.id,
-            user_id=org_user.user_id,
-            organization_id=org_user.organization_id,
-            role=org_user.role,
-            user_email=org_user.user.email,
-            user_confirmed=org_user.user.confirmed,
-            user_role=org_user.user.role.value
-        )
-        enriched_users.append(enriched_user)
-    
-    return enriched_users
\ No newline at end of file
+        .filter(OrganizationUser.organization_id == org_id)
+
+    if role is not None:
+        query = query.filter(OrganizationUser.role == role)
+    if email_prefix:
+        query = query.filter(User.email.startswith(email_prefix, autoescape=True))
+
+    return tuple(query.one())
+
+
+def to_organization_user_read(row) -> OrganizationUserRead:
+    return OrganizationUserRead(
+        id=row.id,
+        user_id=row.user_id,
+        organization_id=row.organization_id,
+        role=row.role,
+        user_email=row.email,
+        user_confirmed=row.confirmed,
+        user_role=row.user_role.value
+    )
+
+
+def list_users_in_organization(db: Session, org_id: int, cursor: Optional[str] = None, limit: Optional[int] = 100, role: Optional[OrganizationUserRole] = None, email_prefix: Optional[str] = None) -> OrganizationUserPage:
+    """
+    List one page of the users in an organization with enriched user information.
+
+    Args:
+        db: Database session
+        org_id: ID of the organization
+        cursor: Cursor returned by the previous page
+        limit: Maximum number of users to return, None for all of them
+        role: Optional filter to only return users with this role in the organization
+        email_prefix: Optional filter to only return users whose email starts with this
+
+    Returns:
+        OrganizationUserPage: the users, ordered by when they joined, and the cursor of the next page
+    """
+    query = members_query(db, org_id, cursor=cursor, role=role, email_prefix=email_prefix)
+    if limit is None:
+        return OrganizationUserPage(users=[to_organization_user_read(row) for row in query.all()])
+
+    # One extra row tells whether there is a next page
+    rows = query.limit(limit + 1).all()
+    users = [to_organization_user_read(row) for row in rows[:limit]]
+    next_cursor = str(users[-1].id) if len(rows) > limit else None
+    return OrganizationUserPage(users=users, next_cursor=next_cursor)
@@ -3,6 +3,7 @@ from models.organization import OrganizationUser
 from models.user import User
 from fastapi import HTTPException, status
 from types_definitions.organization_user import OrganizationUserRole
+from services import memberships
 
 def remove_user_from_organization(db: Session, org_id: int, user_id: int, current_user: User) -> dict:
     """Remove a user from an organization."""
@@ -16,22 +17,19 @@ def remove_user_from_organization(db: Session, org_id: int, user_id: int, curren
     if not membership:
         raise HTTPException(status_code=404, detail="The user cannot be found in organization")
     
-    # Get the membership of the user making the request
-    requester_membership = db.query(OrganizationUser).filter(
-        OrganizationUser.user_id == current_user.id,
-        OrganizationUser.organization_id == org_id
-    ).first()
+    # Get the role of the user making the request, already loaded by the permission dependency
+    requester_role = memberships.get_role(db, current_user.id, org_id)
     
-    if not requester_membership:
+    if requester_role is None:
         raise HTTPException(status_code=403, detail="You are not a member of this organization")
     
     # MEMBER users should never reach this function (handled by dependency)
     # But let's add a safety check
-    if requester_membership.role == OrganizationUserRole.MEMBER:
+    if requester_role == OrganizationUserRole.MEMBER:
         raise HTTPException(status_code=403, detail="Members cannot delete users from organization")
     
     # MODERATOR permissions: can only delete MEMBER users
-    if requester_membership.role == OrganizationUserRole.MODERATOR:
+    if requester_role == OrganizationUserRole.MODERATOR:
         # Moderators can only delete MEMBER users
         if membership.role != OrganizationUserRole.MEMBER:
             raise HTTPException(
@@ -40,7 +38,7 @@ def remove_user_from_organization(db: Session, org_id: int, user_id: int, curren
             )
     
     # ADMIN permissions: can delete anyone
-    elif requester_membership.role == OrganizationUserRole.ADMIN:
+    elif requester_role == OrganizationUserRole.ADMIN:
         # Admins have full permissions - no additional checks needed
         pass
     
@@ -55,5 +53,6 @@ def remove_user_from_organization(db: Session, org_id: int, user_id: int, curren
     # Delete the membership
     db.delete(membership)
     db.commit()
+    memberships.invalidate_user(user_id, db)
     
     return {"message": f"User successfully removed from organization", "deleted_user_id": user_id}
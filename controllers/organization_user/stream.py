@@ -0,0 +1,29 @@
+from sqlalchemy.orm import Session
+from typing import Iterator, Optional
+from types_definitions.organization_user import OrganizationUserRole
+from .list import members_query, to_organization_user_read
+
+# Rows fetched from the server side cursor at a time
+STREAM_BATCH_SIZE = 1000
+
+
+def stream_users_in_organization(db: Session, org_id: int, cursor: Optional[str] = None, role: Optional[OrganizationUserRole] = None, email_prefix: Optional[str] = None) -> Iterator[bytes]:
+    """
+    Every user in an organization as NDJSON, one OrganizationUserRead per line.
+
+    Rows are read from a server side cursor STREAM_BATCH_SIZE at a time, so
+    memory stays flat however large the organization is. The stream runs in a
+    session of its own because the request's session is closed once the
+    response starts. An invalid cursor raises before anything is streamed.
+    """
+    # Validates the cursor now, while an HTTPException can still become a 400
+    members_query(db, org_id, cursor=cursor, role=role, email_prefix=email_prefix)
+    engine = db.get_bind()
+
+    def lines() -> Iterator[bytes]:
+        with Session(bind=engine) as stream_db:
+            query = members_query(stream_db, org_id, cursor=cursor, role=role, email_prefix=email_prefix)
+            for row in query.yield_per(STREAM_BATCH_SIZE):
+                yield to_organization_user_read(row).model_dump_json().encode() + b"\n"
+
+    return lines()
@@ -4,35 +4,39 @@ from models.user import User
 from typing import List
 from fastapi import HTTPException, status
 from types_definitions.organization_user import OrganizationUserRead, OrganizationUserRole
+from services import memberships
 
 def update_user_role(db: Session, org_id: int, user_id: int, new_role: OrganizationUserRole, current_user: User) -> OrganizationUserRead:
     """Update a user's role in an organization."""
     
-    # Verify the user being modified is a member of the organization
-    membership = db.query(OrganizationUser).filter(
-        OrganizationUser.organization_id == org_id,
-        OrganizationUser.user_id == user_id
-    ).first()
+    # Verify the user being modified is a member of the organization, with the user fields the response needs
+    membership = db.query(
+            OrganizationUser.id,
+            OrganizationUser.role,
+            User.email,
+            User.confirmed,
+            User.role.label("user_role"),
+        )\
+        .join(User, OrganizationUser.user_id == User.id)\
+        .filter(OrganizationUser.organization_id == org_id, OrganizationUser.user_id == user_id)\
+        .first()
     
     if not membership:
         raise HTTPException(status_code=404, detail="The user cannot be found in organization")
     
-    # Get the membership of the user making the request
-    requester_membership = db.query(OrganizationUser).filter(
-        OrganizationUser.user_id == current_user.id,
-        OrganizationUser.organization_id == org_id
-    ).first()
+    # Get the role of the user making the request, already loaded by the permission dependency
+    requester_role = memberships.get_role(db, current_user.id, org_id)
     
-    if not requester_membership:
+    if requester_role is None:
         raise HTTPException(status_code=403, detail="You are not a member of this organization")
     
     # MEMBER users should never reach this function (handled by dependency)
     # But let's add a safety check
-    if requester_membership.role == OrganizationUserRole.MEMBER:
+    if requester_role == OrganizationUserRole.MEMBER:
         raise HTTPException(status_code=403, detail="Members cannot modify user roles")
     
     # MODERATOR permissions: can only change MEMBER users to MODERATOR
-    if requester_membership.role == OrganizationUserRole.MODERATOR:
+    if requester_role == OrganizationUserRole.MODERATOR:
         # Moderators can only modify MEMBER users
         if membership.role != OrganizationUserRole.MEMBER:
             raise HTTPException(
@@ -48,7 +52,7 @@ def update_user_role(db: Session, org_id: int, user_id: int, new_role: Organizat
             )
     
     # ADMIN permissions: can change anyone to any role
-    elif requester_membership.role == OrganizationUserRole.ADMIN:
+    elif requester_role == OrganizationUserRole.ADMIN:
         # Admins have full permissions - no additional checks needed
         pass
     
@@ -61,19 +65,21 @@ def update_user_role(db: Session, org_id: int, user_id: int, new_role: Organizat
         raise HTTPException(status_code=400, detail="You cannot modify your own role")
     
     # Update the role
-    membership.role = new_role
+    db.query(OrganizationUser)\
+        .filter(OrganizationUser.id == membership.id)\
+        .update({"role": new_role}, synchronize_session=False)
     db.commit()
-    db.refresh(membership)
+    memberships.invalidate_user(user_id, db)
     
     # Return enriched user information to match the response model
     enriched_user = OrganizationUserRead(
         id=membership.id,
-        user_id=membership.user_id,
-        organization_id=membership.organization_id,
-        role=membership.role,
-        user_email=membership.user.email,
-        user_confirmed=membership.user.confirmed,
-        user_role=membership.user.role.value
+        user_id=user_id,
+        organization_id=org_id,
+        role=new_role,
+        user_email=membership.email,
+        user_confirmed=membership.confirmed,
+        user_role=membership.user_role.value
     )
     
     return enriched_user
\ No newline at end of file
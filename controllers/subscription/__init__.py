@@ -1,2 +1,3 @@
 from .create import create
 from .create_free import create_free_subscription
+from .webhook import ingest_webhook
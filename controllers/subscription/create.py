@@ -8,6 +8,8 @@ import os
 from dotenv import load_dotenv
 from fastapi import HTTPException
 from types_definitions.organization_user import OrganizationUserRole
+from middleware import measure
+from services import entitlements, memberships
 
 # Load environment variables and configure Stripe
 load_dotenv()
@@ -27,10 +29,11 @@ def create(db: Session, current_user: User, subscription_request: CreateSubscrip
 
     try:
         # Create a new Stripe customer for this specific organization
-        customer = stripe.Customer.create(
-            email=current_user.email,
-            metadata={'organization_id': new_org.id}
-        )
+        with measure("external"):
+            customer = stripe.Customer.create(
+                email=current_user.email,
+                metadata={'organization_id': new_org.id}
+            )
         stripe_customer_id = customer.id
 
         # Save the new customer ID to the organization
@@ -46,28 +49,31 @@ def create(db: Session, current_user: User, subscription_request: CreateSubscrip
         db.add(org_user_link)
 
         # Attach payment method to the new customer
-        stripe.PaymentMethod.attach(
-            subscription_request.payment_method_id,
-            customer=stripe_customer_id,
-        )
+        with measure("external"):
+            stripe.PaymentMethod.attach(
+                subscription_request.payment_method_id,
+                customer=stripe_customer_id,
+            )
 
         # Set as default payment method
-        stripe.Customer.modify(
-            stripe_customer_id,
-            invoice_settings={
-                'default_payment_method': subscription_request.payment_method_id,
-            },
-        )
+        with measure("external"):
+            stripe.Customer.modify(
+                stripe_customer_id,
+                invoice_settings={
+                    'default_payment_method': subscription_request.payment_method_id,
+                },
+            )
 
         # Create the Stripe subscription for the new customer
-        stripe_subscription = stripe.Subscription.create(
-            customer=stripe_customer_id,
-            items=[{'price': subscription_request.price_id, 'quantity': subscription_request.quantity}],
-            payment_behavior='error_if_incomplete',
-            payment_settings={'save_default_payment_method': 'on_subscription'},
-            expand=['latest_invoice'],
-            metadata={'organization_id': new_org.id}
-        )
+        with measure("external"):
+            stripe_subscription = stripe.Subscription.create(
+                customer=stripe_customer_id,
+                items=[{'price': subscription_request.price_id, 'quantity': subscription_request.quantity}],
+                payment_behavior='error_if_incomplete',
+                payment_settings={'save_default_payment_method': 'on_subscription'},
+                expand=['latest_invoice'],
+                metadata={'organization_id': new_org.id}
+            )
 
         # Save subscription to our database
         db_subscription = Subscription(
@@ -79,6 +85,8 @@ def create(db: Session, current_user: User, subscription_request: CreateSubscrip
         db.add(db_subscription)
         db.commit()
         db.refresh(db_subscription)
+        memberships.invalidate_user(current_user.id, db)
+        entitlements.invalidate_organization(new_org.id)
 
         return {
             'subscription': db_subscription,
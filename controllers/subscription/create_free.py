@@ -2,12 +2,13 @@ from sqlalchemy.orm import Session
 from models.user import User
 from models.organization import Organization, OrganizationUser, Subscription
 from fastapi import HTTPException
-from config.system_settings import SystemSettings
 import uuid
 import stripe
 import os
 from dotenv import load_dotenv
 from types_definitions.organization_user import OrganizationUserRole
+from middleware import measure
+from services import entitlements, memberships, system_settings
 
 # Global variable to store stripe api key
 _stripe_api_key = None
@@ -25,7 +26,7 @@ def create_free_subscription(db: Session, current_user: User):
     Creates a free subscription for a user if the system is configured to auto-create free subscriptions.
     """
     # Check if auto-creation of free subscriptions is enabled
-    if not SystemSettings.AUTO_CREATE_FREE_SUBSCRIPTION:
+    if not system_settings.get_settings(db).settings["auto_create_free_subscription"]:
         raise HTTPException(status_code=400, detail="Free subscriptions are not enabled for this system.")
     
     # Check if user already has a subscription
@@ -44,26 +45,27 @@ def create_free_subscription(db: Session, current_user: User):
     stripe.api_key = stripe_api_key
 
     # Create the Stripe Customer for non-solo organization
-    try:
-        non_solo_stripe_customer = stripe.Customer.create(
-            email=current_user.email,
-            name=f"{current_user.email} - TEAM",
-            metadata={"role": "user", "org_type": "team"}
-        )
-    except stripe.error.StripeError as e:
-        if "email" in str(e).lower() and "already exists" in str(e).lower():
-            # If customer with this email already exists, create with a unique email
-            unique_suffix = str(uuid.uuid4())[:8]
-            unique_email = f"{current_user.email.split('@')[0]}+team+{unique_suffix}@{current_user.email.split('@')[1]}"
+    with measure("external"):
+        try:
             non_solo_stripe_customer = stripe.Customer.create(
-                email=unique_email,
+                email=current_user.email,
                 name=f"{current_user.email} - TEAM",
-                metadata={"role": "user", "org_type": "team", "original_email": current_user.email}
+                metadata={"role": "user", "org_type": "team"}
             )
-        else:
-            raise HTTPException(status_code=400, detail=f"Stripe error: {str(e)}")
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Unexpected error creating Stripe customer: {str(e)}")
+        except stripe.error.StripeError as e:
+            if "email" in str(e).lower() and "already exists" in str(e).lower():
+                # If customer with this email already exists, create with a unique email
+                unique_suffix = str(uuid.uuid4())[:8]
+                unique_email = f"{current_user.email.split('@')[0]}+team+{unique_suffix}@{current_user.email.split('@')[1]}"
+                non_solo_stripe_customer = stripe.Customer.create(
+                    email=unique_email,
+                    name=f"{current_user.email} - TEAM",
+                    metadata={"role": "user", "org_type": "team", "original_email": current_user.email}
+                )
+            else:
+                raise HTTPException(status_code=400, detail=f"Stripe error: {str(e)}")
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Unexpected error creating Stripe customer: {str(e)}")
 
     # Create a new non-solo organization for the user
     try:
@@ -96,6 +98,8 @@ def create_free_subscription(db: Session, current_user: User):
         db.add(db_subscription)
         db.commit()
         db.refresh(db_subscription)
+        memberships.invalidate_user(current_user.id, db)
+        entitlements.invalidate_organization(new_org.id)
 
         return db_subscription
     except Exception as e:
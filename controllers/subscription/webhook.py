@@ -0,0 +1,33 @@
+from sqlalchemy.orm import Session
+from fastapi import HTTPException
+import json
+import os
+import stripe
+from services import stripe_events
+
+
+def ingest_webhook(db: Session, payload: bytes, signature: str):
+    """
+    Verifies a Stripe webhook and stores its event for the apply_stripe_events task.
+    Only an insert happens here so Stripe is answered right away; redeliveries of
+    an event already stored are acknowledged without queueing it again.
+    """
+    webhook_secret = os.getenv("STRIPE_WEBHOOK_SECRET")
+    if not webhook_secret:
+        raise HTTPException(status_code=500, detail="Stripe webhook secret is not configured.")
+
+    try:
+        stripe.Webhook.construct_event(payload, signature, webhook_secret)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid payload.")
+    except stripe.error.SignatureVerificationError:
+        raise HTTPException(status_code=400, detail="Invalid signature.")
+
+    # Store the event as Stripe sent it rather than the StripeObject built from it
+    event = json.loads(payload)
+    is_new = stripe_events.record_event(db, event)
+    db.commit()
+
+    customer_id = stripe_events.event_customer_id(event)
+    if is_new and customer_id:
+        stripe_events.request_apply(customer_id)
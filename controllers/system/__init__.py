@@ -0,0 +1,2 @@
+from .get_system_settings import get_system_settings
+from .update_system_settings import update_system_settings
@@ -1,4 +1,11 @@
-# need to make a system settings model  
+from sqlalchemy.orm import Session
+from services import system_settings
+from services.system_settings import CachedSettings
 
-def get_system_settings():
-    return {"system": "settings"}
\ No newline at end of file
+
+def get_system_settings(db: Session) -> CachedSettings:
+    """
+    The current system settings with their version and ETag.
+    Served from this process's cache, the database is only read after a change.
+    """
+    return system_settings.get_settings(db)
@@ -0,0 +1,18 @@
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+from services import system_settings
+from services.system_settings import CachedSettings
+from types_definitions.system_settings import SystemSettingsUpdate
+
+
+def update_system_settings(db: Session, update: SystemSettingsUpdate) -> CachedSettings:
+    """
+    Store the settings sent in update and push the change to every API process.
+
+    Raises:
+        HTTPException: 400 if no setting was sent
+    """
+    changes = update.model_dump(exclude_unset=True)
+    if not changes:
+        raise HTTPException(status_code=400, detail="No settings to update")
+    return system_settings.update_settings(db, changes)
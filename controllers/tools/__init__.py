@@ -1 +1,2 @@
-from .task import run_task
\ No newline at end of file
+from .task import run_task
+from .list_tasks import list_tasks
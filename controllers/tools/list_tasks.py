@@ -0,0 +1,50 @@
+"""
+Controller for listing the tasks a user has started.
+"""
+from datetime import datetime
+from typing import Optional
+from fastapi import HTTPException
+from celery_app.celery_app import celery_app
+from types_definitions.tools import TaskListResponse, TaskSummary
+from utils.task_ownership import list_task_ids, parse_cursor
+
+
+def list_tasks(user_id: int, cursor: Optional[str] = None, limit: int = 20) -> TaskListResponse:
+    """
+    List a user's recent tasks with their live Celery state.
+
+    Args:
+        user_id: ID of the user whose tasks to list
+        cursor: Cursor returned by the previous page
+        limit: Maximum number of tasks to return
+
+    Returns:
+        TaskListResponse: One page of tasks, newest first
+    """
+    if cursor is not None:
+        try:
+            parse_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    entries, next_cursor = list_task_ids(user_id, cursor=cursor, limit=limit)
+
+    # Read every task's result meta in a single round trip
+    backend = celery_app.backend
+    pipe = backend.client.pipeline(transaction=False)
+    for task_id, _ in entries:
+        pipe.get(backend.get_key_for_task(task_id))
+    raw_metas = pipe.execute() if entries else []
+
+    tasks = []
+    for (task_id, enqueued_at), raw_meta in zip(entries, raw_metas):
+        # Celery writes no meta until the task starts, so a missing key means PENDING
+        status = backend.decode_result(raw_meta)["status"] if raw_meta else "PENDING"
+        tasks.append(TaskSummary(
+            task_id=task_id,
+            status=status,
+            ready=status in ("SUCCESS", "FAILURE", "REVOKED"),
+            enqueued_at=datetime.utcfromtimestamp(enqueued_at)
+        ))
+
+    return TaskListResponse(tasks=tasks, next_cursor=next_cursor)
@@ -1,37 +1,88 @@
 """
 Controller for managing tools tasks.
 """
+import math
+import uuid
 from typing import Dict, Any
-from celery_app.tasks.example_streaming_task import example_streaming_task
-from celery_app.tasks.generate_image_with_logo_task import generate_image_with_logo_task
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from pydantic import ValidationError
+from celery_app import fair_queue
+from celery_app import task_catalog  # noqa: F401, declares the tasks in the registry
+from celery_app.celery_app import celery_app
+from celery_app.config import FAIR_SCHEDULING_ENABLED
+from celery_app.registry import get_task_spec
+from config.task_limits import TaskLimits
+from services import task_limiter
+from services.entitlements import Entitlement
 
 
-def run_task(task_name: str, task_params: Dict[str, Any] = {}) -> Dict[str, Any]:
+def run_task(entitlement: Entitlement, task_name: str, task_params: Dict[str, Any] = {}) -> Dict[str, Any]:
     """
-    Run a Celery task by name with provided parameters.
+    Run a registered Celery task by name with provided parameters.
+    Parameters are validated against the task's schema and the user's and
+    organization's task limits are checked before anything is queued.
 
     Args:
+        entitlement: Entitlement of the user starting the task
         task_name: Name of the task to run
         task_params: Parameters to pass to the task
 
     Returns:
         dict: Celery task result with task ID
     """
-    # Map task names to actual task functions
-    task_map = {
-        "example_streaming": example_streaming_task,
-        "generate_image_with_logo": generate_image_with_logo_task
-    }
+    spec = get_task_spec(task_name)
+    if spec is None:
+        raise HTTPException(status_code=404, detail=f"Unknown task: {task_name}")
 
-    # Check if the task exists
-    if task_name not in task_map:
-        raise ValueError(f"Unknown task: {task_name}")
+    try:
+        params = spec.params_model(**task_params)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=jsonable_encoder(e.errors()))
 
-    # Get the task function
-    task_func = task_map[task_name]
+    # The task id is chosen up front so the limiter can hold slots for it
+    task_id = str(uuid.uuid4())
+    decision = task_limiter.acquire(entitlement, task_id, spec)
+    if not decision.allowed:
+        limited = {
+            "user": "your account",
+            "org": "your organization",
+            "user_task": f"'{task_name}' tasks",
+        }[decision.scope]
+        reason = "Too many tasks started recently" if decision.reason == "rate_limited" else "Too many tasks in progress"
+        headers = {"Retry-After": str(math.ceil(decision.retry_after))} if decision.retry_after else None
+        raise HTTPException(
+            status_code=429,
+            detail=f"{reason} for {limited} on the {decision.tier} plan.",
+            headers=headers
+        )
 
-    # Queue the task for background execution
-    task_result = task_func.delay(**task_params)
+    # Queue the task for background execution on its dedicated queue
+    try:
+        if FAIR_SCHEDULING_ENABLED and decision.org_id is not None:
+            # Held in the organization's fair queue until the scheduler forwards it
+            fair_queue.enqueue(
+                decision.org_id,
+                TaskLimits.TIER_WEIGHTS.get(decision.tier, 1),
+                spec,
+                task_id,
+                params.model_dump(),
+            )
+            return celery_app.AsyncResult(task_id)
+
+        # Sent by name, the API never imports the task implementations
+        task_result = celery_app.send_task(
+            spec.celery_name,
+            kwargs=params.model_dump(),
+            task_id=task_id,
+            queue=spec.queue,
+            priority=spec.priority,
+            soft_time_limit=spec.soft_time_limit,
+            time_limit=spec.time_limit,
+        )
+    except Exception:
+        task_limiter.release(task_id, task_name=spec.celery_name)
+        raise
 
     # Return the Celery result directly
     return task_result
@@ -6,4 +6,4 @@ from .resend_confirmation import resend_confirmation
 from .request_password_reset import request_password_reset
 from .reset_password import reset_password
 from .get_user_memberships import get_user_memberships
-from .list import list_users
+from .list import list_users, users_version
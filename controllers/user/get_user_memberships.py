@@ -17,24 +17,28 @@ def get_user_memberships(db: Session, user: User) -> List[OrganizationMembership
     Returns:
         List of OrganizationMembership objects
     """
-    # Query to get all organization memberships for the user
-    user_memberships = db.query(OrganizationUser)\
-        .filter(OrganizationUser.user_id == user.id)\
-        .join(Organization)\
-        .filter(Organization.is_solo == False)\
+    # Memberships and their organization's name in one query, without loading ORM entities
+    rows = db.query(
+            OrganizationUser.id,
+            OrganizationUser.user_id,
+            OrganizationUser.organization_id,
+            OrganizationUser.role,
+            Organization.name,
+            Organization.is_solo,
+        )\
+        .join(Organization, OrganizationUser.organization_id == Organization.id)\
+        .filter(OrganizationUser.user_id == user.id, Organization.is_solo == False)\
         .order_by(Organization.id)\
         .all()
     
-    # Convert to OrganizationMembership objects
-    memberships = []
-    for membership in user_memberships:
-        memberships.append(OrganizationMembership(
-            id=membership.id,
-            user_id=membership.user_id,
-            organization_id=membership.organization_id,
-            organization_name=membership.organization.name,
-            role=membership.role.value,
-            is_solo=membership.organization.is_solo
-        ))
-    
-    return memberships
+    return [
+        OrganizationMembership(
+            id=row.id,
+            user_id=row.user_id,
+            organization_id=row.organization_id,
+            organization_name=row.name,
+            role=row.role.value,
+            is_solo=row.is_solo
+        )
+        for row in rows
+    ]
@@ -1,3 +1,4 @@
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from models.user import User
@@ -31,3 +32,16 @@ def list_users(db: Session, skip: int = 0, limit: int = 100, role: Optional[str]
         email=user.email,
         role=user.role.value
     ) for user in users]
+
+
+def users_version(db: Session, role: Optional[str] = None, confirmed: Optional[bool] = None):
+    """(count, newest id, newest updated_at) of the users list_users filters, in one query."""
+    query = db.query(func.count(User.id), func.max(User.id), func.max(User.updated_at))
+
+    if role is not None:
+        query = query.filter(User.role == role)
+
+    if confirmed is not None:
+        query = query.filter(User.confirmed == confirmed)
+
+    return tuple(query.one())
@@ -2,7 +2,7 @@
 from sqlalchemy.orm import Session
 from models import User, ResetPasswordRequest
 from utils.token import generate_secure_token
-from services.email_service import woopdi_mail
+from services.email_outbox import enqueue_email
 from fastapi import HTTPException
 import os
 from dotenv import load_dotenv
@@ -23,23 +23,19 @@ def request_password_reset(db: Session, email: str):
     reset_token = generate_secure_token()
     db_token = ResetPasswordRequest(user_id=user.id, token=reset_token)
     db.add(db_token)
-    db.commit()
 
-    # Send the password reset email
+    # Queue the password reset email. Delivery failures are retried by the
+    # email outbox worker and never reach the user.
     client_url = os.getenv("WEB_CLIENT_URL", "http://localhost:3000")
     reset_url = f"{client_url}/reset-password?token={reset_token}"
+    enqueue_email(
+        db,
+        template_name='reset_password',
+        recipient_email=user.email,
+        params={'reset_url': reset_url},
+        idempotency_key=f"reset_password:{reset_token}"
+    )
 
-    try:
-        woopdi_mail.notify(
-            template_name='reset_password',
-            recipient_email=user.email,
-            params={'reset_url': reset_url}
-        )
-    except Exception as e:
-        # Even if the email fails, we don't want to reveal this to the user.
-        # Log the error for debugging.
-        print(f"Error sending password reset email: {e}")
-        # Potentially add more robust logging here
-        pass
+    db.commit()
 
     return {"message": "If an account with this email exists, a password reset link has been sent."}
\ No newline at end of file
@@ -1,6 +1,6 @@
 from sqlalchemy.orm import Session
 from models.user import User, EmailConfirmation
-from services.email_service import woopdi_mail
+from services.email_outbox import enqueue_email
 from fastapi import HTTPException
 from datetime import datetime, timedelta
 import secrets
@@ -32,18 +32,20 @@ def resend_confirmation(db: Session, old_token: str):
         expires_at=datetime.utcnow() + timedelta(hours=2)
     )
     db.add(new_confirmation)
-    
-    # Commit the changes to the database
-    db.commit()
 
-    # Send the new confirmation email
+    # Queue the new confirmation email
     client_url = os.getenv("WEB_CLIENT_URL", "http://localhost:3000")
     confirmation_url = f"{client_url}/confirm-email?token={new_token_str}"
-    woopdi_mail.notify(
+    enqueue_email(
+        db,
         template_name="signup_confirmation",
         recipient_email=old_confirmation.user.email,
         params={
             "confirmation_url": confirmation_url,
             "email": old_confirmation.user.email
-        }
-    )
\ No newline at end of file
+        },
+        idempotency_key=f"signup_confirmation:{new_token_str}"
+    )
+
+    # Commit the changes to the database
+    db.commit()
\ No newline at end of file
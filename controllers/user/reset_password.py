@@ -1,7 +1,7 @@
 from sqlalchemy.orm import Session
 from models import User, ResetPasswordRequest
 from utils.password import get_password_hash
-from services.email_service import woopdi_mail
+from services.email_outbox import enqueue_email
 import datetime
 
 def reset_password(db: Session, token: str, new_password: str):
@@ -23,13 +23,15 @@ def reset_password(db: Session, token: str, new_password: str):
     # Mark the token as used
     reset_password_request.used = True
 
-    db.commit()
-
-    # Send a confirmation email
-    woopdi_mail.notify(
+    # Queue a confirmation email
+    enqueue_email(
+        db,
         template_name="password_reset_success",
         recipient_email=user.email,
-        params={"email": user.email}
+        params={"email": user.email},
+        idempotency_key=f"password_reset_success:{token}"
     )
 
+    db.commit()
+
     return {"message": "Password has been reset successfully."}
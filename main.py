@@ -1,14 +1,36 @@
+from contextlib import asynccontextmanager
 from fastapi import Depends, FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 
 
 import routers
-from celery_app import tasks
+from middleware import CompressionMiddleware, RequestTimingMiddleware, install_sql_instrumentation
+from services import health, system_settings
+from utils.tracing import configure_tracing
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Runs in every worker, after server.py's gunicorn master forked it.
+    # Traces of tools tasks, off unless TRACING_EXPORTER is set (utils/tracing.py)
+    configure_tracing("woopdi-api")
+    # Reload cached system settings as soon as they change (services/system_settings.py)
+    system_settings.start_listener()
+    health.mark_ready()
+    yield
+    # Fail /readyz first so load balancers stop routing here while requests finish
+    health.mark_draining()
+    system_settings.stop_listener()
+
 
 app = FastAPI(
     title="AI Backend",
     version="0.0.1",
+    lifespan=lifespan,
+    # orjson for every response FastAPI serializes, list endpoints use utils.responses.json_response
+    default_response_class=ORJSONResponse,
 )
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
@@ -22,8 +44,17 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Response headers cross-origin frontends may read
+    expose_headers=["Server-Timing", "X-Next-Cursor", "ETag"],
 )
 
+# brotli or gzip for bodies over COMPRESSION_MIN_BYTES (middleware/compression.py)
+app.add_middleware(CompressionMiddleware)
+
+# Latency, SQL count and Server-Timing for every request, added last so it also times CORS
+install_sql_instrumentation()
+app.add_middleware(RequestTimingMiddleware)
+
 
 app.include_router(routers.tools.router)
 # all auth related endpoints
@@ -35,3 +66,6 @@ app.include_router(routers.system_settings.router)
 app.include_router(routers.organization_user.router)
 app.include_router(routers.organization.router)
 app.include_router(routers.asset.router)
+app.include_router(routers.metrics.router)
+app.include_router(routers.debug.router)
+app.include_router(routers.health.router)
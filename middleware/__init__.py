@@ -0,0 +1,4 @@
+from .compression import CompressionMiddleware
+from .request_timing import RequestTimingMiddleware
+from .sql import install_sql_instrumentation
+from .timing import measure
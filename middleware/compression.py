@@ -0,0 +1,172 @@
+"""
+ASGI middleware that compresses response bodies with brotli or gzip.
+
+Brotli is used when the client accepts it and the optional brotli package is
+installed, gzip otherwise. Bodies under COMPRESSION_MIN_BYTES, responses that
+already carry a Content-Encoding and types that are compressed already (images,
+archives) pass through untouched. Streamed bodies (the NDJSON member export)
+are compressed as they arrive and flushed every COMPRESSION_STREAM_FLUSH_BYTES
+of input, so clients see rows within a few KB without the cost of a flush block
+per row.
+"""
+
+import gzip
+import os
+import zlib
+from typing import List, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", 1024))
+GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", 6))
+# 4 compresses JSON about as well as gzip -9 at a fraction of the CPU
+BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", 4))
+# Uncompressed bytes of a stream held back before a flush, every flush ends a block
+STREAM_FLUSH_BYTES = int(os.getenv("COMPRESSION_STREAM_FLUSH_BYTES", 16384))
+
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/", "application/javascript", "image/svg+xml")
+
+
+def _accepted_encodings(scope) -> List[str]:
+    for name, value in scope["headers"]:
+        if name == b"accept-encoding":
+            encodings = []
+            for part in value.decode("latin-1").split(","):
+                token, _, params = part.strip().partition(";")
+                if params.strip().replace(" ", "") in ("q=0", "q=0.0"):
+                    continue
+                encodings.append(token.strip().lower())
+            return encodings
+    return []
+
+
+def choose_encoding(scope) -> Optional[str]:
+    accepted = _accepted_encodings(scope)
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+class _Compressor:
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            # wbits 31 writes the gzip header and trailer
+            self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+        self._unflushed = 0
+
+    def chunk(self, data: bytes) -> bytes:
+        """Compress a chunk of a stream, flushing once STREAM_FLUSH_BYTES have built up since the last flush."""
+        self._unflushed += len(data)
+        flush = self._unflushed >= STREAM_FLUSH_BYTES
+        if flush:
+            self._unflushed = 0
+        if self.encoding == "br":
+            return self._compressor.process(data) + (self._compressor.flush() if flush else b"")
+        return self._compressor.compress(data) + (self._compressor.flush(zlib.Z_SYNC_FLUSH) if flush else b"")
+
+    def finish(self, data: bytes = b"") -> bytes:
+        if self.encoding == "br":
+            return self._compressor.process(data) + self._compressor.finish()
+        return self._compressor.compress(data) + self._compressor.flush()
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL)
+
+
+def _header(headers: List[Tuple[bytes, bytes]], name: bytes) -> Optional[bytes]:
+    for key, value in headers:
+        if key.lower() == name:
+            return value
+    return None
+
+
+def _compressible(headers: List[Tuple[bytes, bytes]]) -> bool:
+    if _header(headers, b"content-encoding") is not None:
+        return False
+    content_type = (_header(headers, b"content-type") or b"").decode("latin-1")
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_BYTES):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(scope)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        compressor: Optional[_Compressor] = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start_message, compressor, passthrough
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if compressor is None:
+                headers = list(start_message.get("headers", []))
+                small = not more_body and len(body) < self.minimum_size
+                if not _compressible(headers) or small:
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+
+                headers = [(key, value) for key, value in headers if key.lower() != b"content-length"]
+                headers.append((b"content-encoding", encoding.encode()))
+                vary = _header(headers, b"vary")
+                if vary is None:
+                    headers.append((b"vary", b"Accept-Encoding"))
+                elif b"accept-encoding" not in vary.lower():
+                    headers = [(key, value) for key, value in headers if key.lower() != b"vary"]
+                    headers.append((b"vary", vary + b", Accept-Encoding"))
+
+                if not more_body:
+                    compressed = compress(body, encoding)
+                    headers.append((b"content-length", str(len(compressed)).encode()))
+                    await send({**start_message, "headers": headers})
+                    await send({"type": "http.response.body", "body": compressed})
+                    passthrough = True
+                    return
+
+                compressor = _Compressor(encoding)
+                await send({**start_message, "headers": headers})
+
+            if more_body:
+                compressed = compressor.chunk(body)
+                # Nothing to send until the compressor's buffer is flushed
+                if compressed:
+                    await send({"type": "http.response.body", "body": compressed, "more_body": True})
+            else:
+                await send({"type": "http.response.body", "body": compressor.finish(body)})
+
+        await self.app(scope, receive, send_compressed)
+
+        # A response without a body message, nothing to compress
+        if start_message is not None and compressor is None and not passthrough:
+            await send(start_message)
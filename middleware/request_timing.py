@@ -0,0 +1,77 @@
+"""
+ASGI middleware that times every HTTP request.
+
+Records the request's latency, SQL statement count and per category time as
+Prometheus histograms labeled by route template ("/organization-users/{org_id}",
+never the raw path, so label cardinality stays bounded), and returns the
+breakdown in a Server-Timing header:
+
+    Server-Timing: db;dur=4.1;desc="3 queries", auth;dur=2.0, storage;dur=0.0, external;dur=0.0, total;dur=9.7
+
+The total in the header is the time to the first response byte; the histogram
+also covers streaming the body.
+
+With PROFILE_SLOW_REQUESTS_MS set, requests slower than it also leave a
+sampling profile in PROFILE_DIR (utils/profiler.py).
+"""
+
+from utils.profiler import record_if_slow, slow_request_profiler
+from utils.metrics import HTTP_REQUEST_CATEGORY_SECONDS, HTTP_REQUEST_SECONDS, HTTP_REQUEST_SQL_STATEMENTS
+from .timing import CATEGORIES, RequestTimings, current_timings, end_request, start_request
+
+UNMATCHED_ROUTE = "unmatched"
+
+
+def _route_template(scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED_ROUTE
+
+
+def server_timing_header(timings: RequestTimings) -> str:
+    entries = []
+    for category in CATEGORIES:
+        entry = f"{category};dur={timings.seconds[category] * 1000:.1f}"
+        if category == "db":
+            entry += f';desc="{timings.counts["db"]} queries"'
+        entries.append(entry)
+    entries.append(f"total;dur={timings.elapsed() * 1000:.1f}")
+    return ", ".join(entries)
+
+
+class RequestTimingMiddleware:
+    def __init__(self, app):
+        self.app = app
+        # Started up front so the first slow request is sampled too
+        slow_request_profiler()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = start_request()
+        timings = current_timings()
+        status_code = 500
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                # The router has matched by now and put the route in the scope
+                timings.route = _route_template(scope)
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", server_timing_header(timings).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            route = timings.route or _route_template(scope)
+            method = scope["method"]
+            HTTP_REQUEST_SECONDS.labels(method=method, route=route, status=str(status_code)).observe(timings.elapsed())
+            HTTP_REQUEST_SQL_STATEMENTS.labels(method=method, route=route).observe(timings.counts["db"])
+            for category in CATEGORIES:
+                HTTP_REQUEST_CATEGORY_SECONDS.labels(route=route, category=category).observe(timings.seconds[category])
+            record_if_slow(f"{method} {route}", timings.started, timings.elapsed())
+            end_request(token)
@@ -0,0 +1,69 @@
+"""
+Counts and times every SQL statement through SQLAlchemy engine events.
+
+Statements run during a request are added to its "db" timing. Statements
+slower than SLOW_QUERY_MS are logged with a fingerprint of the statement and
+one of its bound parameters, so repeats of the same slow query can be grouped
+without writing parameter values (emails, tokens) to the logs.
+"""
+
+import hashlib
+import logging
+import os
+import time
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from utils.metrics import SLOW_SQL_STATEMENTS
+from .timing import current_timings
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERY_SECONDS = float(os.getenv("SLOW_QUERY_MS", "200")) / 1000
+
+# Longest statement text written to the slow query log
+LOGGED_STATEMENT_CHARS = 500
+
+_installed = False
+
+
+def fingerprint(statement: str) -> str:
+    """Short hash of a statement with its whitespace normalized."""
+    return hashlib.sha1(" ".join(statement.split()).encode()).hexdigest()[:12]
+
+
+def parameters_fingerprint(parameters) -> str:
+    """Short hash of the bound parameter values, equal for equal values."""
+    return hashlib.sha1(repr(parameters).encode()).hexdigest()[:8]
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_times", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start_times = conn.info.get("query_start_times")
+    if not start_times:
+        return
+    seconds = time.perf_counter() - start_times.pop()
+
+    timings = current_timings()
+    if timings is not None:
+        timings.add("db", seconds)
+
+    if seconds >= SLOW_QUERY_SECONDS:
+        route = timings.route if timings is not None and timings.route else "none"
+        SLOW_SQL_STATEMENTS.labels(route=route).inc()
+        logger.warning(
+            f"Slow SQL {seconds * 1000:.1f} ms [fp={fingerprint(statement)} params={parameters_fingerprint(parameters)}] "
+            f"route={route}: {' '.join(statement.split())[:LOGGED_STATEMENT_CHARS]}"
+        )
+
+
+def install_sql_instrumentation() -> None:
+    """Listen on every engine, including ones created after this call. Safe to call more than once."""
+    global _installed
+    if _installed:
+        return
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    _installed = True
@@ -0,0 +1,69 @@
+"""
+Per-request timing breakdown.
+
+RequestTimingMiddleware starts a RequestTimings for every HTTP request and
+keeps it in a context variable, which FastAPI copies into the threads that run
+sync endpoints and dependencies. Code anywhere in the request adds to it with
+
+    with measure("storage"):
+        blob.upload_from_string(...)
+
+SQL statements are added to "db" by the engine events in middleware/sql.py.
+Categories may overlap, "auth" includes the queries it runs.
+"""
+
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+# Categories reported in the Server-Timing header, in this order
+CATEGORIES = ("db", "auth", "storage", "external")
+
+
+class RequestTimings:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.seconds: Dict[str, float] = {category: 0.0 for category in CATEGORIES}
+        self.counts: Dict[str, int] = {category: 0 for category in CATEGORIES}
+        self.route: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def add(self, category: str, seconds: float) -> None:
+        with self._lock:
+            self.seconds[category] = self.seconds.get(category, 0.0) + seconds
+            self.counts[category] = self.counts.get(category, 0) + 1
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+
+_current = contextvars.ContextVar("request_timings", default=None)
+
+
+def current_timings() -> Optional[RequestTimings]:
+    """The timings of the request being handled, None outside a request."""
+    return _current.get()
+
+
+def start_request() -> contextvars.Token:
+    return _current.set(RequestTimings())
+
+
+def end_request(token: contextvars.Token) -> None:
+    _current.reset(token)
+
+
+@contextmanager
+def measure(category: str) -> Iterator[None]:
+    """Add the time spent in the block to a category of the current request."""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(category, time.perf_counter() - start)
@@ -3,4 +3,7 @@ from .user import User, Token, EmailConfirmation, ResetPasswordRequest
 from .organization import Organization, OrganizationUser, Subscription
 from .asset import Asset
 from .invitation import Invitation
-from .asset import Asset
\ No newline at end of file
+from .email_outbox import EmailOutbox
+from .stripe_event import StripeEvent
+from .asset import Asset
+from .system_setting import SystemSetting
\ No newline at end of file
@@ -0,0 +1,31 @@
+from sqlalchemy import Column, String, Integer, DateTime, Text, Index, func
+from sqlalchemy.dialects.postgresql import JSONB
+from .base import Base
+from datetime import datetime
+
+class EmailOutbox(Base):
+    """
+    Transactional emails waiting to be sent.
+    Rows are added in the same transaction as the change that triggers the email
+    and sent by the drain_email_outbox Celery task (services/email_outbox.py).
+    """
+    __tablename__ = "email_outbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+    # Unique per email, e.g. "signup_confirmation:<token>", so it is never queued twice
+    idempotency_key = Column(String, unique=True, index=True, nullable=False)
+    template_name = Column(String, nullable=False)
+    recipient_email = Column(String, nullable=False)
+    params = Column(JSONB, nullable=False, default=dict)
+    status = Column(String, default='pending', nullable=False)  # pending, sending, sent, failed
+    attempts = Column(Integer, default=0, nullable=False)
+    next_attempt_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    locked_at = Column(DateTime, nullable=True)
+    sent_at = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=func.now())
+
+    __table_args__ = (
+        # The drain query: pending rows that are due, oldest first
+        Index('ix_email_outbox_status_next_attempt_at', 'status', 'next_attempt_at'),
+    )
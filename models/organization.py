@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Boolean, Integer, DateTime, func, ForeignKey, Enum as SQLAlchemyEnum
+from sqlalchemy import Column, String, Boolean, Integer, BigInteger, DateTime, Index, func, ForeignKey, Enum as SQLAlchemyEnum
 from sqlalchemy.orm import relationship
 from enum import Enum
 from .base import Base
@@ -21,6 +21,8 @@ class Organization(Base):
     org_owner = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
 
     stripe_customer_id = Column(String, unique=True, nullable=True)
+    # pending while services/stripe_provisioning.py creates the customer, then provisioned or failed
+    stripe_customer_status = Column(String, nullable=False, default='provisioned', server_default='provisioned')
 
     # Relationships
     members = relationship("OrganizationUser", back_populates="organization", cascade="all, delete-orphan")
@@ -37,11 +39,19 @@ class OrganizationUser(Base):
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     organization_id = Column(Integer, ForeignKey("organizations.id", ondelete="CASCADE"), nullable=False)
     role = Column(SQLAlchemyEnum(OrganizationUserRole), nullable=False, default=OrganizationUserRole.MEMBER)
+    # Part of the ETag of the member listings (utils/conditional.py)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
 
     # Relationships
     user = relationship("User", back_populates="organization_associations")
     organization = relationship("Organization", back_populates="members")
 
+    __table_args__ = (
+        # Member listings page through an organization by id, optionally for one role
+        Index('ix_organization_users_organization_id_id', 'organization_id', 'id'),
+        Index('ix_organization_users_organization_id_role_id', 'organization_id', 'role', 'id'),
+    )
+
     def __repr__(self):
         return f"<OrganizationUser(user_id={self.user_id}, organization_id={self.organization_id}, role='{self.role.value}')>"
 
@@ -56,5 +66,7 @@ class Subscription(Base):
     created_at = Column(DateTime, default=func.now())
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
     restrict_access_on = Column(DateTime, nullable=True)
+    # created timestamp of the last Stripe event applied, older events arriving late are skipped
+    stripe_event_created = Column(BigInteger, nullable=True)
 
     organization = relationship("Organization", back_populates="subscriptions")
@@ -0,0 +1,29 @@
+from sqlalchemy import Column, String, Integer, BigInteger, DateTime, Text, Index, func
+from sqlalchemy.dialects.postgresql import JSONB
+from .base import Base
+
+class StripeEvent(Base):
+    """
+    Append-only log of the Stripe webhook events we received, one row per
+    Stripe event id. Applied to subscriptions by the apply_stripe_events task
+    (services/stripe_events.py), in order per customer.
+    """
+    __tablename__ = "stripe_events"
+
+    id = Column(Integer, primary_key=True, index=True)
+    stripe_event_id = Column(String, unique=True, nullable=False)  # evt_..., Stripe retries deliver the same id
+    type = Column(String, nullable=False)
+    customer_id = Column(String, nullable=True)  # cus_... the event belongs to, None for account level events
+    stripe_created = Column(BigInteger, nullable=False)  # event.created, unix seconds
+    payload = Column(JSONB, nullable=False)
+    received_at = Column(DateTime, server_default=func.now(), nullable=False)
+    processed_at = Column(DateTime, nullable=True)
+    error = Column(Text, nullable=True)
+    attempts = Column(Integer, default=0, server_default='0', nullable=False)  # failed runs
+    # Set aside after too many failed runs so the customer's later events can apply
+    dead_lettered_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # Unprocessed events of a customer, oldest first
+        Index('ix_stripe_events_customer_id_processed_at', 'customer_id', 'processed_at', 'stripe_created'),
+    )
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, String, DateTime, func
+from sqlalchemy.dialects.postgresql import JSONB
+from .base import Base
+
+class SystemSetting(Base):
+    """
+    A system setting changed at runtime, one row per setting. Settings without
+    a row keep their default from config/system_settings.py. Read through the
+    cache in services/system_settings.py.
+    """
+    __tablename__ = "system_settings"
+
+    key = Column(String, primary_key=True)  # field name of SystemSettingsResponse, e.g. branding_logo_dark_mode
+    value = Column(JSONB, nullable=True)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False)
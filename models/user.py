@@ -1,5 +1,5 @@
 # this file defines all the models realated to managing custom data schemas
-from sqlalchemy import Column, String, Integer,func, ForeignKey, DateTime, Boolean
+from sqlalchemy import Column, String, Integer,func, ForeignKey, DateTime, Boolean, Index
 from .base import Base
 from sqlalchemy.orm import relationship
 from dependencies.enums import RoleEnum
@@ -18,6 +18,13 @@ class User(Base):
     organization_associations = relationship("OrganizationUser", back_populates="user", cascade="all, delete-orphan")
     email_confirmations = relationship("EmailConfirmation", back_populates="user", cascade="all, delete-orphan")
     reset_password_requests = relationship("ResetPasswordRequest", back_populates="user", cascade="all, delete-orphan")
+    # Part of the ETag of the user and member listings (utils/conditional.py)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        # Serves email prefix searches (LIKE 'abc%'), the unique index on email cannot under a non C collation
+        Index('ix_users_email_pattern', 'email', postgresql_ops={'email': 'text_pattern_ops'}),
+    )
     
 
 class EmailConfirmation(Base):
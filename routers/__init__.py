@@ -7,4 +7,7 @@ from . import system_settings
 from . import invitation
 from . import organization_user
 from . import organization
+from . import metrics
+from . import debug
+from . import health
 from . import asset
@@ -1,17 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, UploadFile, File, Form
 from types_definitions.asset import PublicAsset, AssetListResponse, DeleteAssetResponse
 from dependencies.dependencies import get_db, get_current_user, get_current_user_optional
+from middleware import measure
+from utils.conditional import cache_headers, etag_matches, not_modified, weak_etag
+from utils.responses import json_response
 from sqlalchemy.orm import Session
 from models.user import User
 import controllers
 from typing import Optional
 import logging
 import asyncio
-from google.cloud import storage
 from google.cloud.exceptions import GoogleCloudError
 from models.asset import Asset
-import asyncio
-from google.cloud import storage
 import uuid, os
 from pydantic import BaseModel
 
@@ -24,6 +24,7 @@ router = APIRouter(
 
 @router.get("/", response_model=AssetListResponse)
 async def list_assets(
+    request: Request,
     skip: int = Query(0, ge=0, description="Number of assets to skip"),
     limit: int = Query(100, ge=1, le=1000, description="Number of assets to return"),
     user_id: Optional[int] = Query(None, description="Filter by user ID (admin/superadmin only)"),
@@ -36,14 +37,18 @@ async def list_assets(
     Users can only see their own assets.
     Admins and superadmins can see all assets or filter by user_id.
     Can be filtered by upload_source (e.g., 'image-generator-face').
+    Answers 304 when If-None-Match holds the ETag of an unchanged page.
     """
+    version = controllers.asset.assets_version(db, current_user, user_id=user_id, upload_source=upload_source)
+    # Which assets are visible depends on the caller
+    etag = weak_etag(request, current_user.id, current_user.role, version)
+    if etag_matches(request, etag):
+        return not_modified(etag)
     assets = controllers.asset.list_assets(db, current_user, skip=skip, limit=limit, user_id=user_id, upload_source=upload_source)
-    total = controllers.asset.count_assets(db, current_user, user_id=user_id, upload_source=upload_source)
-    return AssetListResponse(
-        assets=assets,
-        total=total,
-        skip=skip,
-        limit=limit
+    return json_response(
+        {"assets": assets, "total": version[0], "skip": skip, "limit": limit},
+        AssetListResponse,
+        headers=cache_headers(etag)
     )
 
 @router.get("/{asset_id}", response_model=PublicAsset)
@@ -134,6 +139,9 @@ async def upload_to_gcp_async(file_content: bytes, destination_blob_name: str, c
         
         # Run the GCP upload in a thread pool to avoid blocking
         def _upload_to_gcp():
+            # Imported on first upload, google.cloud.storage is slow to import
+            from google.cloud import storage
+
             # Initialize client with service account JSON file (matching existing pattern)
             client = storage.Client.from_service_account_json(service_account_key)
             bucket = client.get_bucket(bucket_name)
@@ -150,10 +158,11 @@ async def upload_to_gcp_async(file_content: bytes, destination_blob_name: str, c
         
         # Run in thread pool with timeout
         loop = asyncio.get_event_loop()
-        public_url = await asyncio.wait_for(
-            loop.run_in_executor(None, _upload_to_gcp),
-            timeout=UPLOAD_TIMEOUT
-        )
+        with measure("storage"):
+            public_url = await asyncio.wait_for(
+                loop.run_in_executor(None, _upload_to_gcp),
+                timeout=UPLOAD_TIMEOUT
+            )
         
         logger.info(f"Successfully uploaded {destination_blob_name} to GCP")
         return public_url
@@ -0,0 +1,34 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+from dependencies.dependencies import require_superadmin
+from models.user import User
+from utils.profiler import ProfilerBusy, profile_for
+
+router = APIRouter(
+    prefix="/debug",
+    tags=["Debug"],
+    responses={404: {"description": "Not found"}},
+)
+
+
+@router.get("/profile")
+async def profile_api_process(
+    seconds: float = Query(10, gt=0, le=60, description="How long to sample"),
+    interval_ms: float = Query(5, ge=1, le=100, description="Milliseconds between samples"),
+    current_user: User = Depends(require_superadmin)
+):
+    """
+    Sample the stacks of the API process serving this request for a while and
+    return a speedscope profile, open it at https://www.speedscope.app.
+    Only this process is profiled, not the other workers behind the load balancer.
+    Requires superadmin role.
+    """
+    try:
+        profile = await run_in_threadpool(profile_for, seconds, interval_ms / 1000, "api")
+    except ProfilerBusy:
+        raise HTTPException(status_code=409, detail="A profile is already running in this process")
+    return JSONResponse(
+        content=profile,
+        headers={"Content-Disposition": 'attachment; filename="api.speedscope.json"'},
+    )
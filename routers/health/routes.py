@@ -0,0 +1,31 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from services import health
+
+router = APIRouter(
+    tags=["Health"],
+    responses={404: {"description": "Not found"}},
+)
+
+
+@router.get("/healthz", include_in_schema=False)
+async def liveness():
+    """
+    Liveness probe: the process is up and its event loop answers.
+    Checks no dependencies, so a database outage never restarts the API.
+    """
+    return {"status": "ok"}
+
+
+@router.get("/readyz", include_in_schema=False)
+async def readiness():
+    """
+    Readiness probe: 503 while the worker starts up or shuts down, or while a
+    dependency fails its check. Reports every dependency's status and latency.
+    """
+    if not health.is_ready():
+        return JSONResponse(status_code=503, content={"status": "unavailable", "checks": {}})
+    checks = await health.check_dependencies()
+    if not health.dependencies_ready(checks):
+        return JSONResponse(status_code=503, content={"status": "unavailable", "checks": checks})
+    return {"status": "ok", "checks": checks}
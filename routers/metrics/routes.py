@@ -0,0 +1,18 @@
+from fastapi import APIRouter, Depends, Response
+from dependencies.dependencies import require_metrics_token
+from utils.metrics import render_metrics, METRICS_CONTENT_TYPE
+
+router = APIRouter(
+    tags=["Metrics"],
+    responses={404: {"description": "Not found"}},
+)
+
+
+@router.get("/metrics", include_in_schema=False, dependencies=[Depends(require_metrics_token)])
+def get_metrics():
+    """
+    Prometheus scrape endpoint.
+    Requires the bearer token in METRICS_TOKEN (authorization.credentials in the
+    scrape config), and answers 404 while it is unset.
+    """
+    return Response(content=render_metrics(), media_type=METRICS_CONTENT_TYPE)
@@ -1,16 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
 from dependencies.dependencies import get_db, require_superadmin_or_admin, get_current_user, require_organization_admin
-from controllers.organization.list import list_organizations
+from controllers.organization.list import list_organizations, organizations_version
 from controllers.organization.update import update_organization
 from controllers.organization.create_nonsolo import create_nonsolo_organization as create_user_organization
 from types_definitions.organization import OrganizationRead, OrganizationUpdate
 from models.user import User
+from typing import List
+from utils.conditional import cache_headers, etag_matches, not_modified, weak_etag
+from utils.responses import json_response
 
 router = APIRouter(prefix="/organizations", tags=["Organizations"])
 
 @router.get("/", response_model=list[OrganizationRead])
 async def list_organizations_endpoint(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
     is_solo: bool = None,
@@ -21,9 +25,13 @@ async def list_organizations_endpoint(
     List all organizations with pagination.
     
     Accessible to superadmins and admins.
+    Answers 304 when If-None-Match holds the ETag of an unchanged page.
     """
+    etag = weak_etag(request, organizations_version(db, is_solo))
+    if etag_matches(request, etag):
+        return not_modified(etag)
     organizations = list_organizations(db, skip, limit, is_solo)
-    return organizations
+    return json_response(organizations, List[OrganizationRead], headers=cache_headers(etag))
 
 @router.put("/{organization_id}", response_model=OrganizationRead)
 async def update_organization_endpoint(
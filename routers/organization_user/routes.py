@@ -1,10 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from models.user import User
-from types_definitions.organization_user import OrganizationUserRead, OrganizationUserRoleUpdate
+from types_definitions.organization_user import OrganizationUserRead, OrganizationUserRole, OrganizationUserRoleUpdate
 from dependencies.dependencies import get_db, get_current_user, require_organization_moderator_or_admin
 import controllers.organization_user
+from utils.conditional import cache_headers, etag_matches, not_modified, weak_etag
+from utils.responses import json_response
 
 
 router = APIRouter(
@@ -15,16 +18,37 @@ router = APIRouter(
 
 @router.get("/{org_id}", response_model=List[OrganizationUserRead])
 def get_users_in_organization(
+    request: Request,
     org_id: int,
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
+    limit: int = Query(100, ge=1, le=1000, description="Number of users to return"),
+    role: Optional[OrganizationUserRole] = Query(None, description="Only return users with this role"),
+    email_prefix: Optional[str] = Query(None, min_length=1, description="Only return users whose email starts with this"),
+    format: str = Query("json", pattern="^(json|ndjson)$", description="ndjson streams every matching user, one per line"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
     organization_user: User = Depends(require_organization_moderator_or_admin)
 ):
     """
-    List all users in an organization.
+    List the users in an organization, in the order they joined.
+    Pages hold up to limit users; when there are more, the X-Next-Cursor header
+    holds the cursor of the next page. With format=ndjson every matching user
+    is streamed instead and limit is ignored. JSON pages answer 304 when
+    If-None-Match holds the ETag of an unchanged page.
     Requires moderator or admin privileges for the organization.
     """
-    return controllers.organization_user.list_users_in_organization(db=db, org_id=org_id)
+    if format == "ndjson":
+        lines = controllers.organization_user.stream_users_in_organization(db=db, org_id=org_id, cursor=cursor, role=role, email_prefix=email_prefix)
+        return StreamingResponse(lines, media_type="application/x-ndjson")
+
+    etag = weak_etag(request, controllers.organization_user.members_version(db=db, org_id=org_id, role=role, email_prefix=email_prefix))
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    page = controllers.organization_user.list_users_in_organization(db=db, org_id=org_id, cursor=cursor, limit=limit, role=role, email_prefix=email_prefix)
+    headers = cache_headers(etag)
+    if page.next_cursor:
+        headers["X-Next-Cursor"] = page.next_cursor
+    return json_response(page.users, List[OrganizationUserRead], headers=headers)
 
 @router.put("/{org_id}/{user_id}", response_model=OrganizationUserRead)
 def update_user_role_in_organization(
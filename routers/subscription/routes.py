@@ -1,7 +1,7 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException
 from sqlalchemy.orm import Session
 from models.user import User
-from dependencies.dependencies import get_current_user, get_db
+from dependencies.dependencies import get_current_user, get_db, get_raw_body
 from types_definitions.subscription import CreateSubscriptionRequest, CreateSubscriptionResponse, PublicSubscription
 import controllers
 
@@ -42,3 +42,15 @@ def create_free_subscription(
         raise HTTPException(status_code=500, detail=f"An unexpected error occurred: {str(e)}")
 
 
+@router.post("/webhook")
+def stripe_webhook(
+    payload: bytes = Depends(get_raw_body),
+    stripe_signature: str = Header(None, alias="Stripe-Signature"),
+    db: Session = Depends(get_db)
+):
+    """
+    Receives Stripe webhook events. Events are verified and stored, then applied
+    to subscriptions by a Celery worker, so this answers Stripe right away.
+    """
+    controllers.subscription.ingest_webhook(db=db, payload=payload, signature=stripe_signature)
+    return {"received": True}
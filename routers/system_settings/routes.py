@@ -1,6 +1,12 @@
-from fastapi import APIRouter
-from config.system_settings import SystemSettings
-from types_definitions.system_settings import SystemSettingsResponse
+from fastapi import APIRouter, Depends, Request
+from sqlalchemy.orm import Session
+from dependencies.dependencies import get_db, require_superadmin
+from models.user import User
+from services.system_settings import SYSTEM_SETTINGS_MAX_AGE_SECONDS
+from types_definitions.system_settings import SystemSettingsResponse, SystemSettingsUpdate
+from utils.conditional import cache_headers, etag_matches, not_modified
+from utils.responses import json_response
+import controllers
 
 router = APIRouter(
     prefix="/system-settings",
@@ -8,13 +14,32 @@ router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
+# The same for every caller, browsers and CDNs may reuse it for a while and then revalidate
+CACHE_CONTROL = f"public, max-age={SYSTEM_SETTINGS_MAX_AGE_SECONDS}, stale-while-revalidate={SYSTEM_SETTINGS_MAX_AGE_SECONDS * 5}"
+
+
 @router.get("/", response_model=SystemSettingsResponse)
-async def get_system_settings():
+def get_system_settings(request: Request, db: Session = Depends(get_db)):
     """
     Get the current system settings.
+    Answers 304 when If-None-Match holds the ETag of the current settings.
+    """
+    cached = controllers.system.get_system_settings(db)
+    if etag_matches(request, cached.etag):
+        return not_modified(cached.etag, CACHE_CONTROL)
+    return json_response(cached.settings, SystemSettingsResponse, headers=cache_headers(cached.etag, CACHE_CONTROL))
+
+
+@router.put("/", response_model=SystemSettingsResponse)
+def update_system_settings(
+    update: SystemSettingsUpdate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_superadmin)
+):
+    """
+    Change system settings. Only the fields sent are changed.
+    Every API process serves the new settings on its next request.
+    Requires superadmin role.
     """
-    return SystemSettingsResponse(
-        auto_create_free_subscription=SystemSettings.AUTO_CREATE_FREE_SUBSCRIPTION,
-        branding_logo_light_mode=SystemSettings.BRANIDING_LOGO_LIGHT_MODE,
-        branding_logo_dark_mode=SystemSettings.BRANDING_LOGO_DARK_MODE
-    )
+    cached = controllers.system.update_system_settings(db, update)
+    return json_response(cached.settings, SystemSettingsResponse, headers=cache_headers(cached.etag, "no-store"))
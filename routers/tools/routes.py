@@ -1,12 +1,15 @@
-from fastapi import APIRouter, HTTPException, WebSocket, Depends
-from typing import Dict, Any
-from types_definitions.tools import GeneratePlanRequest, PlanResponse, TaskResponse, TaskStatusResponse
+from fastapi import APIRouter, HTTPException, WebSocket, Depends, Query, status
+from typing import Dict, Any, Optional
+from types_definitions.tools import GeneratePlanRequest, PlanResponse, TaskResponse, TaskStatusResponse, TaskListResponse
 import controllers
 from celery.result import AsyncResult
 from .websocket_handler import handle_task_updates
-from dependencies.dependencies import get_db, get_current_user
+from dependencies.dependencies import get_db, get_current_entitlement, get_current_user, get_websocket_user
 from sqlalchemy.orm import Session
 from models.user import User
+from services.entitlements import Entitlement
+from utils import tracing
+from utils.task_ownership import record_task, user_owns_task
 
 router = APIRouter(
     prefix="/tools",
@@ -19,8 +22,8 @@ router = APIRouter(
 async def run_tool_task(
     task_name: str,
     task_params: Dict[str, Any] = {},
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    entitlement: Entitlement = Depends(get_current_entitlement)
 ):
     """
     Generic endpoint to run a Celery task by name with parameters.
@@ -29,8 +32,8 @@ async def run_tool_task(
     Args:
         task_name: Name of the task to run
         task_params: Parameters to pass to the task
-        db: Database session
         current_user: Authenticated user
+        entitlement: The user's plan, picks the task limits
 
     Returns:
         TaskResponse: Celery task result with task ID
@@ -40,8 +43,15 @@ async def run_tool_task(
         if 'user_id' not in task_params:
             task_params['user_id'] = current_user.id
 
-        # Call the controller function that returns a Celery result
-        celery_result = controllers.tools.task.run_task(task_name, task_params)
+        # Root span of the generation's trace, the worker continues it
+        with tracing.span("tools.run_task", task_name=task_name, user_id=current_user.id) as span:
+            # Call the controller function that returns a Celery result
+            celery_result = controllers.tools.task.run_task(entitlement, task_name, task_params)
+            if span is not None:
+                span.set_attribute("task_id", celery_result.id)
+
+            # Index the task under the user so status and stream endpoints can check ownership
+            record_task(current_user.id, celery_result.id)
 
         # Return the properly typed response
         return TaskResponse(
@@ -49,10 +59,25 @@ async def run_tool_task(
             status=celery_result.status,
             message=f"Task '{task_name}' queued successfully"
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error queuing task: {str(e)}")
 
 
+@router.get("/tasks", response_model=TaskListResponse)
+async def list_tool_tasks(
+    cursor: Optional[str] = Query(None, description="Cursor from the previous page"),
+    limit: int = Query(20, ge=1, le=100, description="Number of tasks to return"),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    List the tasks the current user has started, newest first.
+    Tasks drop out of the list once they are older than the task index TTL.
+    """
+    return controllers.tools.list_tasks(current_user.id, cursor=cursor, limit=limit)
+
+
 @router.get("/task/{task_id}/status", response_model=TaskStatusResponse)
 async def get_task_status(
     task_id: str,
@@ -71,6 +96,9 @@ async def get_task_status(
     Returns:
         TaskStatusResponse: Current task status and result
     """
+    if not user_owns_task(current_user.id, task_id):
+        raise HTTPException(status_code=404, detail="Task not found")
+
     try:
         # Get the AsyncResult object
         result = AsyncResult(task_id)
@@ -90,14 +118,24 @@ async def get_task_status(
 
 
 @router.websocket("/task/{task_id}/ws")
-async def websocket_task_updates(websocket: WebSocket, task_id: str):
+async def websocket_task_updates(
+    websocket: WebSocket,
+    task_id: str,
+    current_user: Optional[User] = Depends(get_websocket_user)
+):
     """
     WebSocket endpoint for receiving real-time updates for a specific task.
-    
+    Pass the auth token as ?token=. Users can only follow their own tasks.
+
     Args:
         websocket: The WebSocket connection
         task_id: The task ID to listen for updates on
+        current_user: User resolved from the token query parameter
     """
+    if current_user is None or not user_owns_task(current_user.id, task_id):
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
     await websocket.accept()
     try:
         await handle_task_updates(websocket, task_id)
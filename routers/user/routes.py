@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from types_definitions.user import (
     PublicUser,
     CreateUserObject,
@@ -10,6 +10,9 @@ from types_definitions.subscription import SubscriptionStatusResponse, PublicSub
 from dependencies.dependencies import get_current_user, get_db, require_superadmin_or_admin
 from sqlalchemy.orm import Session
 from models.user import User
+from typing import List
+from utils.conditional import cache_headers, etag_matches, not_modified, weak_etag
+from utils.responses import json_response
 import controllers
 
 router = APIRouter(
@@ -84,6 +87,7 @@ async def resend_confirmation_email(token: str, db: Session = Depends(get_db)):
 # New system-wide user listing endpoint
 @router.get("/list", response_model=list[PublicUser])
 async def list_users_endpoint(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
     role: str = None,
@@ -95,6 +99,10 @@ async def list_users_endpoint(
     List all users with pagination.
     
     Accessible to superadmins and admins.
+    Answers 304 when If-None-Match holds the ETag of an unchanged page.
     """
+    etag = weak_etag(request, controllers.user.users_version(db, role, confirmed))
+    if etag_matches(request, etag):
+        return not_modified(etag)
     users = controllers.user.list_users(db, skip, limit, role, confirmed)
-    return users
+    return json_response(users, List[PublicUser], headers=cache_headers(etag))
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Bytes on the wire and CPU spent per GET /asset/ response, by content encoding.
+
+The body is the JSON of an asset page of each size (rows shaped like
+serialization_bench.py's), encoded the way middleware/compression.py does:
+
+    identity    the JSON as written by json_response
+    gzip        gzip at COMPRESSION_GZIP_LEVEL
+    br          brotli at COMPRESSION_BROTLI_QUALITY, when brotli is installed
+    304         a conditional GET of an unchanged page (utils/conditional.py),
+                no body, no serialization, no compression
+
+CPU is process time spent compressing one response, the median of the runs.
+
+Usage (from the repo root, with requirements.txt installed):
+    python scripts/benchmarks/compression_bench.py
+    ... compression_bench.py --sizes 10 100 1000 --runs 20
+"""
+
+import argparse
+import gzip
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from middleware.compression import brotli, compress
+from serialization_bench import direct_path, make_rows
+
+
+def median_cpu_ms(data, encoding, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.process_time()
+        compress(data, encoding)
+        timings.append(time.process_time() - start)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    encodings = ["gzip"] + (["br"] if brotli is not None else [])
+    header = f"{'rows':>6}{'identity B':>12}"
+    for encoding in encodings:
+        header += f"{encoding + ' B':>12}{encoding + ' ms':>10}"
+    print(header + f"{'304 B':>8}")
+    for size in args.sizes:
+        body = direct_path({"assets": make_rows(size), "total": size, "skip": 0, "limit": size})
+        assert gzip.decompress(compress(body, "gzip")) == body
+        row = f"{size:>6}{len(body):>12}"
+        for encoding in encodings:
+            row += f"{len(compress(body, encoding)):>12}{median_cpu_ms(body, encoding, args.runs):>10.2f}"
+        print(row + f"{0:>8}")
+    if brotli is None:
+        print("brotli is not installed, br was skipped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Compares EmailService.notify in a loop with EmailService.notify_bulk.
+
+Both run against a fake SendGrid API on localhost that accepts
+POST /v3/mail/send, waits --latency-ms to stand in for the network and
+provider, and counts the personalizations it received. No SendGrid account is
+needed and nothing is delivered.
+
+Usage (from the repo root, with requirements.txt installed):
+    python scripts/benchmarks/email_bulk_bench.py
+    python scripts/benchmarks/email_bulk_bench.py --recipients 5000 --latency-ms 150
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+
+class FakeSendGrid(BaseHTTPRequestHandler):
+    latency = 0.05
+    requests = 0
+    personalizations = 0
+    lock = threading.Lock()
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        time.sleep(self.latency)
+        with self.lock:
+            FakeSendGrid.requests += 1
+            FakeSendGrid.personalizations += len(body.get("personalizations", []))
+        self.send_response(202)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+    @classmethod
+    def reset(cls):
+        cls.requests = 0
+        cls.personalizations = 0
+
+
+def invitation_params(i):
+    return {
+        "inviter_email": "admin@example.com",
+        "organization_name": "Benchmark Org",
+        "accept_link": f"http://localhost:3000/accept-invitation?token=token-{i}",
+    }
+
+
+def run(name, send, recipients):
+    FakeSendGrid.reset()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        send(recipients)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<12}{len(recipients):>10}{FakeSendGrid.requests:>10}{FakeSendGrid.personalizations:>16}"
+          f"{elapsed:>10.2f}{len(recipients) / elapsed:>12.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recipients", type=int, default=2000)
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="simulated SendGrid response time")
+    parser.add_argument("--template", default="invitation")
+    args = parser.parse_args()
+
+    FakeSendGrid.latency = args.latency_ms / 1000
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeSendGrid)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    os.environ["EMAIL_TRANSPORT"] = "sendgrid"
+    os.environ["SENDGRID_API_HOST"] = f"http://127.0.0.1:{server.server_port}"
+    os.environ.setdefault("SENDGRID_API_KEY", "SG.benchmark")
+    os.environ.setdefault("SENDGRID_FROM_EMAIL", "benchmark@example.com")
+    from services.email_service import EmailService, template_path
+
+    service = EmailService(template_dir=template_path)
+    recipients = [(f"user{i}@example.com", invitation_params(i)) for i in range(args.recipients)]
+
+    print(f"{'mode':<12}{'emails':>10}{'requests':>10}{'personalizations':>16}{'seconds':>10}{'emails/s':>12}")
+    run("notify", lambda rs: [service.notify(args.template, email, params) for email, params in rs], recipients)
+    run("notify_bulk", lambda rs: service.notify_bulk(args.template, rs), recipients)
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
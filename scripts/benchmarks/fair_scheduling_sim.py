@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Simulates queue-wait tail latency per tenant with and without fair scheduling.
+
+One organization dumps a large burst of tasks while a handful of small
+organizations keep submitting a task every few seconds. The same arrivals are
+run through:
+
+- fifo: one Celery queue served in arrival order (the default setup)
+- fair: per-organization queues served in weighted deficit round-robin, the
+  policy celery_app/fair_scheduler.py applies
+
+No Redis or Celery is needed, it is a discrete-event simulation.
+
+Usage:
+    python scripts/benchmarks/fair_scheduling_sim.py
+    python scripts/benchmarks/fair_scheduling_sim.py --workers 8 --burst 1000 --seed 7
+"""
+
+import argparse
+import heapq
+import random
+from collections import defaultdict, deque
+
+
+def generate_arrivals(args):
+    """Return a list of (arrival_time, org, service_time) sorted by arrival."""
+    rng = random.Random(args.seed)
+    arrivals = []
+
+    # The noisy tenant queues its whole burst in the first few seconds
+    for _ in range(args.burst):
+        arrivals.append((rng.uniform(0, 5), "burst_org", rng.lognormvariate(1.6, 0.4)))
+
+    # Small tenants submit steadily for the whole run
+    for i in range(args.small_orgs):
+        t = rng.expovariate(1 / args.small_interval)
+        while t < args.duration:
+            arrivals.append((t, f"small_org_{i}", rng.lognormvariate(1.6, 0.4)))
+            t += rng.expovariate(1 / args.small_interval)
+
+    arrivals.sort()
+    return arrivals
+
+
+class FifoQueue:
+    def __init__(self, weights):
+        self.queue = deque()
+
+    def push(self, org, item):
+        self.queue.append((org, item))
+
+    def pop(self):
+        return self.queue.popleft() if self.queue else None
+
+
+class FairQueue:
+    """Weighted deficit round-robin over per-organization queues."""
+
+    def __init__(self, weights):
+        self.weights = weights
+        self.queues = defaultdict(deque)
+        self.order = []
+        self.current = None
+        self.remaining = 0
+
+    def push(self, org, item):
+        if org not in self.order:
+            self.order.append(org)
+        self.queues[org].append(item)
+
+    def _advance(self):
+        """Hand the turn to the next organization, in order, that has queued tasks."""
+        start = self.order.index(self.current) + 1 if self.current in self.order else 0
+        for offset in range(len(self.order)):
+            org = self.order[(start + offset) % len(self.order)]
+            if self.queues[org]:
+                self.current = org
+                self.remaining = max(1, self.weights.get(org, 1))
+                return org
+        return None
+
+    def pop(self):
+        if self.current is None or self.remaining <= 0 or not self.queues[self.current]:
+            if self._advance() is None:
+                return None
+        item = self.queues[self.current].popleft()
+        self.remaining -= 1
+        return self.current, item
+
+
+def simulate(arrivals, queue_cls, workers, weights):
+    """Run the arrivals through a queue and a pool of workers, return waits per org."""
+    queue = queue_cls(weights)
+    events = []  # (time, kind, payload)
+    for arrival_time, org, service in arrivals:
+        heapq.heappush(events, (arrival_time, 1, (org, arrival_time, service)))
+
+    idle_workers = workers
+    waits = defaultdict(list)
+
+    def start_next(now):
+        nonlocal idle_workers
+        while idle_workers > 0:
+            popped = queue.pop()
+            if popped is None:
+                return
+            org, (arrival_time, service) = popped
+            waits[org].append(now - arrival_time)
+            idle_workers -= 1
+            heapq.heappush(events, (now + service, 0, None))
+
+    while events:
+        now, kind, payload = heapq.heappop(events)
+        if kind == 0:
+            idle_workers += 1
+        else:
+            org, arrival_time, service = payload
+            queue.push(org, (arrival_time, service))
+        start_next(now)
+
+    return waits
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def report(name, waits):
+    print(f"\n{name}")
+    print(f"{'tenant':<14}{'tasks':>7}{'p50 s':>10}{'p95 s':>10}{'p99 s':>10}")
+    small = []
+    for org in sorted(waits):
+        values = waits[org]
+        if org.startswith("small_org"):
+            small.extend(values)
+        print(f"{org:<14}{len(values):>7}{percentile(values, 50):>10.1f}{percentile(values, 95):>10.1f}{percentile(values, 99):>10.1f}")
+    if small:
+        print(f"{'small (all)':<14}{len(small):>7}{percentile(small, 50):>10.1f}{percentile(small, 95):>10.1f}{percentile(small, 99):>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4, help="worker processes consuming the queue")
+    parser.add_argument("--burst", type=int, default=400, help="tasks queued by the noisy tenant")
+    parser.add_argument("--small-orgs", type=int, default=5, help="number of small tenants")
+    parser.add_argument("--small-interval", type=float, default=20.0, help="mean seconds between a small tenant's tasks")
+    parser.add_argument("--duration", type=float, default=600.0, help="seconds the small tenants keep submitting")
+    parser.add_argument("--burst-weight", type=int, default=1, help="round-robin weight of the noisy tenant's tier")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    arrivals = generate_arrivals(args)
+    weights = {"burst_org": args.burst_weight}
+    print(f"{len(arrivals)} tasks, {args.workers} workers, burst of {args.burst} from one tenant, "
+          f"{args.small_orgs} small tenants every ~{args.small_interval:.0f}s")
+
+    report("FIFO (single Celery queue)", simulate(arrivals, FifoQueue, args.workers, weights))
+    report("Fair (weighted round-robin per organization)", simulate(arrivals, FairQueue, args.workers, weights))
+
+
+if __name__ == "__main__":
+    main()
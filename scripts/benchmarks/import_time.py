@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Measures how long a module takes to import, using python -X importtime.
+
+Each run is a fresh interpreter so nothing is cached between runs. Prints the
+median total import time and the slowest top-level imports by cumulative time.
+
+Usage (from the repo root):
+    python scripts/benchmarks/import_time.py                 # import main
+    python scripts/benchmarks/import_time.py --module celery_app.celery_app --runs 5
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+
+def measure(module):
+    """Return {imported package: (self_us, cumulative_us, depth)} for one fresh import."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if completed.returncode != 0:
+        sys.exit(f"import {module} failed:\n{completed.stderr[-2000:]}")
+
+    timings = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        timings[name.strip()] = (int(self_us), int(cumulative_us), depth)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    runs = [measure(args.module) for _ in range(args.runs)]
+    totals = [run[args.module][1] for run in runs]
+    print(f"import {args.module}: median {statistics.median(totals) / 1000:.0f} ms over {args.runs} runs "
+          f"(min {min(totals) / 1000:.0f} ms, max {max(totals) / 1000:.0f} ms)")
+
+    # Slowest imports from the last run, skipping the module itself
+    last = runs[-1]
+    slowest = sorted((item for item in last.items() if item[0] != args.module), key=lambda item: item[1][1], reverse=True)
+    print(f"\n{'cumulative ms':>14}{'self ms':>10}  module")
+    for name, (self_us, cumulative_us, depth) in slowest[:args.top]:
+        print(f"{cumulative_us / 1000:>14.1f}{self_us / 1000:>10.1f}  {'  ' * (depth - 1)}{name}")
+
+
+if __name__ == "__main__":
+    main()
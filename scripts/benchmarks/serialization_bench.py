@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Compares the cost of serializing GET /asset/ responses of growing size.
+
+Each asset row carries a small meta dict, like generated images do. Three paths:
+
+    stdlib      what FastAPI did before: validate against response_model,
+                jsonable_encoder, then json.dumps (JSONResponse)
+    orjson      the same validation and jsonable_encoder, encoded by orjson
+                (ORJSONResponse, the app's default_response_class now)
+    direct      utils.responses.json_response: one validation from the rows,
+                JSON written by pydantic-core
+
+Rows are plain objects read by attribute, like the ORM rows, so no database
+is needed.
+
+Usage (from the repo root, with requirements.txt installed):
+    python scripts/benchmarks/serialization_bench.py
+    ... serialization_bench.py --sizes 100 1000 5000 --runs 20
+"""
+
+import argparse
+import datetime
+import json
+import os
+import statistics
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+
+from types_definitions.asset import AssetListResponse
+from utils.responses import json_response
+
+
+def make_rows(count):
+    now = datetime.datetime.utcnow()
+    return [
+        SimpleNamespace(
+            id=i, filename=f"image-{i}.png", bucket_name="bench-bucket", file_path=f"assets/{i}.png",
+            content_type="image/png", file_size=1024 * 1024, original_asset_id=None, user_id=1,
+            preserve=False, expires_at=None, public_url=f"https://storage.googleapis.com/bench-bucket/assets/{i}.png",
+            checksum="d41d8cd98f00b204e9800998ecf8427e", upload_source="image-generator", created_at=now,
+            meta={"prompt": "a lighthouse at dusk, watercolor", "guidance": 4.0, "steps": 50, "seed": i, "tags": ["generated", "logo"]},
+        )
+        for i in range(count)
+    ]
+
+
+def stdlib_path(content):
+    # Route builds the model, FastAPI validates it again and encodes it
+    response = AssetListResponse.model_validate(content, from_attributes=True)
+    revalidated = AssetListResponse.model_validate(response.model_dump())
+    return json.dumps(jsonable_encoder(revalidated)).encode()
+
+
+def orjson_path(content):
+    response = AssetListResponse.model_validate(content, from_attributes=True)
+    revalidated = AssetListResponse.model_validate(response.model_dump())
+    return orjson.dumps(jsonable_encoder(revalidated))
+
+
+def direct_path(content):
+    return json_response(content, AssetListResponse).body
+
+
+def median_ms(function, content, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        function(content)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    paths = (("stdlib", stdlib_path), ("orjson", orjson_path), ("direct", direct_path))
+    print(f"{'rows':>6}" + "".join(f"{name + ' ms':>14}" for name, _ in paths) + f"{'bytes':>12}")
+    for size in args.sizes:
+        content = {"assets": make_rows(size), "total": size, "skip": 0, "limit": size}
+        # Same document on every path, only the cost differs
+        assert json.loads(stdlib_path(content)) == json.loads(direct_path(content))
+        row = f"{size:>6}"
+        for _, function in paths:
+            row += f"{median_ms(function, content, args.runs):>14.2f}"
+        print(row + f"{len(direct_path(content)):>12}")
+
+
+if __name__ == "__main__":
+    main()
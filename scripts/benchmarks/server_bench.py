@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Compares API launchers: cold start and steady-state requests per second.
+
+Starts each launcher on --port, times how long until /healthz answers, then
+keeps --concurrency connections busy against --path for --seconds and reports
+the request rate and latency percentiles. The launchers:
+
+    uvicorn   uvicorn main:app --workers 2, how start.sh used to run production
+    server    python -m server, gunicorn with preloaded uvicorn workers
+
+Needs the API's environment (DATABASE_URL, Redis, ...) when --path touches
+them; /healthz does not. The client runs in this process, so on small
+machines it can be the bottleneck: compare launchers, not absolute numbers.
+
+Usage (from the repo root, with requirements.txt installed):
+    python scripts/benchmarks/server_bench.py
+    ... server_bench.py --path /system-settings/ --concurrency 64 --seconds 20
+"""
+
+import argparse
+import asyncio
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+
+def launcher_commands(port):
+    return {
+        "uvicorn": [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port), "--workers", "2"],
+        "server": [sys.executable, "-m", "server"],
+    }
+
+
+def start(command, port, timeout=60.0):
+    """Start a launcher and return (process, seconds until /healthz answered)."""
+    env = {**os.environ, "PORT": str(port)}
+    started = time.perf_counter()
+    process = subprocess.Popen(command, cwd=REPO_ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    while time.perf_counter() - started < timeout:
+        if process.poll() is not None:
+            sys.exit(f"{' '.join(command)} exited with {process.returncode}")
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/healthz", timeout=1).status_code == 200:
+                return process, time.perf_counter() - started
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.05)
+    stop(process)
+    sys.exit(f"{' '.join(command)} did not answer /healthz within {timeout}s")
+
+
+def stop(process):
+    process.send_signal(signal.SIGTERM)
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+async def load(url, concurrency, seconds):
+    """Keep concurrency requests in flight for seconds. Returns (latencies, errors)."""
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + seconds
+
+    async def client_loop(client):
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                response = await client.get(url)
+                if response.status_code >= 500:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=10) as client:
+        await asyncio.gather(*(client_loop(client) for _ in range(concurrency)))
+    return latencies, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--path", default="/healthz")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--launchers", nargs="+", default=["uvicorn", "server"])
+    args = parser.parse_args()
+
+    commands = launcher_commands(args.port)
+    for name in args.launchers:
+        process, cold_start = start(commands[name], args.port)
+        try:
+            # Warm up the workers before measuring
+            asyncio.run(load(f"http://127.0.0.1:{args.port}{args.path}", args.concurrency, 1))
+            latencies, errors = asyncio.run(load(f"http://127.0.0.1:{args.port}{args.path}", args.concurrency, args.seconds))
+        finally:
+            stop(process)
+        latencies.sort()
+        p50 = statistics.median(latencies) * 1000 if latencies else 0
+        p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000 if latencies else 0
+        print(f"{name:>8}: cold start {cold_start:5.2f}s, {len(latencies) / args.seconds:8.0f} req/s, "
+              f"p50 {p50:6.1f} ms, p99 {p99:6.1f} ms, {errors} errors")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Production launcher for the API: gunicorn managing uvicorn workers.
+
+    python -m server
+
+The app is imported once in the gunicorn master before the workers fork, so
+the imported modules are shared copy-on-write and every worker starts in
+milliseconds. uvicorn picks uvloop and httptools when they are installed
+(uvicorn[standard]) and falls back to asyncio and h11 otherwise. Workers are
+recycled after WEB_MAX_REQUESTS requests, with jitter so they do not all
+restart at once, which caps slow memory growth.
+
+Settings (environment):
+    WEB_CONCURRENCY       number of workers, sized from CPUs and memory when unset
+    WEB_WORKER_MEMORY_MB  memory budgeted per worker when sizing (default 300)
+    WEB_MAX_REQUESTS      requests before a worker is recycled, 0 never (default 10000)
+    WEB_GRACEFUL_TIMEOUT  seconds a stopping worker gets to finish requests (default 30)
+    WEB_KEEPALIVE         seconds idle keep-alive connections stay open (default 75)
+    PORT                  port to bind (default 8000)
+
+For local development start.sh keeps using uvicorn --reload.
+"""
+
+import multiprocessing
+import os
+from typing import Optional
+
+from gunicorn.app.base import BaseApplication
+
+DEFAULT_WORKER_MEMORY_MB = 300
+
+
+def _cgroup_cpu_limit() -> Optional[float]:
+    """CPUs allowed by the container's cgroup v2 quota, None without one."""
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+    except (OSError, ValueError):
+        return None
+    if quota == "max":
+        return None
+    return int(quota) / int(period)
+
+
+def _cgroup_memory_limit() -> Optional[int]:
+    """Bytes allowed by the container's cgroup v2 limit, None without one."""
+    try:
+        with open("/sys/fs/cgroup/memory.max") as f:
+            limit = f.read().strip()
+    except OSError:
+        return None
+    return None if limit == "max" else int(limit)
+
+
+def available_cpus() -> float:
+    try:
+        cpus = float(len(os.sched_getaffinity(0)))
+    except AttributeError:  # not on Linux
+        cpus = float(multiprocessing.cpu_count())
+    limit = _cgroup_cpu_limit()
+    return min(cpus, limit) if limit else cpus
+
+
+def available_memory() -> Optional[int]:
+    limit = _cgroup_memory_limit()
+    if limit:
+        return limit
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def worker_count() -> int:
+    """
+    One worker per CPU, each runs an event loop plus a thread pool for sync
+    endpoints, capped by how many WEB_WORKER_MEMORY_MB workers fit in memory.
+    """
+    if os.getenv("WEB_CONCURRENCY"):
+        return max(1, int(os.environ["WEB_CONCURRENCY"]))
+    workers = max(1, int(available_cpus()))
+    memory = available_memory()
+    if memory:
+        per_worker = int(os.getenv("WEB_WORKER_MEMORY_MB", DEFAULT_WORKER_MEMORY_MB)) * 1024 * 1024
+        workers = min(workers, max(1, memory // per_worker))
+    return workers
+
+
+def child_exit(server, worker):
+    """Let the metrics of a dead worker stop counting as live gauges."""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
+
+
+def post_fork(server, worker):
+    """Drop database connections the preloaded master may have opened, they cannot be shared."""
+    from utils.database import reset_engine_after_fork
+    reset_engine_after_fork()
+
+
+def gunicorn_options() -> dict:
+    max_requests = int(os.getenv("WEB_MAX_REQUESTS", 10000))
+    return {
+        "bind": f"0.0.0.0:{os.getenv('PORT', 8000)}",
+        "workers": worker_count(),
+        "worker_class": "uvicorn.workers.UvicornWorker",
+        "preload_app": True,
+        "max_requests": max_requests,
+        "max_requests_jitter": max_requests // 10,
+        "graceful_timeout": int(os.getenv("WEB_GRACEFUL_TIMEOUT", 30)),
+        "timeout": 60,
+        "keepalive": int(os.getenv("WEB_KEEPALIVE", 75)),
+        "accesslog": "-",
+        "post_fork": post_fork,
+        "child_exit": child_exit,
+    }
+
+
+class APIServer(BaseApplication):
+    def __init__(self, options: dict):
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        from main import app
+        return app
+
+
+def main():
+    options = gunicorn_options()
+    print(f"Starting {options['workers']} API workers on {options['bind']}", flush=True)
+    APIServer(options).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Transactional email outbox.
+
+Controllers call enqueue_email() next to the change that triggers the email,
+so the email is queued if and only if that transaction commits, and the
+request never waits on SendGrid. The drain_email_outbox Celery task calls
+drain() to send due emails in batches.
+
+Delivery guarantees:
+- A row is claimed with FOR UPDATE SKIP LOCKED and marked 'sending' in its own
+  commit, so concurrent drains never pick the same email.
+- Failed sends go back to 'pending' with exponential backoff until
+  MAX_ATTEMPTS, then stay 'failed'.
+- A row left in 'sending' by a crashed worker may already have been accepted
+  by SendGrid. It is marked 'failed' rather than retried, so a retry never
+  sends a duplicate.
+"""
+
+import datetime
+import logging
+import os
+from collections import defaultdict
+from typing import Any, Dict, List
+from sqlalchemy.orm import Session
+from models.email_outbox import EmailOutbox
+from services.email_service import woopdi_mail
+from utils.metrics import EMAIL_OUTBOX_DELIVERIES
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = int(os.getenv("EMAIL_OUTBOX_BATCH_SIZE", 50))
+MAX_ATTEMPTS = int(os.getenv("EMAIL_OUTBOX_MAX_ATTEMPTS", 6))
+BACKOFF_BASE_SECONDS = 30
+BACKOFF_MAX_SECONDS = 3600
+# A send that has not finished after this long was interrupted
+STALE_SENDING_SECONDS = 600
+
+
+def enqueue_email(db: Session, template_name: str, recipient_email: str, params: Dict[str, Any], idempotency_key: str) -> EmailOutbox:
+    """
+    Queue an email in the caller's transaction. Nothing is sent until the
+    caller commits.
+
+    Args:
+        db: The caller's database session
+        template_name: Template in templates/emails
+        recipient_email: Address to send to
+        params: Template parameters
+        idempotency_key: Unique key for this email, e.g. "reset_password:<token>"
+    """
+    outbox_email = EmailOutbox(
+        idempotency_key=idempotency_key,
+        template_name=template_name,
+        recipient_email=recipient_email,
+        params=params,
+    )
+    db.add(outbox_email)
+    return outbox_email
+
+
+def _backoff_seconds(attempts: int) -> int:
+    return min(BACKOFF_BASE_SECONDS * 2 ** (attempts - 1), BACKOFF_MAX_SECONDS)
+
+
+def _fail_interrupted_sends(db: Session, now: datetime.datetime) -> None:
+    cutoff = now - datetime.timedelta(seconds=STALE_SENDING_SECONDS)
+    db.query(EmailOutbox)\
+        .filter(EmailOutbox.status == 'sending', EmailOutbox.locked_at < cutoff)\
+        .update({
+            "status": "failed",
+            "last_error": "Interrupted while sending, not retried to avoid a duplicate",
+        }, synchronize_session=False)
+
+
+def _claim_batch(db: Session, batch_size: int) -> List[EmailOutbox]:
+    now = datetime.datetime.utcnow()
+    _fail_interrupted_sends(db, now)
+
+    batch = db.query(EmailOutbox)\
+        .filter(EmailOutbox.status == 'pending', EmailOutbox.next_attempt_at <= now)\
+        .order_by(EmailOutbox.id)\
+        .limit(batch_size)\
+        .with_for_update(skip_locked=True)\
+        .all()
+
+    for outbox_email in batch:
+        outbox_email.status = 'sending'
+        outbox_email.locked_at = now
+        outbox_email.attempts += 1
+    db.commit()
+    return batch
+
+
+def drain(db: Session, batch_size: int = BATCH_SIZE) -> int:
+    """
+    Send one batch of due emails.
+
+    Returns:
+        int: Number of emails claimed, batch_size means more may be waiting
+    """
+    batch = _claim_batch(db, batch_size)
+
+    by_template: Dict[str, List[EmailOutbox]] = defaultdict(list)
+    for outbox_email in batch:
+        by_template[outbox_email.template_name].append(outbox_email)
+
+    for template_name, outbox_emails in by_template.items():
+        # Emails of the same template go out together as SendGrid personalizations
+        try:
+            result = woopdi_mail.notify_bulk(template_name, [(e.recipient_email, e.params) for e in outbox_emails])
+            errors = result.failed
+        except Exception as e:
+            errors = {index: str(e) for index in range(len(outbox_emails))}
+
+        for index, outbox_email in enumerate(outbox_emails):
+            if index in errors:
+                outcome = _record_failure(outbox_email, errors[index])
+            else:
+                outbox_email.status = 'sent'
+                outbox_email.sent_at = datetime.datetime.utcnow()
+                outbox_email.last_error = None
+                outcome = "sent"
+            EMAIL_OUTBOX_DELIVERIES.labels(template_name=template_name, outcome=outcome).inc()
+
+        # Commit each send on its own so a crash only leaves that one in 'sending'
+        db.commit()
+
+    return len(batch)
+
+
+def _record_failure(outbox_email: EmailOutbox, error: str) -> str:
+    outbox_email.last_error = error
+    if outbox_email.attempts >= MAX_ATTEMPTS:
+        outbox_email.status = 'failed'
+        logger.error(f"Giving up on email {outbox_email.idempotency_key} after {outbox_email.attempts} attempts: {error}")
+        return "failed"
+
+    outbox_email.status = 'pending'
+    outbox_email.next_attempt_at = datetime.datetime.utcnow() + datetime.timedelta(seconds=_backoff_seconds(outbox_email.attempts))
+    logger.warning(f"Email {outbox_email.idempotency_key} failed on attempt {outbox_email.attempts}, will retry: {error}")
+    return "retry"
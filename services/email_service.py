@@ -1,76 +1,153 @@
+"""
+Email service that renders templates/emails and hands them to a transport.
+
+woopdi_mail is built on first use, not at import. Importing this module does
+not import Jinja or the SendGrid client, and a missing sender address only
+fails the first send instead of every process that imports it.
+
+Emails are sent from EMAIL_FROM, or SENDGRID_FROM_EMAIL when it is unset.
+SendGrid rejects mail without a verified sender, so the sendgrid transport
+requires one; the others fall back to DEFAULT_FROM_EMAIL.
+"""
+
 import os
-import json
-from jinja2 import Environment, FileSystemLoader
-from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail
-from config.system_settings import SystemSettings
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+from services.email_transports import EmailTransport, SendGridTransport, build_transport
+
+DEFAULT_FROM_EMAIL = "no-reply@localhost"
+
+
+class BulkSendResult:
+    """Outcome of notify_bulk, keyed by the recipient's index in the list passed in."""
+
+    def __init__(self):
+        self.sent: List[int] = []
+        self.failed: Dict[int, str] = {}
+
 
 class EmailService:
-    def __init__(self, template_dir: str):
+    def __init__(self, template_dir: str, transport: Optional[EmailTransport] = None, from_email: Optional[str] = None):
+        from services.email_templates import TemplateRegistry
+
         self.template_dir = template_dir
-        self.jinja_env = Environment(loader=FileSystemLoader(template_dir))
-        self.sendgrid_client = SendGridAPIClient(os.environ.get('SENDGRID_API_KEY'))
-        self.from_email = os.environ.get("SENDGRID_FROM_EMAIL")
+        self.templates = TemplateRegistry(template_dir)
+        self.transport = transport or build_transport()
+        self.from_email = from_email or os.environ.get("EMAIL_FROM") or os.environ.get("SENDGRID_FROM_EMAIL")
 
         if not self.from_email:
-            raise ValueError("SENDGRID_FROM_EMAIL environment variable not set.")
+            if isinstance(self.transport, SendGridTransport):
+                raise ValueError("EMAIL_FROM (or SENDGRID_FROM_EMAIL) environment variable not set.")
+            self.from_email = DEFAULT_FROM_EMAIL
 
-    def _load_manifest(self, template_name: str) -> dict:
-        manifest_path = os.path.join(self.template_dir, f"{template_name}.json")
-        with open(manifest_path, 'r') as f:
-            return json.load(f)
-
-    def _validate_params(self, required_params: list, provided_params: dict):
-        for param in required_params:
-            if param not in provided_params:
-                raise ValueError(f"Missing required parameter: {param}")
+        # Compile every template now, in development they load on first use and reload on change
+        if not self.templates.auto_reload:
+            self.templates.load_all()
 
     def notify(self, template_name: str, recipient_email: str, params: dict):
         try:
-            manifest = self._load_manifest(template_name)
-            self._validate_params(manifest['required_params'], params)
-
-            # Inject system settings into template parameters
-            template_params = {
-                'subject': manifest['subject'],
-                **params,
-                # Inject all system settings for branding
-                'branding': {
-                    'accent_color': SystemSettings.BRANDING_ACCENT_COLOR,
-                    'primary_color': SystemSettings.BRANDING_PRIMARY_COLOR,
-                    'secondary_color': SystemSettings.BRANDING_SECONDARY_COLOR,
-                    'logo': SystemSettings.BRANDING_LOGO,
-                    'company_name': SystemSettings.BRANDING_COMPANY_NAME,
-                    'support_email': SystemSettings.BRANDING_SUPPORT_EMAIL,
-                    'footer_text': SystemSettings.BRANDING_FOOTER_TEXT,
-                },
-                'email_styling': {
-                    'background_color': SystemSettings.EMAIL_BACKGROUND_COLOR,
-                    'container_max_width': SystemSettings.EMAIL_CONTAINER_MAX_WIDTH,
-                    'header_padding': SystemSettings.EMAIL_HEADER_PADDING,
-                    'body_padding': SystemSettings.EMAIL_BODY_PADDING,
-                    'footer_padding': SystemSettings.EMAIL_FOOTER_PADDING,
-                }
-            }
-
-            template = self.jinja_env.get_template(f"{template_name}.html")
-            html_content = template.render(**template_params)
-
-            message = Mail(
-                from_email=self.from_email,
-                to_emails=recipient_email,
-                subject=manifest['subject'],
-                html_content=html_content
-            )
-            
-            response = self.sendgrid_client.send(message)
-            print(f"Email sent to {recipient_email} using template '{template_name}'. Status: {response.status_code}")
+            subject, html_content = self.templates.render(template_name, params)
+            self.transport.send(self.from_email, recipient_email, subject, html_content)
+            print(f"Email sent to {recipient_email} using template '{template_name}' via {type(self.transport).__name__}")
 
         except Exception as e:
             print(f"Failed to send email: {e}")
             # In a production app, you'd likely have more robust error handling here
             raise
 
-# Create a single, globally accessible instance of the EmailService
+    def notify_bulk(self, template_name: str, recipients: List[Tuple[str, dict]]) -> BulkSendResult:
+        """
+        Send one template to many recipients, each with their own params.
+
+        The template is rendered once with placeholders and the transport fills
+        in each recipient's params; SendGrid does it server side with
+        personalizations, up to 1000 per API request. Params a template does
+        more with than print ({% if %}, filters, attributes) cannot be filled
+        in that way. The template's syntax tree tells which, and recipients
+        with any of them are sent one by one.
+
+        A failed request only fails the recipients in it, and recipients with
+        missing params fail without holding back the others.
+
+        Args:
+            template_name: Template in templates/emails
+            recipients: (recipient_email, params) pairs
+
+        Returns:
+            BulkSendResult: indexes into recipients that were sent or failed
+        """
+        result = BulkSendResult()
+        template = self.templates.get(template_name)
+
+        # Recipients with the same param names can share one placeholder render
+        groups: Dict[Tuple[str, ...], List[int]] = defaultdict(list)
+        for index, (_, params) in enumerate(recipients):
+            try:
+                template.validate_params(params)
+            except ValueError as e:
+                result.failed[index] = str(e)
+                continue
+            groups[tuple(sorted(params))].append(index)
+
+        for param_names, indexes in groups.items():
+            if len(indexes) == 1:
+                self._notify_one(template_name, recipients, indexes[0], result)
+                continue
+
+            if not template.can_substitute(list(param_names)):
+                for index in indexes:
+                    self._notify_one(template_name, recipients, index, result)
+                continue
+
+            subject, html_content, placeholders = template.render_with_placeholders(list(param_names), self.templates.static_context)
+
+            personalized = [
+                (recipients[index][0], {token: str(recipients[index][1][name]) for name, token in placeholders.items()})
+                for index in indexes
+            ]
+            errors = self.transport.send_personalized(self.from_email, subject, html_content, personalized)
+            for position, index in enumerate(indexes):
+                if position in errors:
+                    result.failed[index] = errors[position]
+                else:
+                    result.sent.append(index)
+            print(f"Bulk email sent to {len(indexes) - len(errors)} of {len(indexes)} recipients using template '{template_name}'")
+
+        return result
+
+    def _notify_one(self, template_name: str, recipients: List[Tuple[str, dict]], index: int, result: BulkSendResult) -> None:
+        email, params = recipients[index]
+        try:
+            self.notify(template_name=template_name, recipient_email=email, params=params)
+            result.sent.append(index)
+        except Exception as e:
+            result.failed[index] = str(e)
+
+
+class LazyEmailService:
+    """Stands in for the EmailService and builds it, once, on first attribute access."""
+
+    def __init__(self, template_dir: str):
+        self._template_dir = template_dir
+        self._service: Optional[EmailService] = None
+        self._lock = threading.Lock()
+
+    def get(self) -> EmailService:
+        if self._service is None:
+            with self._lock:
+                if self._service is None:
+                    self._service = EmailService(template_dir=self._template_dir)
+        return self._service
+
+    def reset(self) -> None:
+        """Drop the built service so the next use picks up changed settings."""
+        with self._lock:
+            self._service = None
+
+    def __getattr__(self, name):
+        return getattr(self.get(), name)
+
+# A single, globally accessible EmailService, built on first use
 template_path = os.path.join(os.path.dirname(__file__), '..', 'templates', 'emails')
-woopdi_mail = EmailService(template_dir=template_path)
+woopdi_mail = LazyEmailService(template_dir=template_path)
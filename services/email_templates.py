@@ -0,0 +1,187 @@
+"""
+Registry of the email templates in templates/emails.
+
+Each template is a pair of files: {name}.json, the manifest with the subject
+and required params, and {name}.html, the Jinja body. The registry parses the
+manifest and compiles the subject and body once. In production every template
+is loaded up front by load_all(). In development (IS_PROD=False) templates are
+loaded on first use and reloaded when either file's mtime changes, so edits
+show up without a restart.
+"""
+
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+from jinja2 import Environment, FileSystemLoader, Template, nodes
+from config.system_settings import SystemSettings
+from utils.metrics import EMAIL_TEMPLATE_RENDER_SECONDS
+
+
+def build_static_context() -> Dict[str, Any]:
+    """Branding and styling values every template receives. They only change on deploy."""
+    return {
+        'branding': {
+            'accent_color': SystemSettings.BRANDING_ACCENT_COLOR,
+            'primary_color': SystemSettings.BRANDING_PRIMARY_COLOR,
+            'secondary_color': SystemSettings.BRANDING_SECONDARY_COLOR,
+            'logo': SystemSettings.BRANDING_LOGO,
+            'company_name': SystemSettings.BRANDING_COMPANY_NAME,
+            'support_email': SystemSettings.BRANDING_SUPPORT_EMAIL,
+            'footer_text': SystemSettings.BRANDING_FOOTER_TEXT,
+        },
+        'email_styling': {
+            'background_color': SystemSettings.EMAIL_BACKGROUND_COLOR,
+            'container_max_width': SystemSettings.EMAIL_CONTAINER_MAX_WIDTH,
+            'header_padding': SystemSettings.EMAIL_HEADER_PADDING,
+            'body_padding': SystemSettings.EMAIL_BODY_PADDING,
+            'footer_padding': SystemSettings.EMAIL_FOOTER_PADDING,
+        },
+    }
+
+
+# Nodes that pull in other templates or define macros, the uses of a param behind them cannot be seen
+_OPAQUE_NODES = (nodes.Extends, nodes.Include, nodes.Import, nodes.FromImport, nodes.Macro, nodes.CallBlock)
+
+
+def transformed_names(ast: nodes.Template) -> Optional[Set[str]]:
+    """
+    Names a template uses other than as the whole of a {{ name }} output, e.g. in
+    {% if name %}, {{ name|upper }} or {{ name.attr }}. None when the template
+    extends, includes or imports templates or defines macros.
+    """
+    if next(ast.find_all(_OPAQUE_NODES), None) is not None:
+        return None
+    plain = {id(node) for output in ast.find_all(nodes.Output) for node in output.nodes if isinstance(node, nodes.Name)}
+    return {node.name for node in ast.find_all(nodes.Name) if node.ctx == "load" and id(node) not in plain}
+
+
+def referenced_names(ast: nodes.Template) -> Set[str]:
+    return {node.name for node in ast.find_all(nodes.Name) if node.ctx == "load"}
+
+
+class EmailTemplate:
+    """
+    A compiled email template and the manifest it was loaded with.
+
+    transformed holds the params the subject or body does more with than print
+    as they are, None when that cannot be told (see transformed_names()).
+    """
+
+    def __init__(self, name: str, required_params: List[str], subject: Template, body: Template, mtimes: Tuple[float, float], transformed: Optional[Set[str]] = None):
+        self.name = name
+        self.required_params = required_params
+        self.subject = subject
+        self.body = body
+        self.mtimes = mtimes
+        self.transformed = transformed
+
+    def can_substitute(self, param_names: List[str]) -> bool:
+        """
+        Whether rendering once with placeholders and filling in each recipient's
+        params gives every recipient the same email as rendering it for them.
+        """
+        return self.transformed is not None and not self.transformed.intersection(param_names)
+
+    def validate_params(self, params: dict) -> None:
+        for param in self.required_params:
+            if param not in params:
+                raise ValueError(f"Missing required parameter: {param}")
+
+    def render(self, params: dict, static_context: Dict[str, Any]) -> Tuple[str, str]:
+        """
+        Render the subject and HTML body for one recipient.
+
+        Returns:
+            (subject, html_content)
+        """
+        self.validate_params(params)
+        start = time.perf_counter()
+        subject = self.subject.render(**params)
+        html_content = self.body.render({'subject': subject, **params, **static_context})
+        EMAIL_TEMPLATE_RENDER_SECONDS.labels(template_name=self.name).observe(time.perf_counter() - start)
+        return subject, html_content
+
+
+    def render_with_placeholders(self, param_names: List[str], static_context: Dict[str, Any]) -> Tuple[str, str, Dict[str, str]]:
+        """
+        Render the subject and body once with a placeholder in place of every
+        param, for sends that fill the params in per recipient (SendGrid substitutions).
+
+        Returns:
+            (subject, html_content, placeholders) where placeholders maps each
+            param name to the token standing in for it
+        """
+        placeholders = {name: f"%{name}%" for name in param_names}
+        subject = self.subject.render(**placeholders)
+        html_content = self.body.render({'subject': subject, **placeholders, **static_context})
+        return subject, html_content, placeholders
+
+
+class TemplateRegistry:
+    def __init__(self, template_dir: str, auto_reload: Optional[bool] = None):
+        self.template_dir = template_dir
+        self.auto_reload = os.getenv("IS_PROD") == "False" if auto_reload is None else auto_reload
+        # Templates are compiled by the registry, Jinja's own mtime checks would only repeat ours
+        self.jinja_env = Environment(loader=FileSystemLoader(template_dir), auto_reload=False)
+        self.static_context = build_static_context()
+        self._templates: Dict[str, EmailTemplate] = {}
+
+    def _paths(self, name: str) -> Tuple[str, str]:
+        return os.path.join(self.template_dir, f"{name}.json"), os.path.join(self.template_dir, f"{name}.html")
+
+    def _mtimes(self, name: str) -> Tuple[float, float]:
+        manifest_path, body_path = self._paths(name)
+        return os.path.getmtime(manifest_path), os.path.getmtime(body_path)
+
+    def _load(self, name: str) -> EmailTemplate:
+        manifest_path, _ = self._paths(name)
+        mtimes = self._mtimes(name)
+        with open(manifest_path, 'r') as f:
+            manifest = json.load(f)
+
+        if name in self._templates and self.jinja_env.cache is not None:
+            # Drop Jinja's compiled body so the reload reads the changed file
+            self.jinja_env.cache.clear()
+        template = EmailTemplate(
+            name=name,
+            required_params=manifest['required_params'],
+            subject=self.jinja_env.from_string(manifest['subject']),
+            body=self.jinja_env.get_template(f"{name}.html"),
+            mtimes=mtimes,
+            transformed=self._transformed(name, manifest['subject']),
+        )
+        self._templates[name] = template
+        return template
+
+    def _transformed(self, name: str, subject_source: str) -> Optional[Set[str]]:
+        """The params of a template that placeholders cannot stand in for, see EmailTemplate."""
+        subject_ast = self.jinja_env.parse(subject_source)
+        body_source, _, _ = self.jinja_env.loader.get_source(self.jinja_env, f"{name}.html")
+        subject_transformed = transformed_names(subject_ast)
+        body_transformed = transformed_names(self.jinja_env.parse(body_source))
+        if subject_transformed is None or body_transformed is None:
+            return None
+        transformed = subject_transformed | body_transformed
+        # The body receives the rendered subject, transforming it transforms the params in it
+        if "subject" in body_transformed:
+            transformed |= referenced_names(subject_ast)
+        return transformed
+
+    def load_all(self) -> None:
+        """Parse and compile every template in the template directory."""
+        for filename in sorted(os.listdir(self.template_dir)):
+            if filename.endswith(".json"):
+                self._load(filename[:-len(".json")])
+
+    def get(self, name: str) -> EmailTemplate:
+        template = self._templates.get(name)
+        if template is None:
+            return self._load(name)
+        if self.auto_reload and self._mtimes(name) != template.mtimes:
+            return self._load(name)
+        return template
+
+    def render(self, name: str, params: dict) -> Tuple[str, str]:
+        """Render a template by name, returning (subject, html_content)."""
+        return self.get(name).render(params, self.static_context)
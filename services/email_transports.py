@@ -0,0 +1,175 @@
+"""
+Transports that deliver rendered emails for EmailService.
+
+EMAIL_TRANSPORT picks one when the email service is first used:
+    sendgrid  SendGrid API (default). SENDGRID_API_KEY, SENDGRID_API_HOST
+    smtp      Any SMTP server. SMTP_HOST, SMTP_PORT, SMTP_USERNAME, SMTP_PASSWORD, SMTP_USE_TLS
+    file      Writes each email as an .eml file to EMAIL_FILE_DIR, for local development
+    memory    Keeps emails in a list on the transport, for tests
+
+Client libraries are imported when a transport is built, so importing this
+module is free.
+"""
+
+import os
+import time
+import uuid
+from abc import ABC, abstractmethod
+from typing import Dict, List, Tuple
+
+# SendGrid accepts at most 1000 personalizations per request
+MAX_PERSONALIZATIONS = 1000
+
+# (recipient_email, {placeholder token: value})
+PersonalizedRecipient = Tuple[str, Dict[str, str]]
+
+
+def _mime_message(from_email: str, to_email: str, subject: str, html_content: str):
+    from email.message import EmailMessage
+    message = EmailMessage()
+    message["From"] = from_email
+    message["To"] = to_email
+    message["Subject"] = subject
+    message.set_content(html_content, subtype="html")
+    return message
+
+
+def _fill(text: str, substitutions: Dict[str, str]) -> str:
+    for token, value in substitutions.items():
+        text = text.replace(token, value)
+    return text
+
+
+class EmailTransport(ABC):
+    @abstractmethod
+    def send(self, from_email: str, to_email: str, subject: str, html_content: str) -> None:
+        """Deliver one rendered email."""
+
+    def send_personalized(self, from_email: str, subject: str, html_content: str, recipients: List[PersonalizedRecipient]) -> Dict[int, str]:
+        """
+        Send a subject and body with placeholder tokens to many recipients,
+        filling in each recipient's substitutions.
+
+        Returns:
+            Dict[int, str]: error message by index into recipients, empty when all were sent
+        """
+        errors = {}
+        for index, (to_email, substitutions) in enumerate(recipients):
+            try:
+                self.send(from_email, to_email, _fill(subject, substitutions), _fill(html_content, substitutions))
+            except Exception as e:
+                errors[index] = str(e)
+        return errors
+
+
+class SendGridTransport(EmailTransport):
+    def __init__(self, api_key: str, host: str = 'https://api.sendgrid.com'):
+        from sendgrid import SendGridAPIClient
+        self.client = SendGridAPIClient(api_key, host=host)
+
+    def send(self, from_email: str, to_email: str, subject: str, html_content: str) -> None:
+        from sendgrid.helpers.mail import Mail
+        message = Mail(from_email=from_email, to_emails=to_email, subject=subject, html_content=html_content)
+        self.client.send(message)
+
+    def send_personalized(self, from_email: str, subject: str, html_content: str, recipients: List[PersonalizedRecipient]) -> Dict[int, str]:
+        """One API request per MAX_PERSONALIZATIONS recipients, SendGrid fills in the substitutions."""
+        from sendgrid.helpers.mail import Mail, Personalization, Substitution, To
+        errors = {}
+        for start in range(0, len(recipients), MAX_PERSONALIZATIONS):
+            chunk = recipients[start:start + MAX_PERSONALIZATIONS]
+            message = Mail(from_email=from_email, subject=subject, html_content=html_content)
+            for to_email, substitutions in chunk:
+                personalization = Personalization()
+                personalization.add_to(To(to_email))
+                for token, value in substitutions.items():
+                    personalization.add_substitution(Substitution(token, value))
+                message.add_personalization(personalization)
+            try:
+                self.client.send(message)
+            except Exception as e:
+                # The request is all or nothing, so every recipient in it failed
+                for index in range(start, start + len(chunk)):
+                    errors[index] = str(e)
+        return errors
+
+
+class SmtpTransport(EmailTransport):
+    def __init__(self, host: str, port: int, username: str = None, password: str = None, use_tls: bool = True):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+
+    def _connect(self):
+        import smtplib
+        connection = smtplib.SMTP(self.host, self.port, timeout=30)
+        if self.use_tls:
+            connection.starttls()
+        if self.username:
+            connection.login(self.username, self.password)
+        return connection
+
+    def send(self, from_email: str, to_email: str, subject: str, html_content: str) -> None:
+        with self._connect() as connection:
+            connection.send_message(_mime_message(from_email, to_email, subject, html_content))
+
+    def send_personalized(self, from_email: str, subject: str, html_content: str, recipients: List[PersonalizedRecipient]) -> Dict[int, str]:
+        """Reuses one SMTP connection for the whole batch."""
+        errors = {}
+        with self._connect() as connection:
+            for index, (to_email, substitutions) in enumerate(recipients):
+                try:
+                    connection.send_message(_mime_message(from_email, to_email, _fill(subject, substitutions), _fill(html_content, substitutions)))
+                except Exception as e:
+                    errors[index] = str(e)
+        return errors
+
+
+class FileTransport(EmailTransport):
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def send(self, from_email: str, to_email: str, subject: str, html_content: str) -> None:
+        message = _mime_message(from_email, to_email, subject, html_content)
+        filename = f"{int(time.time() * 1000)}-{uuid.uuid4().hex[:8]}.eml"
+        with open(os.path.join(self.directory, filename), "wb") as f:
+            f.write(bytes(message))
+
+
+class InMemoryTransport(EmailTransport):
+    def __init__(self):
+        self.outbox: List[Dict[str, str]] = []
+
+    def send(self, from_email: str, to_email: str, subject: str, html_content: str) -> None:
+        self.outbox.append({
+            "from_email": from_email,
+            "to_email": to_email,
+            "subject": subject,
+            "html_content": html_content,
+        })
+
+
+def build_transport() -> EmailTransport:
+    """Build the transport named by EMAIL_TRANSPORT."""
+    name = os.environ.get("EMAIL_TRANSPORT", "sendgrid").lower()
+    if name == "sendgrid":
+        return SendGridTransport(
+            os.environ.get('SENDGRID_API_KEY'),
+            host=os.environ.get('SENDGRID_API_HOST', 'https://api.sendgrid.com'),
+        )
+    if name == "smtp":
+        return SmtpTransport(
+            host=os.environ.get("SMTP_HOST", "localhost"),
+            port=int(os.environ.get("SMTP_PORT", 587)),
+            username=os.environ.get("SMTP_USERNAME"),
+            password=os.environ.get("SMTP_PASSWORD"),
+            use_tls=os.environ.get("SMTP_USE_TLS", "True") == "True",
+        )
+    if name == "file":
+        return FileTransport(os.environ.get("EMAIL_FILE_DIR", "/tmp/emails"))
+    if name == "memory":
+        return InMemoryTransport()
+    raise ValueError(f"Unknown EMAIL_TRANSPORT '{name}', expected sendgrid, smtp, file or memory")
@@ -0,0 +1,214 @@
+"""
+Entitlement cache: which plan and task limits apply to a user.
+
+An organization's current plan is derived from its Subscription rows and kept
+in the Redis hash ``entitlements:org:{org_id}`` so access checks never query
+Stripe or join the subscriptions table. The hash is rewritten by
+refresh_organization() whenever a Stripe event changes a subscription, and
+rebuilt from the database on a miss. An active plan whose access ends at
+restrict_access_on expires then, so it lapses on time even when the Stripe
+event that ends it is late or dead-lettered.
+
+Fields (all strings, as Redis stores them):
+    active              "1" when the organization has an active plan, else "0"
+    plan                price_id of the active subscription, "none" without one
+    status              Stripe status of the newest subscription, "none" without one
+    restrict_access_on  ISO timestamp access ends, "" when it does not
+
+The organizations a user belongs to are kept in ``entitlements:user:{user_id}``
+as a comma separated list, team organizations before the solo one.
+resolve_user_entitlement() combines the two into an Entitlement and keeps it in
+an in-process cache for ENTITLEMENT_LOCAL_TTL_SECONDS, so most lookups cost a
+dict read.
+
+Call invalidate_organization() after committing a subscription change and
+invalidate_user() after committing a membership change (memberships.invalidate_user()
+calls it). They drop the Redis
+keys and this process's cache; other processes pick the change up once their
+cached entry expires.
+"""
+
+import datetime
+import logging
+import math
+import time
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from config.task_limits import TaskLimits
+from models.organization import Organization, OrganizationUser, Subscription
+from utils.redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_SUBSCRIPTION_STATUSES = TaskLimits.ACTIVE_SUBSCRIPTION_STATUSES
+NO_PLAN = "none"
+
+# Rebuilt from the database at least this often even if an event is missed
+ENTITLEMENT_TTL_SECONDS = 24 * 3600
+
+# How long a process reuses a resolved Entitlement without asking Redis
+ENTITLEMENT_LOCAL_TTL_SECONDS = 5
+LOCAL_CACHE_MAX_ENTRIES = 10000
+
+
+class Entitlement:
+    """The plan a user's usage is billed to. org_id is None for users without any organization."""
+
+    __slots__ = ("user_id", "org_id", "tier", "plan", "active")
+
+    def __init__(self, user_id: int, org_id: Optional[int], tier: str, plan: str, active: bool):
+        self.user_id = user_id
+        self.org_id = org_id
+        self.tier = tier
+        self.plan = plan
+        self.active = active
+
+    @property
+    def limits(self) -> Dict[str, int]:
+        return TaskLimits.TIERS[self.tier]
+
+
+# user_id -> (expires at, ids of the user's organizations, Entitlement)
+_local_cache: Dict[int, Tuple[float, Tuple[int, ...], Entitlement]] = {}
+
+
+def _org_key(org_id: int) -> str:
+    return f"entitlements:org:{org_id}"
+
+
+def _user_key(user_id: int) -> str:
+    return f"entitlements:user:{user_id}"
+
+
+def _forget_local_organization(org_id: int) -> None:
+    """Drop the cached entitlements of this organization's members, any of them may now be billed elsewhere."""
+    for user_id in [user_id for user_id, (_, org_ids, _) in list(_local_cache.items()) if org_id in org_ids]:
+        _local_cache.pop(user_id, None)
+
+
+def compute_organization_entitlement(db: Session, org_id: int) -> Dict[str, str]:
+    """Derive an organization's entitlement from its newest subscription."""
+    subscription = db.query(Subscription.status, Subscription.price_id, Subscription.restrict_access_on)\
+        .filter(Subscription.organization_id == org_id)\
+        .order_by(Subscription.status.in_(ACTIVE_SUBSCRIPTION_STATUSES).desc(), Subscription.id.desc())\
+        .first()
+
+    if subscription is None:
+        return {"active": "0", "plan": NO_PLAN, "status": NO_PLAN, "restrict_access_on": ""}
+
+    restricted = subscription.restrict_access_on is not None and subscription.restrict_access_on <= datetime.datetime.utcnow()
+    active = subscription.status in ACTIVE_SUBSCRIPTION_STATUSES and not restricted
+    return {
+        "active": "1" if active else "0",
+        "plan": subscription.price_id if active else NO_PLAN,
+        "status": subscription.status,
+        "restrict_access_on": subscription.restrict_access_on.isoformat() if subscription.restrict_access_on else "",
+    }
+
+
+def _ttl_seconds(entitlement: Dict[str, str]) -> int:
+    """ENTITLEMENT_TTL_SECONDS, or less when an active plan's access ends sooner."""
+    if entitlement["active"] != "1" or not entitlement["restrict_access_on"]:
+        return ENTITLEMENT_TTL_SECONDS
+    remaining = datetime.datetime.fromisoformat(entitlement["restrict_access_on"]) - datetime.datetime.utcnow()
+    return max(1, min(ENTITLEMENT_TTL_SECONDS, math.ceil(remaining.total_seconds())))
+
+
+def refresh_organization(db: Session, org_id: int) -> Dict[str, str]:
+    """Recompute an organization's entitlement and write it to Redis."""
+    entitlement = compute_organization_entitlement(db, org_id)
+    pipe = redis_client.pipeline(transaction=True)
+    pipe.delete(_org_key(org_id))
+    pipe.hset(_org_key(org_id), mapping=entitlement)
+    pipe.expire(_org_key(org_id), _ttl_seconds(entitlement))
+    pipe.execute()
+    _forget_local_organization(org_id)
+    return entitlement
+
+
+def get_organization_entitlement(db: Session, org_id: int) -> Dict[str, str]:
+    """Read an organization's entitlement from Redis, rebuilding it on a miss."""
+    entitlement = redis_client.hgetall(_org_key(org_id))
+    if entitlement:
+        return entitlement
+    return refresh_organization(db, org_id)
+
+
+def _user_organization_ids(db: Session, user_id: int) -> List[int]:
+    """Organizations of a user, team organizations before the solo one."""
+    cached = redis_client.get(_user_key(user_id))
+    if cached is not None:
+        return [int(org_id) for org_id in cached.split(",") if org_id]
+
+    rows = db.query(Organization.id)\
+        .join(OrganizationUser, OrganizationUser.organization_id == Organization.id)\
+        .filter(OrganizationUser.user_id == user_id)\
+        .order_by(Organization.is_solo, Organization.id)\
+        .all()
+    org_ids = [row.id for row in rows]
+    redis_client.set(_user_key(user_id), ",".join(str(org_id) for org_id in org_ids), ex=ENTITLEMENT_TTL_SECONDS)
+    return org_ids
+
+
+def _tier(entitlement: Dict[str, str]) -> str:
+    if entitlement["active"] != "1":
+        return TaskLimits.DEFAULT_TIER
+    return entitlement["plan"] if entitlement["plan"] in TaskLimits.TIERS else TaskLimits.PAID_TIER
+
+
+def resolve_user_entitlement(db: Session, user_id: int) -> Entitlement:
+    """
+    The organization a user's usage is billed to and its plan.
+
+    Organizations with an active plan win over ones without, and team
+    organizations win over the solo organization.
+    """
+    now = time.monotonic()
+    cached = _local_cache.get(user_id)
+    if cached is not None and cached[0] > now:
+        return cached[2]
+
+    org_ids = _user_organization_ids(db, user_id)
+    pipe = redis_client.pipeline(transaction=False)
+    for org_id in org_ids:
+        pipe.hgetall(_org_key(org_id))
+    org_entitlements = [
+        cached_entitlement or refresh_organization(db, org_id)
+        for org_id, cached_entitlement in zip(org_ids, pipe.execute())
+    ]
+
+    if not org_ids:
+        entitlement = Entitlement(user_id, None, TaskLimits.DEFAULT_TIER, NO_PLAN, False)
+    else:
+        org_id, org_entitlement = next(
+            ((org_id, e) for org_id, e in zip(org_ids, org_entitlements) if e["active"] == "1"),
+            (org_ids[0], org_entitlements[0]),
+        )
+        entitlement = Entitlement(user_id, org_id, _tier(org_entitlement), org_entitlement["plan"], org_entitlement["active"] == "1")
+
+    if len(_local_cache) >= LOCAL_CACHE_MAX_ENTRIES:
+        _local_cache.clear()
+    _local_cache[user_id] = (now + ENTITLEMENT_LOCAL_TTL_SECONDS, tuple(org_ids), entitlement)
+    return entitlement
+
+
+def clear_local_cache() -> None:
+    _local_cache.clear()
+
+
+def invalidate_organization(org_id: int) -> None:
+    """Forget an organization's plan after its subscriptions changed. Never raises."""
+    _forget_local_organization(org_id)
+    try:
+        redis_client.delete(_org_key(org_id))
+    except Exception as e:
+        logger.error(f"Failed to invalidate entitlements of organization {org_id}, they expire in {ENTITLEMENT_TTL_SECONDS}s: {e}")
+
+
+def invalidate_user(user_id: int) -> None:
+    """Forget a user's organizations after their memberships changed. Never raises."""
+    _local_cache.pop(user_id, None)
+    try:
+        redis_client.delete(_user_key(user_id))
+    except Exception as e:
+        logger.error(f"Failed to invalidate entitlements of user {user_id}, they expire in {ENTITLEMENT_TTL_SECONDS}s: {e}")
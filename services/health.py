@@ -0,0 +1,129 @@
+"""
+Liveness and readiness of an API worker process.
+
+A worker is ready between the end of its startup and the start of its
+shutdown, while its dependencies answer:
+
+    database  SELECT 1 on a connection from the process's pool (utils/database.py)
+    redis     PING on the shared client's pool (utils/redis_client.py)
+    broker    PING on the Celery broker's Redis
+    storage   the Cloud Storage service account key loads, skipped without one
+
+The checks run concurrently in threads, each with READINESS_CHECK_TIMEOUT_SECONDS,
+and the result is reused for READINESS_CACHE_SECONDS so frequent probes from
+several load balancers cost one round of checks. During a graceful shutdown
+/readyz fails first, so load balancers stop routing new requests while the
+in-flight ones finish.
+
+/readyz is unauthenticated, so a failed check only reports the exception's
+class; its message, which can name hosts, ports and database users, is logged.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+READINESS_CHECK_TIMEOUT_SECONDS = float(os.getenv("READINESS_CHECK_TIMEOUT_SECONDS", 1.0))
+READINESS_CACHE_SECONDS = float(os.getenv("READINESS_CACHE_SECONDS", 2.0))
+
+OK = "ok"
+SKIPPED = "skipped"
+ERROR = "error"
+TIMEOUT = "timeout"
+
+_ready = False
+
+# (monotonic time checked, results) of the last round of checks
+_cached: Optional[Tuple[float, Dict[str, Dict]]] = None
+
+
+class Skipped(Exception):
+    """Raised by a check whose dependency is not configured in this deployment."""
+
+
+def mark_ready() -> None:
+    global _ready
+    _ready = True
+
+
+def mark_draining() -> None:
+    global _ready
+    _ready = False
+
+
+def is_ready() -> bool:
+    return _ready
+
+
+def check_database() -> None:
+    from sqlalchemy import text
+    from utils.database import get_engine
+    with get_engine().connect() as connection:
+        connection.execute(text("SELECT 1"))
+
+
+def check_redis() -> None:
+    from utils.redis_client import redis_client
+    redis_client.ping()
+
+
+def check_broker() -> None:
+    from celery_app.fair_queue import broker_redis
+    broker_redis.ping()
+
+
+def check_storage() -> None:
+    service_account_key = os.getenv("GCP_SERVICE_ACCOUNT_KEY")
+    if not service_account_key:
+        raise Skipped()
+    from google.oauth2 import service_account
+    service_account.Credentials.from_service_account_file(service_account_key)
+
+
+CHECKS: Dict[str, Callable[[], None]] = {
+    "database": check_database,
+    "redis": check_redis,
+    "broker": check_broker,
+    "storage": check_storage,
+}
+
+
+async def _run_check(name: str, check: Callable[[], None]) -> Dict:
+    start = time.perf_counter()
+    try:
+        await asyncio.wait_for(asyncio.get_running_loop().run_in_executor(None, check), READINESS_CHECK_TIMEOUT_SECONDS)
+        result = {"status": OK}
+    except Skipped:
+        result = {"status": SKIPPED}
+    except asyncio.TimeoutError:
+        result = {"status": TIMEOUT}
+    except Exception as e:
+        logger.error(f"Readiness check {name} failed: {type(e).__name__}: {e}")
+        result = {"status": ERROR, "error": type(e).__name__}
+    result["latency_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    return result
+
+
+async def check_dependencies() -> Dict[str, Dict]:
+    """Status and latency of every dependency, cached for READINESS_CACHE_SECONDS."""
+    global _cached
+    if _cached is not None and time.monotonic() - _cached[0] < READINESS_CACHE_SECONDS:
+        return _cached[1]
+    names = list(CHECKS)
+    results = await asyncio.gather(*(_run_check(name, CHECKS[name]) for name in names))
+    checks = dict(zip(names, results))
+    _cached = (time.monotonic(), checks)
+    return checks
+
+
+def clear_cache() -> None:
+    global _cached
+    _cached = None
+
+
+def dependencies_ready(checks: Dict[str, Dict]) -> bool:
+    return all(result["status"] in (OK, SKIPPED) for result in checks.values())
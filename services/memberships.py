@@ -0,0 +1,113 @@
+"""
+Membership cache: the role a user holds in each of their organizations.
+
+All of a user's (organization_id, role) pairs are loaded in one query and
+cached twice:
+
+- on the request's database session (``db.info``), so the permission
+  dependencies and the controller of one request share a single lookup
+- in Redis under ``memberships:user:{user_id}`` as JSON, so later requests in
+  any process skip the query
+
+invalidate_user() bumps the counter ``memberships:generation:{user_id}`` as it
+drops the Redis entry. A load reads the counter before querying and only
+stores its rows if the counter is unchanged, so a load that read the roles
+before a change committed cannot cache them after the change was invalidated.
+
+Call invalidate_user() after committing a change to a user's memberships (role
+change, removal, joining or creating an organization). It also drops the
+user's entitlement (services/entitlements.py), which depends on the same rows.
+"""
+
+import json
+import logging
+from typing import Dict, Optional
+from sqlalchemy.orm import Session
+from models.organization import OrganizationUser
+from services import entitlements
+from types_definitions.organization_user import OrganizationUserRole
+from utils.redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+# Bounds how long a missed invalidation can leave a stale role in place
+MEMBERSHIP_TTL_SECONDS = 300
+# Outlives any load in flight, a generation that expired reads as 0 again
+GENERATION_TTL_SECONDS = 24 * 3600
+
+_SESSION_KEY = "memberships"
+
+
+def _user_key(user_id: int) -> str:
+    return f"memberships:user:{user_id}"
+
+
+def _generation_key(user_id: int) -> str:
+    return f"memberships:generation:{user_id}"
+
+
+# Store the roles only if no invalidation happened since the load read the generation
+_SET_IF_GENERATION_SCRIPT = """
+if (redis.call('GET', KEYS[1]) or '0') ~= ARGV[1] then
+    return 0
+end
+redis.call('SET', KEYS[2], ARGV[2], 'EX', tonumber(ARGV[3]))
+return 1
+"""
+
+_set_if_generation = redis_client.register_script(_SET_IF_GENERATION_SCRIPT)
+
+
+def _load_roles(db: Session, user_id: int) -> Dict[int, OrganizationUserRole]:
+    generation = None
+    try:
+        cached, generation = redis_client.mget([_user_key(user_id), _generation_key(user_id)])
+        if cached is not None:
+            return {int(org_id): OrganizationUserRole(role) for org_id, role in json.loads(cached).items()}
+        generation = generation or "0"
+    except Exception as e:
+        logger.warning(f"Membership cache unavailable, reading user {user_id} from the database: {e}")
+
+    rows = db.query(OrganizationUser.organization_id, OrganizationUser.role)\
+        .filter(OrganizationUser.user_id == user_id)\
+        .all()
+    roles = {row.organization_id: OrganizationUserRole(row.role) for row in rows}
+
+    if generation is None:
+        return roles
+    try:
+        _set_if_generation(
+            keys=[_generation_key(user_id), _user_key(user_id)],
+            args=[generation, json.dumps({org_id: role.value for org_id, role in roles.items()}), MEMBERSHIP_TTL_SECONDS],
+        )
+    except Exception as e:
+        logger.warning(f"Failed to cache memberships of user {user_id}: {e}")
+    return roles
+
+
+def get_user_roles(db: Session, user_id: int) -> Dict[int, OrganizationUserRole]:
+    """Role by organization id for every organization the user belongs to."""
+    request_cache = db.info.setdefault(_SESSION_KEY, {})
+    if user_id not in request_cache:
+        request_cache[user_id] = _load_roles(db, user_id)
+    return request_cache[user_id]
+
+
+def get_role(db: Session, user_id: int, org_id: int) -> Optional[OrganizationUserRole]:
+    """The user's role in an organization, None when they are not a member."""
+    return get_user_roles(db, user_id).get(org_id)
+
+
+def invalidate_user(user_id: int, db: Optional[Session] = None) -> None:
+    """Forget a user's memberships after they changed. Never raises."""
+    if db is not None:
+        db.info.get(_SESSION_KEY, {}).pop(user_id, None)
+    try:
+        pipe = redis_client.pipeline(transaction=True)
+        pipe.incr(_generation_key(user_id))
+        pipe.expire(_generation_key(user_id), GENERATION_TTL_SECONDS)
+        pipe.delete(_user_key(user_id))
+        pipe.execute()
+    except Exception as e:
+        logger.error(f"Failed to invalidate memberships of user {user_id}, they expire in {MEMBERSHIP_TTL_SECONDS}s: {e}")
+    entitlements.invalidate_user(user_id)
@@ -0,0 +1,198 @@
+"""
+Applies Stripe webhook events to subscriptions.
+
+The webhook endpoint only verifies the signature and calls record_event(), so
+Stripe gets its acknowledgement in milliseconds. The apply_stripe_events Celery
+task then runs apply_customer_events() for the event's customer:
+
+- Events of one customer are applied in the order Stripe created them, under a
+  Postgres advisory lock so two workers never interleave them.
+- Each event runs in a savepoint and is marked processed_at when applied. The
+  first event that fails keeps its error and stops the run, so later events
+  are never applied before it; the sweep task retries the customer later.
+- An event that fails MAX_EVENT_ATTEMPTS runs, or whose payload is malformed,
+  is dead-lettered: dead_lettered_at is set, STRIPE_EVENTS_DEAD_LETTERED is
+  incremented for alerting, and the customer's later events apply without it.
+  To replay one, clear its dead_lettered_at and attempts and request_apply().
+- A subscription event older than the last one applied to the row is skipped,
+  Stripe does not guarantee delivery order.
+
+After the commit the entitlement cache (services/entitlements.py) of every
+organization whose subscriptions changed is refreshed.
+"""
+
+import datetime
+import logging
+import os
+from typing import List, Optional, Set
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from models.organization import Organization, Subscription
+from models.stripe_event import StripeEvent
+from services import entitlements
+from utils.metrics import STRIPE_EVENTS_DEAD_LETTERED
+
+logger = logging.getLogger(__name__)
+
+APPLY_TASK_NAME = 'celery_app.tasks.apply_stripe_events_task'
+
+SUBSCRIPTION_EVENT_PREFIX = 'customer.subscription.'
+
+# Failed runs before an event is dead-lettered, the sweep runs about once a minute
+MAX_EVENT_ATTEMPTS = int(os.getenv("STRIPE_EVENT_MAX_ATTEMPTS", 10))
+# Payloads missing what we read fail the same way on every run
+NON_RETRYABLE_ERRORS = (KeyError, IndexError, TypeError)
+
+
+def event_customer_id(event: dict) -> Optional[str]:
+    data_object = event.get("data", {}).get("object", {})
+    if data_object.get("object") == "customer":
+        return data_object.get("id")
+    customer = data_object.get("customer")
+    # Expanded objects carry the customer as a dict
+    if isinstance(customer, dict):
+        return customer.get("id")
+    return customer
+
+
+def record_event(db: Session, event: dict) -> bool:
+    """
+    Store a verified event, once per Stripe event id. Does not commit.
+
+    Returns:
+        bool: True when the event is new, False for a redelivery
+    """
+    customer_id = event_customer_id(event)
+    stmt = insert(StripeEvent).values(
+        stripe_event_id=event["id"],
+        type=event["type"],
+        customer_id=customer_id,
+        stripe_created=event["created"],
+        payload=event,
+        # Nothing to apply for events that belong to no customer
+        processed_at=None if customer_id else func.now(),
+    ).on_conflict_do_nothing(index_elements=[StripeEvent.stripe_event_id]).returning(StripeEvent.id)
+    return db.execute(stmt).scalar() is not None
+
+
+def request_apply(customer_id: str) -> None:
+    """Queue the apply task for a customer. Never raises: the sweep picks up lost requests."""
+    try:
+        from celery_app.celery_app import celery_app
+        celery_app.send_task(APPLY_TASK_NAME, args=[customer_id])
+    except Exception as e:
+        logger.error(f"Failed to queue Stripe events of customer {customer_id}, the sweep will retry: {e}")
+
+
+def _acquire_customer_lock(db: Session, customer_id: str) -> bool:
+    # Released when the transaction ends
+    return db.query(func.pg_try_advisory_xact_lock(func.hashtext(f"stripe_events:{customer_id}"))).scalar()
+
+
+def _timestamp(value: Optional[int]) -> Optional[datetime.datetime]:
+    return datetime.datetime.utcfromtimestamp(value) if value else None
+
+
+def _restrict_access_on(data_object: dict) -> Optional[datetime.datetime]:
+    """When access ends for a subscription, None while it renews."""
+    if data_object.get("status") in ("canceled", "incomplete_expired"):
+        return _timestamp(data_object.get("ended_at") or data_object.get("canceled_at")) or datetime.datetime.utcnow()
+    if data_object.get("cancel_at_period_end"):
+        return _timestamp(data_object.get("current_period_end"))
+    return _timestamp(data_object.get("cancel_at"))
+
+
+def _organization_id(db: Session, data_object: dict, customer_id: str) -> Optional[int]:
+    organization_id = (data_object.get("metadata") or {}).get("organization_id")
+    if organization_id:
+        return int(organization_id)
+    return db.query(Organization.id).filter(Organization.stripe_customer_id == customer_id).scalar()
+
+
+def _apply_subscription_event(db: Session, event: StripeEvent) -> Optional[int]:
+    """Upsert the Subscription row of a customer.subscription.* event. Returns the organization changed."""
+    data_object = event.payload["data"]["object"]
+    subscription = db.query(Subscription).filter(Subscription.stripe_subscription_id == data_object["id"]).first()
+
+    if subscription is not None and subscription.stripe_event_created and subscription.stripe_event_created > event.stripe_created:
+        logger.info(f"Skipping Stripe event {event.stripe_event_id}, subscription {data_object['id']} has newer state")
+        return None
+
+    if subscription is None:
+        organization_id = _organization_id(db, data_object, event.customer_id)
+        if organization_id is None:
+            raise ValueError(f"No organization for Stripe customer {event.customer_id}")
+        subscription = Subscription(organization_id=organization_id, stripe_subscription_id=data_object["id"])
+        db.add(subscription)
+
+    subscription.status = data_object["status"]
+    subscription.price_id = data_object["items"]["data"][0]["price"]["id"]
+    subscription.restrict_access_on = _restrict_access_on(data_object)
+    subscription.stripe_event_created = event.stripe_created
+    db.flush()
+    return subscription.organization_id
+
+
+def apply_customer_events(db: Session, customer_id: str) -> Optional[int]:
+    """
+    Apply the unprocessed events of a customer, oldest first.
+
+    Returns:
+        The number of events applied, or None when another worker holds the customer's lock
+    """
+    if not _acquire_customer_lock(db, customer_id):
+        db.rollback()
+        return None
+
+    events = db.query(StripeEvent)\
+        .filter(StripeEvent.customer_id == customer_id, StripeEvent.processed_at.is_(None), StripeEvent.dead_lettered_at.is_(None))\
+        .order_by(StripeEvent.stripe_created, StripeEvent.id)\
+        .all()
+
+    applied = 0
+    changed_organizations: Set[int] = set()
+    for event in events:
+        try:
+            with db.begin_nested():
+                if event.type.startswith(SUBSCRIPTION_EVENT_PREFIX):
+                    organization_id = _apply_subscription_event(db, event)
+                    if organization_id is not None:
+                        changed_organizations.add(organization_id)
+                event.processed_at = datetime.datetime.utcnow()
+                event.error = None
+        except Exception as e:
+            event.error = str(e)
+            event.attempts += 1
+            if isinstance(e, NON_RETRYABLE_ERRORS) or event.attempts >= MAX_EVENT_ATTEMPTS:
+                event.dead_lettered_at = datetime.datetime.utcnow()
+                STRIPE_EVENTS_DEAD_LETTERED.labels(event_type=event.type).inc()
+                logger.critical(
+                    f"Dead-lettered Stripe event {event.stripe_event_id} of customer {customer_id} "
+                    f"after {event.attempts} attempts, applying the events after it: {e}"
+                )
+                continue
+            logger.error(f"Failed to apply Stripe event {event.stripe_event_id} of customer {customer_id}: {e}")
+            break
+        applied += 1
+
+    db.commit()
+
+    for organization_id in changed_organizations:
+        try:
+            entitlements.refresh_organization(db, organization_id)
+        except Exception as e:
+            # The cache entry expires and is rebuilt from the database
+            logger.error(f"Failed to refresh entitlements of organization {organization_id}: {e}")
+    return applied
+
+
+def customers_with_unprocessed_events(db: Session, older_than_seconds: int, limit: int = 100) -> List[str]:
+    """Customers with events waiting longer than older_than_seconds, their request was lost or failed."""
+    cutoff = datetime.datetime.utcnow() - datetime.timedelta(seconds=older_than_seconds)
+    rows = db.query(StripeEvent.customer_id)\
+        .filter(StripeEvent.processed_at.is_(None), StripeEvent.dead_lettered_at.is_(None), StripeEvent.customer_id.isnot(None), StripeEvent.received_at < cutoff)\
+        .distinct()\
+        .limit(limit)\
+        .all()
+    return [row.customer_id for row in rows]
@@ -0,0 +1,183 @@
+"""
+Saga that gives a new organization its Stripe customer after the request
+that created it has committed.
+
+Signup and invitation accept create solo organizations with
+stripe_customer_status 'pending' and no stripe_customer_id, then call
+request_customer(). The provision_stripe_customer Celery task runs
+provision_customer(), retrying on network and rate limit errors, and a beat
+task re-requests organizations left pending because the enqueue was lost.
+
+A queued request holds the Redis lease ``stripe_provisioning:lease:{id}``
+until its retries end, so the sweep only re-requests organizations without a
+request in flight instead of starting another retry chain every minute while
+Stripe is down.
+
+Steps and compensations:
+1. Create the Stripe customer with idempotency key "organization-{id}-customer",
+   so retries and duplicate runs get back the same customer.
+2. Backfill stripe_customer_id and mark the organization 'provisioned', only if
+   it is still pending.
+   If the organization was deleted in the meantime, or holds another customer,
+   the customer from step 1 is deleted so it is not left orphaned in Stripe.
+If step 1 fails for good the organization is marked 'failed' and the error logged.
+"""
+
+import datetime
+import logging
+import os
+from typing import List, Optional
+import stripe
+from sqlalchemy.orm import Session
+from models.organization import Organization
+from models.user import User
+from utils.redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+PENDING = 'pending'
+PROVISIONED = 'provisioned'
+FAILED = 'failed'
+
+PROVISION_TASK_NAME = 'celery_app.tasks.provision_stripe_customer_task'
+
+# Outlasts a full retry chain of the task (5s doubling to 600s over 8 retries is
+# about 21 minutes); a lease left by a lost request expires after it
+REQUEST_LEASE_SECONDS = 30 * 60
+
+# Worth retrying, every other StripeError will fail the same way again
+RETRYABLE_ERRORS = (
+    stripe.error.APIConnectionError,
+    stripe.error.RateLimitError,
+    stripe.error.APIError,
+)
+
+
+def _configure_stripe() -> None:
+    stripe.api_key = os.getenv("STRIPE_SECRET_KEY")
+    # Point at a local stripe-mock server in development and tests
+    if os.getenv("STRIPE_API_BASE"):
+        stripe.api_base = os.getenv("STRIPE_API_BASE")
+
+
+def idempotency_key(organization_id: int) -> str:
+    return f"organization-{organization_id}-customer"
+
+
+def _lease_key(organization_id: int) -> str:
+    return f"stripe_provisioning:lease:{organization_id}"
+
+
+def claim_request(organization_id: int) -> bool:
+    """Take the lease of an organization's request, False when one is already in flight."""
+    return bool(redis_client.set(_lease_key(organization_id), 1, nx=True, ex=REQUEST_LEASE_SECONDS))
+
+
+def extend_request(organization_id: int) -> None:
+    """Keep the lease while the request waits for a retry."""
+    try:
+        redis_client.set(_lease_key(organization_id), 1, ex=REQUEST_LEASE_SECONDS)
+    except Exception as e:
+        logger.error(f"Failed to extend the Stripe provisioning lease of organization {organization_id}: {e}")
+
+
+def release_request(organization_id: int) -> None:
+    """Drop the lease once the request is done, provisioned, failed or with nothing to do."""
+    try:
+        redis_client.delete(_lease_key(organization_id))
+    except Exception as e:
+        logger.error(f"Failed to release the Stripe provisioning lease of organization {organization_id}: {e}")
+
+
+def request_customer(organization_id: int) -> None:
+    """
+    Queue the saga for an organization. Call it after the commit that created
+    the organization. Never raises: a lost request is picked up by the sweep.
+    """
+    try:
+        redis_client.set(_lease_key(organization_id), 1, ex=REQUEST_LEASE_SECONDS)
+    except Exception as e:
+        logger.error(f"Failed to take the Stripe provisioning lease of organization {organization_id}: {e}")
+    try:
+        from celery_app.celery_app import celery_app
+        celery_app.send_task(PROVISION_TASK_NAME, args=[organization_id])
+    except Exception as e:
+        release_request(organization_id)
+        logger.error(f"Failed to queue Stripe customer for organization {organization_id}, the sweep will retry: {e}")
+
+
+def provision_customer(db: Session, organization_id: int) -> Optional[str]:
+    """
+    Run the saga for one organization.
+
+    Returns:
+        The Stripe customer ID, or None when there was nothing to do
+
+    Raises:
+        stripe.error.StripeError: when the customer could not be created
+    """
+    organization = db.query(Organization).filter(Organization.id == organization_id).first()
+    if organization is None or organization.stripe_customer_status != PENDING:
+        return None
+
+    owner_email, owner_role = db.query(User.email, User.role).filter(User.id == organization.org_owner).one()
+    org_type = "solo" if organization.is_solo else "team"
+    # End the transaction before the network call so no connection sits idle in it while Stripe answers
+    db.rollback()
+
+    _configure_stripe()
+    customer = stripe.Customer.create(
+        email=owner_email,
+        name=f"{owner_email} - {org_type.upper()}",
+        metadata={"organization_id": organization_id, "role": owner_role.value, "org_type": org_type},
+        idempotency_key=idempotency_key(organization_id),
+    )
+
+    try:
+        updated = db.query(Organization)\
+            .filter(Organization.id == organization_id, Organization.stripe_customer_status == PENDING)\
+            .update({"stripe_customer_id": customer.id, "stripe_customer_status": PROVISIONED}, synchronize_session=False)
+        db.commit()
+    except Exception:
+        db.rollback()
+        updated = 0
+
+    if updated:
+        logger.info(f"Provisioned Stripe customer {customer.id} for organization {organization_id}")
+        return customer.id
+
+    # Another run may have backfilled the same customer, that is not a conflict
+    current_customer_id = db.query(Organization.stripe_customer_id).filter(Organization.id == organization_id).scalar()
+    if current_customer_id == customer.id:
+        return customer.id
+
+    _compensate(customer.id, organization_id)
+    return None
+
+
+def _compensate(customer_id: str, organization_id: int) -> None:
+    """Delete a customer whose organization could not take it."""
+    try:
+        stripe.Customer.delete(customer_id)
+        logger.warning(f"Deleted Stripe customer {customer_id}, organization {organization_id} could not be backfilled")
+    except stripe.error.StripeError as e:
+        logger.error(f"Failed to delete orphaned Stripe customer {customer_id} for organization {organization_id}: {e}")
+
+
+def mark_failed(db: Session, organization_id: int, error: str) -> None:
+    db.query(Organization)\
+        .filter(Organization.id == organization_id, Organization.stripe_customer_status == PENDING)\
+        .update({"stripe_customer_status": FAILED}, synchronize_session=False)
+    db.commit()
+    logger.error(f"Giving up on Stripe customer for organization {organization_id}: {error}")
+
+
+def stale_pending_organization_ids(db: Session, older_than_seconds: int, limit: int = 100) -> List[int]:
+    """Organizations still pending after older_than_seconds, their request was likely lost."""
+    cutoff = datetime.datetime.utcnow() - datetime.timedelta(seconds=older_than_seconds)
+    rows = db.query(Organization.id)\
+        .filter(Organization.stripe_customer_status == PENDING, Organization.created_at < cutoff)\
+        .order_by(Organization.id)\
+        .limit(limit)\
+        .all()
+    return [row.id for row in rows]
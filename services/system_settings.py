@@ -0,0 +1,190 @@
+"""
+System settings cache: the settings every frontend page load reads.
+
+Settings changed at runtime are rows of the system_settings table, the others
+keep their default from config/system_settings.py. Every API process keeps
+the merged settings in memory together with the version they were loaded at,
+so GET /system-settings/ is a dict read.
+
+The version is the Redis counter ``system_settings:version``. update_settings()
+commits the rows, increments it and publishes the new version on the
+``system_settings:changed`` channel. Each API process runs a listener thread
+(start_listener(), from main.py's lifespan) that records published versions,
+and the next read reloads from the database. Processes without a live
+listener, the Celery workers or an API process whose Redis connection
+dropped, compare their version with the counter at most every
+SYSTEM_SETTINGS_LOCAL_TTL_SECONDS instead.
+
+After editing the table by hand call publish_change() so the processes reload.
+
+The ETag of the settings is a hash of their content, so it stays valid across
+Redis restarts and is the same in every process.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+from sqlalchemy.orm import Session
+from config.system_settings import SystemSettings
+from models.system_setting import SystemSetting
+from utils.redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = "system_settings:version"
+CHANNEL = "system_settings:changed"
+
+# How long a process without a live listener trusts its copy without asking Redis
+SYSTEM_SETTINGS_LOCAL_TTL_SECONDS = float(os.getenv("SYSTEM_SETTINGS_LOCAL_TTL_SECONDS", 5))
+# How long browsers and CDNs may reuse GET /system-settings/ without revalidating
+SYSTEM_SETTINGS_MAX_AGE_SECONDS = int(os.getenv("SYSTEM_SETTINGS_MAX_AGE_SECONDS", 60))
+
+# Setting -> attribute of SystemSettings holding its default
+DEFAULTS = {
+    "auto_create_free_subscription": "AUTO_CREATE_FREE_SUBSCRIPTION",
+    "branding_logo_light_mode": "BRANIDING_LOGO_LIGHT_MODE",
+    "branding_logo_dark_mode": "BRANDING_LOGO_DARK_MODE",
+}
+
+
+class CachedSettings:
+    __slots__ = ("version", "settings", "etag", "checked_at")
+
+    def __init__(self, version: int, settings: Dict[str, Any], checked_at: float):
+        self.version = version
+        self.settings = settings
+        self.etag = '"' + hashlib.blake2b(json.dumps(settings, sort_keys=True).encode(), digest_size=16).hexdigest() + '"'
+        self.checked_at = checked_at
+
+
+_cached: Optional[CachedSettings] = None
+# Newest version published on CHANNEL, None until the listener is subscribed
+_published_version: Optional[int] = None
+_listener: Optional[threading.Thread] = None
+_listener_stop = threading.Event()
+_listener_lock = threading.Lock()
+
+
+def current_version() -> int:
+    return int(redis_client.get(VERSION_KEY) or 0)
+
+
+def load_settings(db: Session) -> Dict[str, Any]:
+    """Defaults overridden by the rows of the system_settings table."""
+    settings = {name: getattr(SystemSettings, attribute) for name, attribute in DEFAULTS.items()}
+    for row in db.query(SystemSetting.key, SystemSetting.value).filter(SystemSetting.key.in_(DEFAULTS)):
+        settings[row.key] = row.value
+    return settings
+
+
+def _version_if_stale(cached: Optional[CachedSettings], now: float) -> Optional[int]:
+    """The version to load when the cached settings are out of date, None when they are current."""
+    if cached is None:
+        return current_version()
+    if _published_version is not None:
+        return _published_version if _published_version != cached.version else None
+    if now - cached.checked_at < SYSTEM_SETTINGS_LOCAL_TTL_SECONDS:
+        return None
+    version = current_version()
+    if version == cached.version:
+        cached.checked_at = now
+        return None
+    return version
+
+
+def get_settings(db: Session) -> CachedSettings:
+    """The current settings, from this process's cache unless they changed."""
+    global _cached
+    cached = _cached
+    now = time.monotonic()
+    try:
+        version = _version_if_stale(cached, now)
+    except Exception as e:
+        # Serve what this process has while Redis is unreachable
+        if cached is not None:
+            logger.error(f"Failed to read the system settings version: {e}")
+            return cached
+        version = -1
+    if version is None:
+        return cached
+
+    # Loaded after reading the version, a change committed in between is loaded
+    # now and loaded again on the next read
+    _cached = CachedSettings(version, load_settings(db), now)
+    return _cached
+
+
+def publish_change() -> int:
+    """Move every process to a new version of the settings. Returns it."""
+    version = redis_client.incr(VERSION_KEY)
+    redis_client.publish(CHANNEL, version)
+    clear_local_cache()
+    return version
+
+
+def update_settings(db: Session, changes: Dict[str, Any]) -> CachedSettings:
+    """Store changed settings, then tell every process to reload them."""
+    global _cached
+    for key, value in changes.items():
+        if key not in DEFAULTS:
+            raise ValueError(f"Unknown system setting {key}")
+        row = db.query(SystemSetting).filter(SystemSetting.key == key).first()
+        if row is None:
+            db.add(SystemSetting(key=key, value=value))
+        else:
+            row.value = value
+    db.commit()
+    version = publish_change()
+    _cached = CachedSettings(version, load_settings(db), time.monotonic())
+    return _cached
+
+
+def clear_local_cache() -> None:
+    global _cached
+    _cached = None
+
+
+def _listen(stop: threading.Event) -> None:
+    global _published_version
+    backoff = 1.0
+    while not stop.is_set():
+        pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+        try:
+            pubsub.subscribe(CHANNEL)
+            # Changes published while unsubscribed are only visible in the counter
+            _published_version = current_version()
+            backoff = 1.0
+            while not stop.is_set():
+                message = pubsub.get_message(timeout=1.0)
+                if message is not None and message["type"] == "message":
+                    _published_version = int(message["data"])
+        except Exception as e:
+            logger.error(f"System settings listener lost Redis, retrying in {backoff:g}s: {e}")
+            # Fall back to checking the counter every SYSTEM_SETTINGS_LOCAL_TTL_SECONDS
+            _published_version = None
+            stop.wait(backoff)
+            backoff = min(backoff * 2, 30.0)
+        finally:
+            try:
+                pubsub.close()
+            except Exception:
+                pass
+    _published_version = None
+
+
+def start_listener() -> None:
+    """Follow published changes in a daemon thread, once per process."""
+    global _listener
+    with _listener_lock:
+        if _listener is None or not _listener.is_alive():
+            _listener_stop.clear()
+            _listener = threading.Thread(target=_listen, args=(_listener_stop,), name="system-settings-listener", daemon=True)
+            _listener.start()
+
+
+def stop_listener() -> None:
+    _listener_stop.set()
@@ -0,0 +1,171 @@
+"""
+Redis-backed limits for tools tasks.
+
+Two kinds of limits are checked before a task is enqueued:
+
+- Token buckets (``limits:bucket:{scope}:{id}``) cap how fast tasks can be
+  started. They are stored as a hash of the current token level and the time
+  it was last refilled.
+- Concurrent slots (``limits:slots:{scope}:{id}``) cap how many tasks can be in
+  flight. They are sorted sets of task ids scored by the time their lease runs
+  out, so a slot held by a crashed worker frees itself.
+
+Both are checked and taken in one Lua script, so a task either gets every
+token and slot it needs or none of them. The slot keys a task holds are kept
+in ``limits:task:{task_id}`` and released by the Celery signals in
+celery_app/signals.py once the task finishes.
+"""
+
+import time
+from typing import List, Optional
+from config.task_limits import TaskLimits
+from services.entitlements import Entitlement
+from utils.metrics import TASK_LIMIT_DECISIONS, TASK_SLOTS_RELEASED
+from utils.redis_client import redis_client
+
+_ACQUIRE_SCRIPT = """
+local now = tonumber(ARGV[1])
+local n_buckets = tonumber(ARGV[2])
+local n_slots = tonumber(ARGV[3])
+local task_id = ARGV[4]
+local lease_until = tonumber(ARGV[5])
+local argi = 6
+local levels = {}
+local bucket_ttls = {}
+
+for i = 1, n_buckets do
+    local capacity = tonumber(ARGV[argi])
+    local rate = tonumber(ARGV[argi + 1])
+    argi = argi + 2
+    local state = redis.call('HMGET', KEYS[i], 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or capacity
+    local ts = tonumber(state[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+    if tokens < 1 then
+        return {0, i, tostring((1 - tokens) / rate)}
+    end
+    levels[i] = tokens
+    bucket_ttls[i] = math.ceil(capacity / rate) + 60
+end
+
+local slot_maxes = {}
+for j = 1, n_slots do
+    local key = KEYS[n_buckets + j]
+    slot_maxes[j] = tonumber(ARGV[argi])
+    argi = argi + 1
+    redis.call('ZREMRANGEBYSCORE', key, '-inf', now)
+    if redis.call('ZCARD', key) >= slot_maxes[j] then
+        return {0, n_buckets + j, '0'}
+    end
+end
+
+for i = 1, n_buckets do
+    redis.call('HSET', KEYS[i], 'tokens', tostring(levels[i] - 1), 'ts', tostring(now))
+    redis.call('EXPIRE', KEYS[i], bucket_ttls[i])
+end
+
+local record = KEYS[n_buckets + n_slots + 1]
+local slot_ttl = math.ceil(lease_until - now) + 60
+for j = 1, n_slots do
+    local key = KEYS[n_buckets + j]
+    redis.call('ZADD', key, lease_until, task_id)
+    redis.call('EXPIRE', key, slot_ttl)
+    redis.call('SADD', record, key)
+end
+if n_slots > 0 then
+    redis.call('EXPIRE', record, slot_ttl)
+end
+return {1, 0, '0'}
+"""
+
+_RELEASE_SCRIPT = """
+local keys = redis.call('SMEMBERS', KEYS[1])
+for _, key in ipairs(keys) do
+    redis.call('ZREM', key, ARGV[1])
+end
+redis.call('DEL', KEYS[1])
+return #keys
+"""
+
+_acquire = redis_client.register_script(_ACQUIRE_SCRIPT)
+_release = redis_client.register_script(_RELEASE_SCRIPT)
+
+
+class LimitDecision:
+    """Outcome of a limit check. scope is the limit that refused the task."""
+
+    def __init__(self, allowed: bool, org_id: Optional[int], tier: str, scope: Optional[str] = None, reason: Optional[str] = None, retry_after: Optional[float] = None):
+        self.allowed = allowed
+        self.org_id = org_id
+        self.tier = tier
+        self.scope = scope
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+def _task_record_key(task_id: str) -> str:
+    return f"limits:task:{task_id}"
+
+
+def acquire(entitlement: Entitlement, task_id: str, spec) -> LimitDecision:
+    """
+    Check every limit for a task start and take a token and a slot from each.
+
+    Args:
+        entitlement: The starting user's entitlement, its organization and tier
+            pick the limits. org_id is None for users without any organization
+        task_id: The Celery task ID the task will be queued with
+        spec: The task's TaskSpec from celery_app.registry
+
+    Returns:
+        LimitDecision: allowed is False when any limit refused the task
+    """
+    user_id, org_id, tier = entitlement.user_id, entitlement.org_id, entitlement.tier
+
+    if not TaskLimits.ENABLED:
+        return LimitDecision(True, org_id, tier)
+
+    limits = TaskLimits.TIERS[tier]
+    now = time.time()
+    lease_seconds = spec.time_limit + TaskLimits.SLOT_LEASE_MARGIN_SECONDS if spec.time_limit else TaskLimits.DEFAULT_SLOT_LEASE_SECONDS
+
+    # (scope, key, capacity, per second rate)
+    buckets: List[tuple] = [("user", f"limits:bucket:user:{user_id}", limits["user_burst"], limits["user_rate"] / 60.0)]
+    # (scope, key, max concurrent)
+    slots: List[tuple] = [("user", f"limits:slots:user:{user_id}", limits["user_concurrent"])]
+    if org_id is not None:
+        buckets.append(("org", f"limits:bucket:org:{org_id}", limits["org_burst"], limits["org_rate"] / 60.0))
+        slots.append(("org", f"limits:slots:org:{org_id}", limits["org_concurrent"]))
+    if spec.max_concurrency_per_user:
+        slots.append(("user_task", f"limits:slots:user:{user_id}:task:{spec.name}", spec.max_concurrency_per_user))
+
+    keys = [key for _, key, _, _ in buckets] + [key for _, key, _ in slots] + [_task_record_key(task_id)]
+    args = [now, len(buckets), len(slots), task_id, now + lease_seconds]
+    for _, _, capacity, rate in buckets:
+        args.extend([capacity, rate])
+    for _, _, max_concurrent in slots:
+        args.append(max_concurrent)
+
+    allowed, failed_index, retry_after = _acquire(keys=keys, args=args)
+
+    if allowed:
+        TASK_LIMIT_DECISIONS.labels(task_name=spec.name, tier=tier, outcome="allowed", scope="all").inc()
+        return LimitDecision(True, org_id, tier)
+
+    # failed_index is 1-based over buckets followed by slots
+    if failed_index <= len(buckets):
+        scope = buckets[failed_index - 1][0]
+        decision = LimitDecision(False, org_id, tier, scope=scope, reason="rate_limited", retry_after=float(retry_after))
+    else:
+        scope = slots[failed_index - len(buckets) - 1][0]
+        decision = LimitDecision(False, org_id, tier, scope=scope, reason="concurrency_limited")
+
+    TASK_LIMIT_DECISIONS.labels(task_name=spec.name, tier=tier, outcome=decision.reason, scope=scope).inc()
+    return decision
+
+
+def release(task_id: str, task_name: str = "unknown") -> None:
+    """Hand back every concurrent slot a task holds. Safe to call more than once."""
+    released = _release(keys=[_task_record_key(task_id)], args=[task_id])
+    if released:
+        TASK_SLOTS_RELEASED.labels(task_name=task_name).inc()
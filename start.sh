@@ -30,5 +30,16 @@ done
 # Run migrations
 alembic upgrade head
 
+# Prometheus multiprocess mode needs an empty directory shared by all workers
+if [ -n "${PROMETHEUS_MULTIPROC_DIR}" ]; then
+  rm -rf "${PROMETHEUS_MULTIPROC_DIR}"
+  mkdir -p "${PROMETHEUS_MULTIPROC_DIR}"
+fi
+
 # Start the FastAPI application
-exec uvicorn main:app --host 0.0.0.0 --port 8000 --workers 2 --timeout-keep-alive 4000 --reload 
\ No newline at end of file
+if [ "${IS_PROD}" = "True" ]; then
+  # gunicorn with preloaded uvicorn workers, see server.py
+  exec python -m server
+else
+  exec uvicorn main:app --host 0.0.0.0 --port 8000 --timeout-keep-alive 4000 --reload
+fi 
\ No newline at end of file
@@ -0,0 +1,27 @@
+from dependencies.enums import RoleEnum
+from tests.conftest import get_user_auth_headers
+
+
+def test_profile_requires_superadmin(client, db, seed_test_organizations_and_users):
+    """Only superadmins can profile the API process."""
+    headers = get_user_auth_headers(db, seed_test_organizations_and_users['user_subscribed'])
+
+    response = client.get("/debug/profile?seconds=0.1", headers=headers)
+
+    assert response.status_code == 403
+
+
+def test_profile_returns_speedscope_file(client, create_test_auth_headers, db):
+    """A superadmin gets a speedscope sampled profile of the process."""
+    headers = create_test_auth_headers(db, email="super@admin.com", role=RoleEnum.superadmin)
+
+    response = client.get("/debug/profile?seconds=0.2&interval_ms=5", headers=headers)
+
+    assert response.status_code == 200
+    assert "attachment" in response.headers["Content-Disposition"]
+    profile = response.json()
+    assert profile["$schema"] == "https://www.speedscope.app/file-format-schema.json"
+    assert "frames" in profile["shared"]
+    for sampled in profile["profiles"]:
+        assert sampled["type"] == "sampled"
+        assert len(sampled["samples"]) == len(sampled["weights"])
@@ -0,0 +1,122 @@
+import json
+import pytest
+from services.email_service import EmailService
+from services.email_transports import InMemoryTransport, SendGridTransport
+
+
+def _write_template(directory, name, subject, body, required_params):
+    (directory / f"{name}.json").write_text(json.dumps({"subject": subject, "required_params": required_params}))
+    (directory / f"{name}.html").write_text(body)
+
+
+class RecordingTransport(InMemoryTransport):
+    """Memory transport that also records each send_personalized batch."""
+
+    def __init__(self):
+        super().__init__()
+        self.batches = []
+
+    def send_personalized(self, from_email, subject, html_content, recipients):
+        self.batches.append(recipients)
+        return super().send_personalized(from_email, subject, html_content, recipients)
+
+
+@pytest.fixture
+def template_dir(tmp_path):
+    _write_template(tmp_path, "plain", "Hello {{ name }}", "<p>{{ name }} joined {{ team }}</p>", ["name"])
+    _write_template(tmp_path, "shouting", "Hello", "<p>{{ name|upper }}</p>", ["name"])
+    _write_template(tmp_path, "conditional", "Hello", "<p>{% if vip %}VIP {% endif %}{{ name }}</p>", ["name", "vip"])
+    return tmp_path
+
+
+def _service(template_dir, transport):
+    return EmailService(template_dir=str(template_dir), transport=transport, from_email="team@example.com")
+
+
+def test_bulk_groups_recipients_by_param_names(template_dir):
+    """Recipients sharing param names share one placeholder render, each gets their own values."""
+    transport = RecordingTransport()
+    recipients = [
+        ("a@example.com", {"name": "Ann", "team": "Red"}),
+        ("b@example.com", {"name": "Bob", "team": "Blue"}),
+        ("c@example.com", {"name": "Cy"}),
+        ("d@example.com", {"name": "Di"}),
+    ]
+
+    result = _service(template_dir, transport).notify_bulk("plain", recipients)
+
+    assert sorted(result.sent) == [0, 1, 2, 3]
+    assert result.failed == {}
+    assert sorted(len(batch) for batch in transport.batches) == [2, 2]
+    sent = {email["to_email"]: email for email in transport.outbox}
+    assert sent["a@example.com"]["subject"] == "Hello Ann"
+    assert sent["b@example.com"]["html_content"] == "<p>Bob joined Blue</p>"
+    assert sent["c@example.com"]["html_content"] == "<p>Cy joined </p>"
+
+
+@pytest.mark.parametrize("template_name, params, expected", [
+    ("shouting", [{"name": "ann"}, {"name": "bob"}], ["<p>ANN</p>", "<p>BOB</p>"]),
+    ("conditional", [{"name": "Ann", "vip": True}, {"name": "Bob", "vip": False}], ["<p>VIP Ann</p>", "<p>Bob</p>"]),
+])
+def test_bulk_sends_transformed_params_one_by_one(template_dir, template_name, params, expected):
+    """Params behind filters or conditionals are rendered for each recipient, not substituted."""
+    transport = RecordingTransport()
+    recipients = [(f"{index}@example.com", recipient_params) for index, recipient_params in enumerate(params)]
+
+    result = _service(template_dir, transport).notify_bulk(template_name, recipients)
+
+    assert sorted(result.sent) == [0, 1]
+    assert transport.batches == []
+    assert [email["html_content"] for email in transport.outbox] == expected
+
+
+def test_bulk_reports_failures_by_recipient_index(template_dir):
+    """Recipients missing params fail by their own index without holding back the others."""
+    transport = RecordingTransport()
+    recipients = [
+        ("a@example.com", {"name": "Ann"}),
+        ("b@example.com", {}),
+        ("c@example.com", {"name": "Cy"}),
+    ]
+
+    result = _service(template_dir, transport).notify_bulk("plain", recipients)
+
+    assert sorted(result.sent) == [0, 2]
+    assert list(result.failed) == [1]
+    assert "name" in result.failed[1]
+
+
+def test_sendgrid_bulk_sends_1000_personalizations_per_request(template_dir):
+    """A failed SendGrid request fails only the recipients in its chunk."""
+    requests = []
+
+    class FakeClient:
+        def send(self, message):
+            requests.append(len(message.personalizations))
+            if len(requests) == 2:
+                raise RuntimeError("rate limited")
+
+    transport = SendGridTransport.__new__(SendGridTransport)
+    transport.client = FakeClient()
+    recipients = [(f"user{index}@example.com", {"name": f"user{index}"}) for index in range(2500)]
+
+    result = _service(template_dir, transport).notify_bulk("plain", recipients)
+
+    assert requests == [1000, 1000, 500]
+    assert sorted(result.failed) == list(range(1000, 2000))
+    assert sorted(result.sent) == list(range(0, 1000)) + list(range(2000, 2500))
+
+
+def test_sender_address_is_only_required_for_sendgrid(template_dir, monkeypatch):
+    """EMAIL_FROM falls back to SENDGRID_FROM_EMAIL and only the sendgrid transport needs either."""
+    monkeypatch.delenv("EMAIL_FROM", raising=False)
+    monkeypatch.delenv("SENDGRID_FROM_EMAIL", raising=False)
+
+    assert EmailService(template_dir=str(template_dir), transport=InMemoryTransport()).from_email
+    with pytest.raises(ValueError):
+        EmailService(template_dir=str(template_dir), transport=SendGridTransport.__new__(SendGridTransport))
+
+    monkeypatch.setenv("SENDGRID_FROM_EMAIL", "legacy@example.com")
+    assert EmailService(template_dir=str(template_dir), transport=InMemoryTransport()).from_email == "legacy@example.com"
+    monkeypatch.setenv("EMAIL_FROM", "team@example.com")
+    assert EmailService(template_dir=str(template_dir), transport=InMemoryTransport()).from_email == "team@example.com"
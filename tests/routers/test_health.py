@@ -0,0 +1,44 @@
+from fastapi.testclient import TestClient
+from main import app
+from services import health
+
+
+def test_liveness_and_readiness_follow_the_worker_lifecycle(monkeypatch):
+    """/healthz always answers, /readyz only between startup and shutdown."""
+    monkeypatch.setattr(health, "CHECKS", {"database": health.check_database})
+    health.clear_cache()
+
+    with TestClient(app) as client:
+        assert client.get("/healthz").json() == {"status": "ok"}
+        response = client.get("/readyz")
+        assert response.status_code == 200
+        assert response.json()["checks"]["database"]["status"] == "ok"
+        assert "latency_ms" in response.json()["checks"]["database"]
+
+    # After shutdown the worker reports it is draining
+    client = TestClient(app)
+    assert client.get("/healthz").status_code == 200
+    assert client.get("/readyz").status_code == 503
+
+
+def test_readiness_fails_while_a_dependency_is_down(monkeypatch, caplog):
+    def broken():
+        raise ConnectionError("connection refused")
+
+    monkeypatch.setattr(health, "CHECKS", {"database": health.check_database, "broker": broken})
+    health.clear_cache()
+
+    try:
+        with TestClient(app) as client:
+            response = client.get("/readyz")
+    finally:
+        health.clear_cache()
+
+    assert response.status_code == 503
+    checks = response.json()["checks"]
+    assert checks["database"]["status"] == "ok"
+    assert checks["broker"]["status"] == "error"
+    # Only the class is shown, the message can name hosts and users
+    assert checks["broker"]["error"] == "ConnectionError"
+    assert "connection refused" not in response.text
+    assert "connection refused" in caplog.text
@@ -0,0 +1,36 @@
+from tests.conftest import get_user_auth_headers
+
+
+def test_requests_report_server_timing_and_route_metrics(client, db, seed_test_organizations_and_users, monkeypatch):
+    """
+    Every response carries a Server-Timing breakdown, and /metrics records the
+    request under its route template rather than the raw path.
+    """
+    seeded_data = seed_test_organizations_and_users
+    organization = seeded_data['organization']
+    headers = get_user_auth_headers(db, seeded_data['user_subscribed'])
+
+    response = client.get(f"/organization-users/{organization.id}", headers=headers)
+
+    assert response.status_code == 200
+    server_timing = response.headers["Server-Timing"]
+    for category in ("db", "auth", "storage", "external", "total"):
+        assert f"{category};dur=" in server_timing
+    assert "queries" in server_timing
+
+    monkeypatch.setenv("METRICS_TOKEN", "scrape-token")
+    metrics = client.get("/metrics", headers={"Authorization": "Bearer scrape-token"}).text
+    assert 'http_request_duration_seconds_count{method="GET",route="/organization-users/{org_id}",status="200"}' in metrics
+    assert f'route="/organization-users/{organization.id}"' not in metrics
+    assert 'http_request_sql_statements_count{method="GET",route="/organization-users/{org_id}"}' in metrics
+
+
+def test_metrics_require_the_scrape_token(client, monkeypatch):
+    """/metrics is off without METRICS_TOKEN and refuses callers without the token."""
+    monkeypatch.delenv("METRICS_TOKEN", raising=False)
+    assert client.get("/metrics").status_code == 404
+
+    monkeypatch.setenv("METRICS_TOKEN", "scrape-token")
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong-token"}).status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer scrape-token"}).status_code == 200
@@ -275,4 +275,194 @@ def test_admin_cannot_remove_themselves(client, db, seed_test_organizations_and_
     )
     
     assert response.status_code == 400
-    assert "You cannot delete yourself from the organization" in response.json()["detail"]
\ No newline at end of file
+    assert "You cannot delete yourself from the organization" in response.json()["detail"]
+
+# a demoted moderator loses access right away, their cached membership is dropped on the role change
+def test_demoted_moderator_loses_access(client, db, seed_test_organizations_and_users):
+    seeded_data = seed_test_organizations_and_users
+    admin_user = seeded_data['user_subscribed']
+    moderator_user = seeded_data['moderator_user']
+    organization = seeded_data['organization']
+
+    moderator_headers = get_user_auth_headers(db, moderator_user)
+
+    # Caches the moderator's memberships
+    response = client.get(f"/organization-users/{organization.id}", headers=moderator_headers)
+    assert response.status_code == 200
+
+    response = client.put(
+        f"/organization-users/{organization.id}/{moderator_user.id}",
+        json={"role": "MEMBER"},
+        headers=get_user_auth_headers(db, admin_user)
+    )
+    assert response.status_code == 200
+
+    response = client.get(f"/organization-users/{organization.id}", headers=moderator_headers)
+    assert response.status_code == 403
+
+
+# a membership load that read the roles before a change was invalidated does not cache them
+def test_membership_load_racing_an_invalidation_is_not_cached(db, seed_test_organizations_and_users, monkeypatch):
+    from services import memberships
+    from utils.redis_client import redis_client
+
+    moderator_user = seed_test_organizations_and_users['moderator_user']
+    real_query = db.query
+
+    def query_then_invalidate(*args, **kwargs):
+        # The role change commits and is invalidated while this load is in flight
+        memberships.invalidate_user(moderator_user.id)
+        return real_query(*args, **kwargs)
+
+    monkeypatch.setattr(db, "query", query_then_invalidate)
+    memberships.get_user_roles(db, moderator_user.id)
+    monkeypatch.undo()
+    assert redis_client.get(memberships._user_key(moderator_user.id)) is None
+
+    memberships.invalidate_user(moderator_user.id, db)
+    memberships.get_user_roles(db, moderator_user.id)
+    assert redis_client.get(memberships._user_key(moderator_user.id)) is not None
+
+
+# listing members takes the same number of queries however many members there are
+def test_user_list_query_count_does_not_grow_with_members(client, db, seed_test_organizations_and_users, count_queries):
+    from models.user import User
+    from models.organization import OrganizationUser
+    from dependencies.enums import RoleEnum
+
+    seeded_data = seed_test_organizations_and_users
+    admin_user = seeded_data['user_subscribed']
+    organization = seeded_data['organization']
+    headers = get_user_auth_headers(db, admin_user)
+
+    # Warm the membership cache so both measured requests take the same path
+    client.get(f"/organization-users/{organization.id}", headers=headers)
+
+    with count_queries() as before:
+        response = client.get(f"/organization-users/{organization.id}", headers=headers)
+    assert response.status_code == 200
+    members_before = len(response.json())
+
+    for i in range(20):
+        user = User(email=f"extra{i}@usersubscribed.com", hashed_password="x", role=RoleEnum.user, confirmed=True)
+        db.add(user)
+        db.flush()
+        db.add(OrganizationUser(user_id=user.id, organization_id=organization.id, role=OrganizationUserRole.MEMBER))
+    db.commit()
+
+    with count_queries() as after:
+        response = client.get(f"/organization-users/{organization.id}", headers=headers)
+    assert len(response.json()) == members_before + 20
+    assert after.count == before.count, after.statements
+
+
+# the user list pages by cursor and filters by role and email prefix
+def test_user_list_pages_and_filters(client, db, seed_test_organizations_and_users):
+    seeded_data = seed_test_organizations_and_users
+    admin_user = seeded_data['user_subscribed']
+    organization = seeded_data['organization']
+    headers = get_user_auth_headers(db, admin_user)
+
+    everyone = client.get(f"/organization-users/{organization.id}", headers=headers).json()
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get(f"/organization-users/{organization.id}", params=params, headers=headers)
+        assert response.status_code == 200
+        assert len(response.json()) <= 2
+        seen.extend(user["id"] for user in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert seen == [user["id"] for user in everyone]
+
+    response = client.get(f"/organization-users/{organization.id}", params={"role": "MEMBER"}, headers=headers)
+    assert response.json()
+    assert all(user["role"] == "MEMBER" for user in response.json())
+
+    response = client.get(f"/organization-users/{organization.id}", params={"email_prefix": "member1"}, headers=headers)
+    assert [user["user_email"] for user in response.json()] == ["member1@usersubscribed.com"]
+
+    response = client.get(f"/organization-users/{organization.id}", params={"cursor": "not-a-cursor"}, headers=headers)
+    assert response.status_code == 400
+
+
+# format=ndjson streams every user, one JSON object per line
+def test_user_list_streams_ndjson(client, db, seed_test_organizations_and_users):
+    import json
+
+    seeded_data = seed_test_organizations_and_users
+    admin_user = seeded_data['user_subscribed']
+    organization = seeded_data['organization']
+    headers = get_user_auth_headers(db, admin_user)
+
+    everyone = client.get(f"/organization-users/{organization.id}", headers=headers).json()
+
+    response = client.get(f"/organization-users/{organization.id}", params={"format": "ndjson", "limit": 1}, headers=headers)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    streamed = [json.loads(line) for line in response.text.splitlines()]
+    assert streamed == everyone
+
+
+# an unchanged page answers 304 to its ETag, a role change gives the page a new one
+def test_user_list_answers_not_modified_until_changed(client, db, seed_test_organizations_and_users):
+    seeded_data = seed_test_organizations_and_users
+    admin_user = seeded_data['user_subscribed']
+    organization = seeded_data['organization']
+    member_user = seeded_data['member3']
+    headers = get_user_auth_headers(db, admin_user)
+
+    response = client.get(f"/organization-users/{organization.id}", headers=headers)
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+    assert etag.startswith('W/"')
+    assert response.headers["Cache-Control"] == "private, no-cache"
+
+    response = client.get(f"/organization-users/{organization.id}", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["ETag"] == etag
+
+    # Other filters are other pages
+    response = client.get(f"/organization-users/{organization.id}", params={"role": "MEMBER"}, headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+
+    client.put(f"/organization-users/{organization.id}/{member_user.id}", json={"role": "MODERATOR"}, headers=headers)
+
+    response = client.get(f"/organization-users/{organization.id}", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+# large JSON bodies are compressed for clients that accept it, small ones are not
+def test_user_list_is_compressed(client, db, seed_test_organizations_and_users):
+    from models.user import User
+    from models.organization import OrganizationUser
+    from dependencies.enums import RoleEnum
+
+    seeded_data = seed_test_organizations_and_users
+    admin_user = seeded_data['user_subscribed']
+    organization = seeded_data['organization']
+    headers = get_user_auth_headers(db, admin_user)
+
+    response = client.get(f"/organization-users/{organization.id}", params={"limit": 1}, headers={**headers, "Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+
+    for i in range(30):
+        user = User(email=f"compressed{i}@usersubscribed.com", hashed_password="x", role=RoleEnum.user, confirmed=True)
+        db.add(user)
+        db.flush()
+        db.add(OrganizationUser(user_id=user.id, organization_id=organization.id, role=OrganizationUserRole.MEMBER))
+    db.commit()
+
+    response = client.get(f"/organization-users/{organization.id}", headers={**headers, "Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert len(response.json()) > 30
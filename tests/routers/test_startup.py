@@ -0,0 +1,39 @@
+import os
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Only the workers need these, the API sends tasks by name (celery_app/task_catalog.py)
+WORKER_ONLY_MODULES = ("celery_app.tasks", "replicate", "PIL", "google.cloud.storage", "langchain")
+
+# Seconds importing the app may take, raise it with care: every API worker pays it on start
+IMPORT_BUDGET_SECONDS = float(os.getenv("IMPORT_BUDGET_SECONDS", 3.0))
+
+
+def _import_times(module: str) -> dict:
+    """Cumulative import time in microseconds of every module a fresh interpreter loads for module."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, cwd=REPO_ROOT,
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_api_import_skips_worker_modules_and_stays_in_budget():
+    times = _import_times("main")
+
+    loaded = [
+        name for name in times
+        if any(name == heavy or name.startswith(heavy + ".") for heavy in WORKER_ONLY_MODULES)
+    ]
+    assert loaded == []
+    assert times["main"] / 1e6 < IMPORT_BUDGET_SECONDS
@@ -42,28 +42,22 @@ def test_create_free_subscription_when_disabled(mock_email_notify, client, db, c
     """
     Test creating a free subscription when the system setting is disabled.
     """
-    # Temporarily disable free subscriptions
-    from config.system_settings import SystemSettings
-    original_setting = SystemSettings.AUTO_CREATE_FREE_SUBSCRIPTION
-    SystemSettings.AUTO_CREATE_FREE_SUBSCRIPTION = False
+    # Disable free subscriptions, the database is reset after each test
+    from services import system_settings
+    system_settings.update_settings(db, {"auto_create_free_subscription": False})
 
-    try:
-        # Create authenticated headers (this creates the user and returns auth headers)
-        headers = create_test_auth_headers(db, "disabled_free_user@example.com", "devpass", RoleEnum.user)
+    # Create authenticated headers (this creates the user and returns auth headers)
+    headers = create_test_auth_headers(db, "disabled_free_user@example.com", "devpass", RoleEnum.user)
 
-        # Try to create a free subscription
-        response = client.post(
-            "/subscription/free",
-            headers=headers
-        )
-
-        # Should fail with 400 because free subscriptions are disabled
-        assert response.status_code == 400
-        assert "Free subscriptions are not enabled" in response.json()["detail"]
+    # Try to create a free subscription
+    response = client.post(
+        "/subscription/free",
+        headers=headers
+    )
 
-    finally:
-        # Restore the original setting
-        SystemSettings.AUTO_CREATE_FREE_SUBSCRIPTION = original_setting
+    # Should fail with 400 because free subscriptions are disabled
+    assert response.status_code == 400
+    assert "Free subscriptions are not enabled" in response.json()["detail"]
 
 
 @patch('services.email_service.EmailService.notify')
@@ -71,27 +65,222 @@ def test_create_free_subscription_when_enabled(mock_email_notify, client, db, cr
     """
     Test creating a free subscription when the system setting is enabled (default).
     """
-    # Ensure free subscriptions are enabled (default)
-    from config.system_settings import SystemSettings
-    original_setting = SystemSettings.AUTO_CREATE_FREE_SUBSCRIPTION
-    SystemSettings.AUTO_CREATE_FREE_SUBSCRIPTION = True
-    
-    try:
-        # Create authenticated headers (this creates the user and returns auth headers)
-        headers = create_test_auth_headers(db, "enabled_free_user@example.com", "devpass", RoleEnum.user)
+    # Ensure free subscriptions are enabled, the database is reset after each test
+    from services import system_settings
+    system_settings.update_settings(db, {"auto_create_free_subscription": True})
+
+    # Create authenticated headers (this creates the user and returns auth headers)
+    headers = create_test_auth_headers(db, "enabled_free_user@example.com", "devpass", RoleEnum.user)
+
+    # Try to create a free subscription
+    response = client.post(
+        "/subscription/free",
+        headers=headers
+    )
+
+    # Should succeed with 200 because free subscriptions are enabled
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status"] == "active"
+    assert data["price_id"] == "free_plan"
+
+def _signed_webhook(event, secret):
+    """Body and Stripe-Signature header for an event, signed the way Stripe does."""
+    import hashlib
+    import hmac
+    import json
+    import time
+
+    payload = json.dumps(event)
+    timestamp = int(time.time())
+    signature = hmac.new(secret.encode(), f"{timestamp}.{payload}".encode(), hashlib.sha256).hexdigest()
+    return payload, {"Stripe-Signature": f"t={timestamp},v1={signature}", "Content-Type": "application/json"}
+
+
+def _subscription_event(event_id, customer_id, subscription_id, status, created):
+    return {
+        "id": event_id,
+        "object": "event",
+        "type": "customer.subscription.updated",
+        "created": created,
+        "data": {"object": {
+            "id": subscription_id,
+            "object": "subscription",
+            "customer": customer_id,
+            "status": status,
+            "cancel_at_period_end": False,
+            "items": {"data": [{"price": {"id": "price_test_premium"}}]},
+            "metadata": {},
+        }},
+    }
+
 
-        # Try to create a free subscription
-        response = client.post(
-            "/subscription/free",
-            headers=headers
-        )
+@patch('services.stripe_events.request_apply')
+def test_stripe_webhook_stores_each_event_once(mock_request_apply, client, db, monkeypatch):
+    """
+    Stripe redelivers events, a redelivery is acknowledged without storing or queueing it again.
+    """
+    from models import StripeEvent
 
-        # Should succeed with 200 because free subscriptions are enabled
+    monkeypatch.setenv("STRIPE_WEBHOOK_SECRET", "whsec_test")
+    event = _subscription_event("evt_test_once", "cus_test_once", "sub_test_once", "active", 1700000000)
+    payload, headers = _signed_webhook(event, "whsec_test")
+
+    for _ in range(2):
+        response = client.post("/subscription/webhook", content=payload, headers=headers)
         assert response.status_code == 200
-        data = response.json()
-        assert data["status"] == "active"
-        assert data["price_id"] == "free_plan"
+        assert response.json() == {"received": True}
+
+    assert db.query(StripeEvent).filter(StripeEvent.stripe_event_id == "evt_test_once").count() == 1
+    mock_request_apply.assert_called_once_with("cus_test_once")
+
+
+@patch('services.stripe_events.request_apply')
+def test_stripe_webhook_rejects_bad_signature(mock_request_apply, client, db, monkeypatch):
+    from models import StripeEvent
+
+    monkeypatch.setenv("STRIPE_WEBHOOK_SECRET", "whsec_test")
+    event = _subscription_event("evt_test_forged", "cus_test_forged", "sub_test_forged", "active", 1700000000)
+    payload, headers = _signed_webhook(event, "not_the_secret")
+
+    response = client.post("/subscription/webhook", content=payload, headers=headers)
+
+    assert response.status_code == 400
+    assert db.query(StripeEvent).count() == 0
+    mock_request_apply.assert_not_called()
+
+
+@patch('services.email_service.EmailService.notify')
+def test_apply_stripe_events_in_created_order(mock_email_notify, db, create_test_auth_headers):
+    """
+    Events are applied oldest first whatever order they arrived in, and an older
+    event stored after a newer one was applied does not roll the subscription back.
+    """
+    from services import stripe_events
+
+    create_test_auth_headers(db, "webhook_user@example.com", "devpass", RoleEnum.user)
+    user = db.query(User).filter(User.email == "webhook_user@example.com").first()
+    organization = db.query(Organization).filter(Organization.org_owner == user.id).first()
+    organization.stripe_customer_id = "cus_test_order"
+    db.commit()
+
+    stripe_events.record_event(db, _subscription_event("evt_test_2", "cus_test_order", "sub_test_order", "past_due", 1700000200))
+    stripe_events.record_event(db, _subscription_event("evt_test_1", "cus_test_order", "sub_test_order", "active", 1700000100))
+    db.commit()
+    assert stripe_events.apply_customer_events(db, "cus_test_order") == 2
+
+    stripe_events.record_event(db, _subscription_event("evt_test_0", "cus_test_order", "sub_test_order", "trialing", 1700000000))
+    db.commit()
+    assert stripe_events.apply_customer_events(db, "cus_test_order") == 1
+
+    subscription = db.query(Subscription).filter(Subscription.stripe_subscription_id == "sub_test_order").one()
+    assert subscription.organization_id == organization.id
+    assert subscription.status == "past_due"
+    assert subscription.stripe_event_created == 1700000200
+
+
+@patch('services.email_service.EmailService.notify')
+def test_stripe_event_that_cannot_apply_is_dead_lettered(mock_email_notify, db, create_test_auth_headers, monkeypatch):
+    """
+    A malformed event is set aside on its first failure and one that keeps
+    failing after MAX_EVENT_ATTEMPTS runs, so the customer's later events apply.
+    """
+    from models import StripeEvent
+    from services import stripe_events
+
+    monkeypatch.setattr(stripe_events, "MAX_EVENT_ATTEMPTS", 2)
+    create_test_auth_headers(db, "poison_user@example.com", "devpass", RoleEnum.user)
+    user = db.query(User).filter(User.email == "poison_user@example.com").first()
+    organization = db.query(Organization).filter(Organization.org_owner == user.id).first()
+
+    # No organization holds the customer yet, so this fails until it gives up
+    orphan = _subscription_event("evt_test_orphan", "cus_test_poison", "sub_test_orphan", "active", 1700000000)
+    malformed = _subscription_event("evt_test_malformed", "cus_test_poison", "sub_test_malformed", "active", 1700000100)
+    del malformed["data"]["object"]["items"]
+    later = _subscription_event("evt_test_later", "cus_test_poison", "sub_test_later", "active", 1700000200)
+    later["data"]["object"]["metadata"] = {"organization_id": str(organization.id)}
+    for event in (orphan, malformed, later):
+        stripe_events.record_event(db, event)
+    db.commit()
+
+    assert stripe_events.apply_customer_events(db, "cus_test_poison") == 0
+    stored = db.query(StripeEvent).filter(StripeEvent.stripe_event_id == "evt_test_orphan").one()
+    assert stored.attempts == 1
+    assert stored.dead_lettered_at is None
+
+    assert stripe_events.apply_customer_events(db, "cus_test_poison") == 1
+    for event_id in ("evt_test_orphan", "evt_test_malformed"):
+        stored = db.query(StripeEvent).filter(StripeEvent.stripe_event_id == event_id).one()
+        db.refresh(stored)
+        assert stored.dead_lettered_at is not None
+        assert stored.processed_at is None
+        assert stored.error
+    assert db.query(Subscription).filter(Subscription.stripe_subscription_id == "sub_test_later").one().status == "active"
+    assert stripe_events.customers_with_unprocessed_events(db, older_than_seconds=-60) == []
+
+
+@patch('services.email_service.EmailService.notify')
+def test_entitlement_follows_new_subscription(mock_email_notify, client, db, create_test_auth_headers):
+    """
+    A cached entitlement is dropped when the user gets a subscription, so the
+    next lookup bills the new team organization on the free plan.
+    """
+    from services import entitlements
+
+    headers = create_test_auth_headers(db, "entitled_user@example.com", "devpass", RoleEnum.user)
+    user = db.query(User).filter(User.email == "entitled_user@example.com").first()
+
+    before = entitlements.resolve_user_entitlement(db, user.id)
+    assert before.tier == "default"
+    assert not before.active
+
+    response = client.post("/subscription/free", headers=headers)
+    assert response.status_code == 200
+
+    after = entitlements.resolve_user_entitlement(db, user.id)
+    team_org = db.query(Organization).filter(Organization.org_owner == user.id, Organization.is_solo == False).one()
+    assert after.org_id == team_org.id
+    assert after.tier == "free_plan"
+    assert after.active
+
+
+def test_refreshing_an_organization_keeps_other_cached_entitlements(db, create_test_auth_headers):
+    """
+    Refreshing one organization only drops the cached entitlements of its
+    members, other users keep being served from the process cache.
+    """
+    from services import entitlements
+
+    create_test_auth_headers(db, "refreshed_user@example.com", "devpass", RoleEnum.user)
+    create_test_auth_headers(db, "bystander_user@example.com", "devpass", RoleEnum.user)
+    refreshed = db.query(User).filter(User.email == "refreshed_user@example.com").first()
+    bystander = db.query(User).filter(User.email == "bystander_user@example.com").first()
+
+    refreshed_entitlement = entitlements.resolve_user_entitlement(db, refreshed.id)
+    entitlements.resolve_user_entitlement(db, bystander.id)
+
+    entitlements.refresh_organization(db, refreshed_entitlement.org_id)
+    assert refreshed.id not in entitlements._local_cache
+    assert bystander.id in entitlements._local_cache
+
+
+def test_cached_plan_expires_when_access_ends(db, create_test_auth_headers):
+    """An active plan with a restrict_access_on in the future is only cached until then."""
+    import datetime
+    from services import entitlements
+    from utils.redis_client import redis_client
+
+    create_test_auth_headers(db, "ending_user@example.com", "devpass", RoleEnum.user)
+    user = db.query(User).filter(User.email == "ending_user@example.com").first()
+    organization = db.query(Organization).filter(Organization.org_owner == user.id).first()
+    db.add(Subscription(
+        organization_id=organization.id,
+        stripe_subscription_id="sub_test_ending",
+        status="active",
+        price_id="price_test_premium",
+        restrict_access_on=datetime.datetime.utcnow() + datetime.timedelta(seconds=30),
+    ))
+    db.commit()
 
-    finally:
-        # Restore the original setting
-        SystemSettings.AUTO_CREATE_FREE_SUBSCRIPTION = original_setting
\ No newline at end of file
+    assert entitlements.refresh_organization(db, organization.id)["active"] == "1"
+    assert 0 < redis_client.ttl(entitlements._org_key(organization.id)) <= 30
@@ -0,0 +1,59 @@
+from config.system_settings import SystemSettings
+from dependencies.enums import RoleEnum
+from tests.conftest import get_user_auth_headers
+
+
+def test_settings_are_cacheable_and_revalidated(client):
+    """The defaults come with an ETag and a public Cache-Control, and an unchanged ETag gets a 304."""
+    response = client.get("/system-settings/")
+
+    assert response.status_code == 200
+    assert response.json()["branding_logo_dark_mode"] == SystemSettings.BRANDING_LOGO_DARK_MODE
+    assert response.headers["Cache-Control"].startswith("public, max-age=")
+    etag = response.headers["ETag"]
+
+    response = client.get("/system-settings/", headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["ETag"] == etag
+
+
+def test_superadmin_update_is_served_with_a_new_etag(client, create_test_auth_headers, db):
+    """A change is stored, served on the next request and gets a new ETag."""
+    etag = client.get("/system-settings/").headers["ETag"]
+    headers = create_test_auth_headers(db, email="super@admin.com", role=RoleEnum.superadmin)
+
+    response = client.put("/system-settings/", json={"branding_logo_dark_mode": "https://example.com/logo.png"}, headers=headers)
+    assert response.status_code == 200
+
+    response = client.get("/system-settings/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["branding_logo_dark_mode"] == "https://example.com/logo.png"
+    assert response.json()["auto_create_free_subscription"] == SystemSettings.AUTO_CREATE_FREE_SUBSCRIPTION
+    assert response.headers["ETag"] != etag
+
+
+def test_update_requires_superadmin(client, db, seed_test_organizations_and_users):
+    """Only superadmins can change system settings."""
+    headers = get_user_auth_headers(db, seed_test_organizations_and_users['user_subscribed'])
+
+    response = client.put("/system-settings/", json={"auto_create_free_subscription": False}, headers=headers)
+
+    assert response.status_code == 403
+
+
+def test_update_rejects_null_for_required_settings(client, create_test_auth_headers, db):
+    """auto_create_free_subscription cannot be nulled, the logos can be cleared."""
+    headers = create_test_auth_headers(db, email="super@admin.com", role=RoleEnum.superadmin)
+
+    response = client.put("/system-settings/", json={"auto_create_free_subscription": None}, headers=headers)
+    assert response.status_code == 422
+
+    response = client.put("/system-settings/", json={"branding_logo_dark_mode": None}, headers=headers)
+    assert response.status_code == 200
+
+    response = client.get("/system-settings/")
+    assert response.status_code == 200
+    assert response.json()["auto_create_free_subscription"] == SystemSettings.AUTO_CREATE_FREE_SUBSCRIPTION
+    assert response.json()["branding_logo_dark_mode"] is None
@@ -0,0 +1,126 @@
+import time
+import uuid
+from types import SimpleNamespace
+from unittest.mock import patch
+from tests.conftest import get_user_auth_headers
+
+
+def _fake_celery_result():
+    return SimpleNamespace(id=str(uuid.uuid4()), status="PENDING")
+
+
+# a user can see the tasks they started in the task list
+@patch('controllers.tools.task.run_task')
+def test_user_can_list_own_tasks(mock_run_task, client, db, seed_test_organizations_and_users):
+    seeded_data = seed_test_organizations_and_users
+    user = seeded_data['member1']
+    headers = get_user_auth_headers(db, user)
+
+    mock_run_task.return_value = _fake_celery_result()
+    response = client.post("/tools/task/example_streaming", json={"duration": 1}, headers=headers)
+    assert response.status_code == 200
+    task_id = response.json()["task_id"]
+
+    response = client.get("/tools/tasks", headers=headers)
+    assert response.status_code == 200
+    task_ids = [task["task_id"] for task in response.json()["tasks"]]
+    assert task_id in task_ids
+
+
+# a user can not check the status of a task someone else started
+@patch('controllers.tools.task.run_task')
+def test_user_cannot_check_status_of_other_users_task(mock_run_task, client, db, seed_test_organizations_and_users):
+    seeded_data = seed_test_organizations_and_users
+    owner_headers = get_user_auth_headers(db, seeded_data['member1'])
+    other_headers = get_user_auth_headers(db, seeded_data['member2'])
+
+    mock_run_task.return_value = _fake_celery_result()
+    response = client.post("/tools/task/example_streaming", json={"duration": 1}, headers=owner_headers)
+    task_id = response.json()["task_id"]
+
+    response = client.get(f"/tools/task/{task_id}/status", headers=other_headers)
+    assert response.status_code == 404
+
+    response = client.get("/tools/tasks", headers=other_headers)
+    assert task_id not in [task["task_id"] for task in response.json()["tasks"]]
+
+
+# unknown task names are rejected before anything is queued
+def test_unknown_task_returns_404(client, db, seed_test_organizations_and_users):
+    headers = get_user_auth_headers(db, seed_test_organizations_and_users['member1'])
+
+    response = client.post("/tools/task/not_a_task", json={}, headers=headers)
+    assert response.status_code == 404
+
+
+# parameters are validated against the task schema before enqueueing
+@patch('celery.app.base.Celery.send_task')
+def test_invalid_task_params_return_422(mock_send_task, client, db, seed_test_organizations_and_users):
+    headers = get_user_auth_headers(db, seed_test_organizations_and_users['member1'])
+
+    response = client.post("/tools/task/generate_image_with_logo", json={"num_inference_steps": 5}, headers=headers)
+    assert response.status_code == 422
+
+    response = client.post("/tools/task/example_streaming", json={"duration": 1, "unexpected": True}, headers=headers)
+    assert response.status_code == 422
+
+    mock_send_task.assert_not_called()
+
+
+# a user can not run more generate_image_with_logo tasks at once than the task allows
+@patch('celery.app.base.Celery.send_task')
+def test_per_user_task_concurrency_cap(mock_send_task, client, db, seed_test_organizations_and_users):
+    from services import task_limiter
+
+    headers = get_user_auth_headers(db, seed_test_organizations_and_users['member1'])
+    mock_send_task.side_effect = lambda *args, **kwargs: SimpleNamespace(id=kwargs["task_id"], status="PENDING")
+
+    task_ids = []
+    try:
+        for _ in range(2):
+            response = client.post("/tools/task/generate_image_with_logo", json={"prompt": "a cat"}, headers=headers)
+            assert response.status_code == 200
+            task_ids.append(response.json()["task_id"])
+
+        response = client.post("/tools/task/generate_image_with_logo", json={"prompt": "a cat"}, headers=headers)
+        assert response.status_code == 429
+
+        # finishing a task frees its slot
+        task_limiter.release(task_ids.pop())
+        response = client.post("/tools/task/generate_image_with_logo", json={"prompt": "a cat"}, headers=headers)
+        assert response.status_code == 200
+        task_ids.append(response.json()["task_id"])
+    finally:
+        for task_id in task_ids:
+            task_limiter.release(task_id)
+
+
+# tasks enqueued at the same moment are neither skipped nor repeated across pages
+def test_task_list_pages_through_tasks_with_the_same_enqueue_time(client, db, seed_test_organizations_and_users):
+    from utils.task_ownership import record_task
+
+    seeded_data = seed_test_organizations_and_users
+    user = seeded_data['member2']
+    headers = get_user_auth_headers(db, user)
+
+    enqueued_at = time.time()
+    recorded = {str(uuid.uuid4()) for _ in range(5)}
+    for task_id in recorded:
+        record_task(user.id, task_id, enqueued_at=enqueued_at)
+
+    seen = []
+    params = {"limit": 2}
+    while True:
+        response = client.get("/tools/tasks", params=params, headers=headers)
+        assert response.status_code == 200
+        seen.extend(task["task_id"] for task in response.json()["tasks"])
+        cursor = response.json()["next_cursor"]
+        if not cursor:
+            break
+        params["cursor"] = cursor
+
+    assert len(seen) == len(set(seen))
+    assert recorded <= set(seen)
+
+    response = client.get("/tools/tasks", params={"cursor": "not-a-cursor"}, headers=headers)
+    assert response.status_code == 400
@@ -1,8 +1,24 @@
 from unittest.mock import patch
-from models import User, Organization, OrganizationUser
+from urllib.parse import urlparse
+import os
+import socket
+import stripe
+from models import User, Organization, OrganizationUser, EmailOutbox
 from dependencies.dependencies import get_db
 import pytest
 from dependencies.enums import RoleEnum
+from services import stripe_provisioning
+
+STRIPE_MOCK_URL = os.getenv("STRIPE_MOCK_URL", "http://stripe_mock:12111")
+
+
+def _stripe_mock_running() -> bool:
+    url = urlparse(STRIPE_MOCK_URL)
+    try:
+        socket.create_connection((url.hostname, url.port), timeout=1).close()
+        return True
+    except OSError:
+        return False
 
 @patch('services.email_service.EmailService.notify')
 def test_create_user_successfully(mock_email_service, client, db):
@@ -114,3 +130,99 @@ def test_create_duplicate_user(mock_email_service, client, db):
     
     assert second_response.status_code == 409
     assert "User with this email already exists" in second_response.json()["detail"]
+
+
+@patch('services.email_service.EmailService.notify', side_effect=Exception("SendGrid is down"))
+def test_create_user_queues_confirmation_email(mock_email_service, client, db):
+    """Signup no longer sends inline, so it succeeds even when the email provider fails."""
+    response = client.post(
+        "/user/",
+        json={"email": "outbox_user@example.com", "password": "devpass"}
+    )
+
+    assert response.status_code == 200
+    mock_email_service.assert_not_called()
+
+    outbox_email = db.query(EmailOutbox).filter(EmailOutbox.recipient_email == "outbox_user@example.com").one()
+    assert outbox_email.template_name == "signup_confirmation"
+    assert outbox_email.status == "pending"
+    assert outbox_email.idempotency_key.startswith("signup_confirmation:")
+
+
+@patch('services.email_service.EmailService.notify')
+def test_email_outbox_drain_sends_each_email_once(mock_email_service, client, db):
+    """Draining twice sends a queued email exactly once."""
+    from services import email_outbox
+
+    client.post("/user/", json={"email": "drain_user@example.com", "password": "devpass"})
+
+    assert email_outbox.drain(db) == 1
+    assert email_outbox.drain(db) == 0
+    mock_email_service.assert_called_once()
+
+    outbox_email = db.query(EmailOutbox).filter(EmailOutbox.recipient_email == "drain_user@example.com").one()
+    db.refresh(outbox_email)
+    assert outbox_email.status == "sent"
+    assert outbox_email.attempts == 1
+
+
+@patch('services.stripe_provisioning.request_customer')
+@patch('services.email_service.EmailService.notify')
+def test_create_user_defers_stripe_customer(mock_email_service, mock_request_customer, client, db):
+    """Signup commits the solo organization right away and leaves the Stripe customer to the saga."""
+    response = client.post("/user/", json={"email": "pending_stripe@example.com", "password": "devpass"})
+    assert response.status_code == 200
+
+    user = db.query(User).filter(User.email == "pending_stripe@example.com").one()
+    solo_org = db.query(Organization).filter(Organization.org_owner == user.id, Organization.is_solo == True).one()
+    assert solo_org.stripe_customer_status == stripe_provisioning.PENDING
+    assert solo_org.stripe_customer_id is None
+    mock_request_customer.assert_called_once_with(solo_org.id)
+
+
+@pytest.mark.skipif(not _stripe_mock_running(), reason="stripe-mock is not running")
+@patch('services.stripe_provisioning.request_customer')
+@patch('services.email_service.EmailService.notify')
+def test_stripe_provisioning_saga_against_stripe_mock(mock_email_service, mock_request_customer, client, db, monkeypatch):
+    """The saga creates the customer, backfills the organization, and a second run is a no-op."""
+    monkeypatch.setattr(stripe, "api_base", stripe.api_base)  # restored after the test
+    monkeypatch.setenv("STRIPE_API_BASE", STRIPE_MOCK_URL)
+    monkeypatch.setenv("STRIPE_SECRET_KEY", "sk_test_123")
+
+    client.post("/user/", json={"email": "saga_user@example.com", "password": "devpass"})
+    user = db.query(User).filter(User.email == "saga_user@example.com").one()
+    solo_org = db.query(Organization).filter(Organization.org_owner == user.id, Organization.is_solo == True).one()
+
+    customer_id = stripe_provisioning.provision_customer(db, solo_org.id)
+    assert customer_id.startswith("cus_")
+
+    db.refresh(solo_org)
+    assert solo_org.stripe_customer_status == stripe_provisioning.PROVISIONED
+    assert solo_org.stripe_customer_id == customer_id
+
+    assert stripe_provisioning.provision_customer(db, solo_org.id) is None
+
+
+@patch('celery_app.tasks.stripe_provisioning_task.provision_stripe_customer_task.delay')
+@patch('services.stripe_provisioning.request_customer')
+@patch('services.email_service.EmailService.notify')
+def test_sweep_skips_organizations_with_a_request_in_flight(mock_email_service, mock_request_customer, mock_delay, client, db):
+    """A pending organization is re-requested once, not again while that request holds its lease."""
+    import datetime
+    from celery_app.tasks.stripe_provisioning_task import sweep_pending_stripe_customers_task
+
+    client.post("/user/", json={"email": "sweep_user@example.com", "password": "devpass"})
+    user = db.query(User).filter(User.email == "sweep_user@example.com").one()
+    solo_org = db.query(Organization).filter(Organization.org_owner == user.id, Organization.is_solo == True).one()
+    solo_org.created_at = datetime.datetime.utcnow() - datetime.timedelta(hours=1)
+    db.commit()
+    stripe_provisioning.release_request(solo_org.id)
+
+    sweep_pending_stripe_customers_task()
+    sweep_pending_stripe_customers_task()
+    mock_delay.assert_called_once_with(solo_org.id)
+
+    stripe_provisioning.release_request(solo_org.id)
+    sweep_pending_stripe_customers_task()
+    assert mock_delay.call_count == 2
+    stripe_provisioning.release_request(solo_org.id)
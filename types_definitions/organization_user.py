@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from enum import Enum
 
 class OrganizationUserRole(str, Enum):
@@ -19,5 +19,9 @@ class OrganizationUserRead(BaseModel):
     class Config:
         orm_mode = True
 
+class OrganizationUserPage(BaseModel):
+    users: List[OrganizationUserRead]
+    next_cursor: Optional[str] = None  # pass back as ?cursor= to fetch the next page
+
 class OrganizationUserRoleUpdate(BaseModel):
     role: OrganizationUserRole
\ No newline at end of file
@@ -1,5 +1,5 @@
 # define your pydantic models here for request and response.
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, field_validator
 from typing import Optional
 
 
@@ -9,3 +9,18 @@ class SystemSettingsResponse(BaseModel):
     branding_logo_dark_mode: Optional[str] = None
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class SystemSettingsUpdate(BaseModel):
+    """Only the fields sent are changed. The branding logos can be cleared with null."""
+    auto_create_free_subscription: Optional[bool] = None
+    branding_logo_light_mode: Optional[str] = None
+    branding_logo_dark_mode: Optional[str] = None
+
+    @field_validator('auto_create_free_subscription')
+    @classmethod
+    def auto_create_free_subscription_must_not_be_null(cls, v):
+        # Only runs for a value that was sent, leaving it out keeps the stored setting
+        if v is None:
+            raise ValueError('auto_create_free_subscription cannot be null')
+        return v
@@ -1,6 +1,7 @@
 # define your pydantic models here for request and response.
-from pydantic import BaseModel
-from typing import Any, Optional
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Any, List, Optional
+from datetime import datetime
 
 class GeneratePlanRequest(BaseModel):
     intent: str # give some context for the plan. "I want to get stronger, but I work every monday and tuesday"
@@ -25,4 +26,32 @@ class TaskStatusResponse(BaseModel):
     successful: Optional[bool] = None
     failed: Optional[bool] = None
     traceback: Optional[str] = None
-    progress: Optional[dict] = None  # For tasks that report progress
\ No newline at end of file
+    progress: Optional[dict] = None  # For tasks that report progress
+
+class TaskSummary(BaseModel):
+    task_id: str
+    status: str
+    ready: bool
+    enqueued_at: datetime
+
+class TaskListResponse(BaseModel):
+    tasks: List[TaskSummary]
+    next_cursor: Optional[str] = None  # pass back as ?cursor= to fetch the next page
+
+
+# parameter schemas for the tasks in celery_app.registry.
+# user_id is filled in by the API from the authenticated user.
+
+class ExampleStreamingParams(BaseModel):
+    user_id: Optional[int] = None
+    duration: int = Field(10, ge=1, le=60)
+
+    model_config = ConfigDict(extra="forbid")
+
+class GenerateImageWithLogoParams(BaseModel):
+    prompt: str = Field(..., min_length=1, max_length=2000)
+    user_id: Optional[int] = None
+    guidance: float = Field(4.0, ge=0, le=20)
+    num_inference_steps: int = Field(50, ge=1, le=100)
+
+    model_config = ConfigDict(extra="forbid")
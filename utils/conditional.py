@@ -0,0 +1,60 @@
+"""
+Conditional GETs for list endpoints.
+
+Each list endpoint computes a cheap version stamp of the rows it would return
+(a count and the newest updated_at/id, one aggregate query on an index) and
+derives a weak ETag from it, the query parameters and the caller. When the
+client's If-None-Match matches, the endpoint answers 304 without loading or
+serializing the page:
+
+    etag = weak_etag(request, current_user.id, controllers.user.users_version(db, ...))
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    ...
+    return json_response(users, List[PublicUser], headers=cache_headers(etag))
+
+List responses are per user, so by default they are marked private and must
+be revalidated on every use. Shared responses pass their own cache_control.
+"""
+
+import hashlib
+from typing import Any, Dict
+from fastapi import Request
+from fastapi.responses import Response
+
+CACHE_CONTROL = "private, no-cache"
+
+
+def weak_etag(request: Request, *parts: Any) -> str:
+    """A weak ETag of the request's path and query parameters and parts."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(request.url.path.encode())
+    digest.update(b"?" + str(sorted(request.query_params.multi_items())).encode())
+    for part in parts:
+        digest.update(b"\x00" + repr(part).encode())
+    return f'W/"{digest.hexdigest()}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Weak comparison of etag with the request's If-None-Match."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def cache_headers(etag: str, cache_control: str = CACHE_CONTROL) -> Dict[str, str]:
+    return {"ETag": etag, "Cache-Control": cache_control}
+
+
+def not_modified(etag: str, cache_control: str = CACHE_CONTROL) -> Response:
+    return Response(status_code=304, headers=cache_headers(etag, cache_control))
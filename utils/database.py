@@ -0,0 +1,60 @@
+"""
+The process wide SQLAlchemy engine and its connection pool.
+
+Created on first use, so the gunicorn master that preloads the app (server.py)
+never opens connections its forked workers would share. Every API request and
+Celery task session borrows a pooled connection instead of opening one.
+
+Settings (environment):
+    DB_POOL_SIZE                connections kept open per process (default 5)
+    DB_MAX_OVERFLOW             extra connections opened under load (default 10)
+    DB_POOL_TIMEOUT_SECONDS     wait for a free connection before failing (default 10)
+    DB_POOL_RECYCLE_SECONDS     reopen connections older than this (default 1800)
+    DB_CONNECT_TIMEOUT_SECONDS  TCP connect timeout to Postgres (default 5)
+"""
+
+import os
+import threading
+from typing import Optional
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT_SECONDS = float(os.getenv("DB_POOL_TIMEOUT_SECONDS", 10))
+DB_POOL_RECYCLE_SECONDS = int(os.getenv("DB_POOL_RECYCLE_SECONDS", 1800))
+DB_CONNECT_TIMEOUT_SECONDS = int(os.getenv("DB_CONNECT_TIMEOUT_SECONDS", 5))
+
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
+
+_engine: Optional[Engine] = None
+_engine_lock = threading.Lock()
+
+
+def get_engine() -> Engine:
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = create_engine(
+                    os.environ['DATABASE_URL'],
+                    pool_size=DB_POOL_SIZE,
+                    max_overflow=DB_MAX_OVERFLOW,
+                    pool_timeout=DB_POOL_TIMEOUT_SECONDS,
+                    pool_recycle=DB_POOL_RECYCLE_SECONDS,
+                    # Replaces connections Postgres or a proxy closed while idle
+                    pool_pre_ping=True,
+                    connect_args={"connect_timeout": DB_CONNECT_TIMEOUT_SECONDS},
+                )
+    return _engine
+
+
+def new_session() -> Session:
+    return SessionLocal(bind=get_engine())
+
+
+def reset_engine_after_fork() -> None:
+    """Forget connections inherited from the parent process without closing them for it."""
+    if _engine is not None:
+        _engine.dispose(close=False)
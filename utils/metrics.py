@@ -0,0 +1,122 @@
+"""
+Prometheus metrics shared by the API and the Celery workers.
+
+Both run several processes (uvicorn workers, Celery prefork children). When
+PROMETHEUS_MULTIPROC_DIR is set every process writes its samples to that
+directory and render_metrics() aggregates them, otherwise the in-process
+default registry is used.
+"""
+
+import os
+from prometheus_client import REGISTRY, CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, generate_latest
+from prometheus_client import multiprocess
+
+METRICS_CONTENT_TYPE = CONTENT_TYPE_LATEST
+
+
+def render_metrics() -> bytes:
+    """Render every metric in the Prometheus text exposition format."""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
+
+
+# tools task limits (services/task_limiter.py)
+TASK_LIMIT_DECISIONS = Counter(
+    "tools_task_limit_decisions_total",
+    "Limit checks made before enqueueing a tools task",
+    ["task_name", "tier", "outcome", "scope"],
+)
+TASK_SLOTS_RELEASED = Counter(
+    "tools_task_slots_released_total",
+    "Concurrency slots released when a tools task finished or was revoked",
+    ["task_name"],
+)
+
+# fair scheduling (celery_app/fair_scheduler.py)
+FAIR_QUEUE_WAIT = Histogram(
+    "fair_queue_wait_seconds",
+    "Time a tools task waited in its organization's fair queue before reaching Celery",
+    ["queue"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600),
+)
+
+# Celery result backend (celery_app/signals.py)
+TASK_RESULT_SIZE = Histogram(
+    "celery_task_result_size_bytes",
+    "Size of a task result as stored in the result backend, after compression",
+    ["task_name"],
+    buckets=(128, 512, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304),
+)
+
+# transactional email outbox (services/email_outbox.py)
+EMAIL_OUTBOX_DELIVERIES = Counter(
+    "email_outbox_deliveries_total",
+    "Send attempts made by the email outbox drain",
+    ["template_name", "outcome"],
+)
+
+# Stripe webhook events (services/stripe_events.py)
+STRIPE_EVENTS_DEAD_LETTERED = Counter(
+    "stripe_events_dead_lettered_total",
+    "Stripe events set aside after failing to apply, alert on any increase",
+    ["event_type"],
+)
+
+# email templates (services/email_templates.py)
+EMAIL_TEMPLATE_RENDER_SECONDS = Histogram(
+    "email_template_render_seconds",
+    "Time spent rendering an email's subject and HTML body",
+    ["template_name"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25),
+)
+
+# HTTP requests (middleware/request_timing.py), labeled by route template
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "Time to handle an HTTP request, including streaming the response body",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+HTTP_REQUEST_SQL_STATEMENTS = Histogram(
+    "http_request_sql_statements",
+    "SQL statements run while handling an HTTP request",
+    ["method", "route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 50, 100),
+)
+HTTP_REQUEST_CATEGORY_SECONDS = Histogram(
+    "http_request_category_seconds",
+    "Time an HTTP request spent on db, auth, storage or external API calls",
+    ["route", "category"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+
+# SQL statements (middleware/sql.py)
+SLOW_SQL_STATEMENTS = Counter(
+    "slow_sql_statements_total",
+    "SQL statements slower than SLOW_QUERY_MS",
+    ["route"],
+)
+
+# Celery tasks (celery_app/signals.py, celery_app/streamer.py), exported by
+# celery_app/worker_metrics.py in the workers
+TASK_QUEUE_WAIT_SECONDS = Histogram(
+    "celery_task_queue_wait_seconds",
+    "Time from publishing a task to a worker starting it",
+    ["task_name", "queue"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600),
+)
+TASK_RUNTIME_SECONDS = Histogram(
+    "celery_task_runtime_seconds",
+    "Time a worker spent running a task, by the state it ended in",
+    ["task_name", "state"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600),
+)
+TASK_STAGE_SECONDS = Histogram(
+    "celery_task_stage_seconds",
+    "Time spent in one TaskStreamer.stage of a task",
+    ["task_name", "stage", "outcome"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300),
+)
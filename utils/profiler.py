@@ -0,0 +1,229 @@
+"""
+Sampling profiler for the API and the Celery workers.
+
+A background thread reads the stack of every other thread with
+sys._current_frames() every interval, so the profiled code runs unmodified and
+the overhead is one stack walk per thread per interval. Profiles are written
+in the speedscope format (https://www.speedscope.app), one sampled profile per
+thread; open the file there for a flamegraph.
+
+Three ways in:
+    GET /debug/profile              profiles the API process handling the request
+    celery control profile          profiles the tasks a worker starts next (celery_app/control.py)
+    PROFILE_SLOW_REQUESTS_MS        keeps a sampler running in every API process and
+                                    writes the samples of each request slower than the
+                                    threshold to PROFILE_DIR
+"""
+
+import collections
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from typing import Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PROFILE_DIR = os.getenv("PROFILE_DIR", "/tmp/profiles")
+# 0 disables profiling of slow requests
+PROFILE_SLOW_REQUESTS_MS = float(os.getenv("PROFILE_SLOW_REQUESTS_MS", 0))
+PROFILE_SLOW_REQUESTS_INTERVAL_MS = float(os.getenv("PROFILE_SLOW_REQUESTS_INTERVAL_MS", 10))
+# Samples kept for slow request profiles, a minute of one busy thread at 10ms
+SLOW_REQUEST_BUFFER_SAMPLES = int(os.getenv("PROFILE_SLOW_REQUESTS_BUFFER_SAMPLES", 6000))
+
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
+
+# (perf_counter, thread id, frame indexes from the root to the leaf, weight in seconds)
+Sample = Tuple[float, int, Tuple[int, ...], float]
+
+# Leaf frames of threads waiting for work, idle thread pool workers and event loops
+IDLE_FRAMES = {("threading.py", "wait"), ("selectors.py", "select"), ("queue.py", "get")}
+
+
+class SamplingProfiler:
+    """
+    Samples the stacks of the threads of this process until stopped.
+
+    Args:
+        interval: Seconds between samples
+        thread_ids: Only sample these threads, all but the sampler by default
+        max_samples: Keep only the newest samples, unbounded by default
+        skip_idle: Drop samples of threads blocked waiting for work
+    """
+
+    def __init__(
+        self,
+        interval: float = 0.005,
+        thread_ids: Optional[List[int]] = None,
+        max_samples: Optional[int] = None,
+        skip_idle: bool = True,
+    ):
+        self.interval = interval
+        self.skip_idle = skip_idle
+        self.thread_ids = set(thread_ids) if thread_ids else None
+        self.samples: Deque[Sample] = collections.deque(maxlen=max_samples)
+        self.frames: List[Dict] = []
+        self._frame_index: Dict[Tuple[str, str, int], int] = {}
+        self._thread_names: Dict[int, str] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.started: Optional[float] = None
+        self.stopped: Optional[float] = None
+
+    def start(self) -> "SamplingProfiler":
+        self.started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> "SamplingProfiler":
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.stopped = time.perf_counter()
+        return self
+
+    def _frame(self, code) -> int:
+        key = (getattr(code, "co_qualname", code.co_name), code.co_filename, code.co_firstlineno)
+        index = self._frame_index.get(key)
+        if index is None:
+            index = len(self.frames)
+            self._frame_index[key] = index
+            self.frames.append({"name": key[0], "file": key[1], "line": key[2]})
+        return index
+
+    def _sample(self, weight: float) -> None:
+        now = time.perf_counter()
+        own_id = threading.get_ident()
+        frames = sys._current_frames()
+        with self._lock:
+            for thread_id, frame in frames.items():
+                if thread_id == own_id or (self.thread_ids is not None and thread_id not in self.thread_ids):
+                    continue
+                if self.skip_idle and (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name) in IDLE_FRAMES:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(self._frame(frame.f_code))
+                    frame = frame.f_back
+                stack.reverse()
+                self.samples.append((now, thread_id, tuple(stack), weight))
+
+    def _run(self) -> None:
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            try:
+                self._sample(now - last)
+            except Exception as e:
+                logger.error(f"Profiler sample failed: {e}")
+            last = now
+
+    def _thread_name(self, thread_id: int) -> str:
+        if thread_id not in self._thread_names:
+            thread = next((t for t in threading.enumerate() if t.ident == thread_id), None)
+            self._thread_names[thread_id] = thread.name if thread is not None else str(thread_id)
+        return self._thread_names[thread_id]
+
+    def to_speedscope(self, name: str, since: Optional[float] = None, until: Optional[float] = None) -> Dict:
+        """The samples between the perf_counter() values since and until as a speedscope file."""
+        since = since if since is not None else self.started
+        until = until if until is not None else (self.stopped or time.perf_counter())
+        by_thread: Dict[int, Tuple[List, List]] = {}
+        with self._lock:
+            for taken, thread_id, stack, weight in self.samples:
+                if since <= taken <= until:
+                    stacks, weights = by_thread.setdefault(thread_id, ([], []))
+                    stacks.append(list(stack))
+                    weights.append(weight)
+            frames = list(self.frames)
+
+        profiles = []
+        for thread_id, (stacks, weights) in by_thread.items():
+            profiles.append({
+                "type": "sampled",
+                "name": f"{name} ({self._thread_name(thread_id)})",
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": stacks,
+                "weights": weights,
+            })
+        return {
+            "$schema": SPEEDSCOPE_SCHEMA,
+            "name": name,
+            "exporter": "woopdi-profiler",
+            "activeProfileIndex": 0,
+            "shared": {"frames": frames},
+            "profiles": profiles,
+        }
+
+
+_exclusive = threading.Lock()
+
+
+class ProfilerBusy(Exception):
+    """Another on-demand profile is running in this process."""
+
+
+def profile_for(seconds: float, interval: float = 0.005, name: str = "profile") -> Dict:
+    """Profile every thread of this process for seconds. Blocks the calling thread."""
+    if not _exclusive.acquire(blocking=False):
+        raise ProfilerBusy()
+    try:
+        profiler = SamplingProfiler(interval=interval).start()
+        time.sleep(seconds)
+        return profiler.stop().to_speedscope(name)
+    finally:
+        _exclusive.release()
+
+
+def write_profile(profile: Dict, filename: str) -> str:
+    """Write a speedscope profile to PROFILE_DIR. Returns its path."""
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    safe = re.sub(r"[^A-Za-z0-9_.-]+", "_", filename).strip("_")
+    path = os.path.join(PROFILE_DIR, f"{safe}.speedscope.json")
+    with open(path, "w") as f:
+        json.dump(profile, f)
+    return path
+
+
+_slow_request_profiler: Optional[SamplingProfiler] = None
+_slow_request_profiler_lock = threading.Lock()
+
+
+def slow_request_profiler() -> Optional[SamplingProfiler]:
+    """
+    The process wide sampler for slow request profiles, started on first use.
+    None when PROFILE_SLOW_REQUESTS_MS is 0.
+    """
+    global _slow_request_profiler
+    if not PROFILE_SLOW_REQUESTS_MS:
+        return None
+    if _slow_request_profiler is None:
+        with _slow_request_profiler_lock:
+            if _slow_request_profiler is None:
+                _slow_request_profiler = SamplingProfiler(
+                    interval=PROFILE_SLOW_REQUESTS_INTERVAL_MS / 1000,
+                    max_samples=SLOW_REQUEST_BUFFER_SAMPLES,
+                ).start()
+    return _slow_request_profiler
+
+
+def record_if_slow(name: str, started: float, elapsed: float) -> Optional[str]:
+    """Write the samples taken during a request if it took longer than PROFILE_SLOW_REQUESTS_MS."""
+    profiler = slow_request_profiler()
+    if profiler is None or elapsed * 1000 < PROFILE_SLOW_REQUESTS_MS:
+        return None
+    try:
+        profile = profiler.to_speedscope(name, since=started, until=started + elapsed)
+        path = write_profile(profile, f"{name}-{int(time.time() * 1000)}")
+    except Exception as e:
+        logger.error(f"Failed to write slow request profile of {name}: {e}")
+        return None
+    logger.warning(f"{name} took {elapsed * 1000:.0f}ms, profile written to {path}")
+    return path
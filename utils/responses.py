@@ -0,0 +1,37 @@
+"""
+JSON responses.
+
+The app's default_response_class is ORJSONResponse, so every response FastAPI
+serializes itself is encoded with orjson. List endpoints return json_response()
+instead: the rows are validated into their Pydantic models once and
+pydantic-core writes the JSON directly, skipping FastAPI's second validation
+against response_model and its jsonable_encoder pass over every row. Keep
+response_model on those routes, it still documents the schema.
+"""
+
+from functools import lru_cache
+from typing import Any, Dict, Optional
+from fastapi.responses import Response
+from pydantic import TypeAdapter
+
+JSON_MEDIA_TYPE = "application/json"
+
+
+@lru_cache(maxsize=None)
+def _adapter(response_type) -> TypeAdapter:
+    return TypeAdapter(response_type)
+
+
+def json_response(
+    content: Any,
+    response_type: Any,
+    status_code: int = 200,
+    headers: Optional[Dict[str, str]] = None,
+) -> Response:
+    """
+    Serialize content as response_type, e.g. List[PublicUser], in one pass.
+    content may hold ORM objects, they are read by attribute.
+    """
+    adapter = _adapter(response_type)
+    validated = adapter.validate_python(content, from_attributes=True)
+    return Response(content=adapter.dump_json(validated), status_code=status_code, headers=headers, media_type=JSON_MEDIA_TYPE)
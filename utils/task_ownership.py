@@ -0,0 +1,102 @@
+"""
+Redis index of the Celery tasks each user has started.
+
+Every user gets a sorted set ``user:{user_id}:tasks`` whose members are task ids
+scored by the unix time they were enqueued. Entries older than
+TASK_INDEX_TTL_SECONDS are trimmed whenever a new task is recorded, and the key
+itself expires once the user stops starting tasks.
+"""
+
+import os
+import time
+from typing import List, Optional, Tuple
+from utils.redis_client import redis_client
+
+TASK_INDEX_TTL_SECONDS = int(os.getenv("TASK_INDEX_TTL_SECONDS", 60 * 60 * 24))
+
+
+def _index_key(user_id: int) -> str:
+    return f"user:{user_id}:tasks"
+
+
+def record_task(user_id: int, task_id: str, enqueued_at: Optional[float] = None) -> None:
+    """
+    Record that a user started a task and trim entries past the TTL.
+
+    Args:
+        user_id: ID of the user who queued the task
+        task_id: The Celery task ID
+        enqueued_at: Unix timestamp of the enqueue, defaults to now
+    """
+    now = enqueued_at if enqueued_at is not None else time.time()
+    key = _index_key(user_id)
+
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.zadd(key, {task_id: now})
+    pipe.zremrangebyscore(key, "-inf", now - TASK_INDEX_TTL_SECONDS)
+    pipe.expire(key, TASK_INDEX_TTL_SECONDS)
+    pipe.execute()
+
+
+def user_owns_task(user_id: int, task_id: str) -> bool:
+    """O(1) check that a task id was started by the user and has not aged out."""
+    score = redis_client.zscore(_index_key(user_id), task_id)
+    return score is not None and score >= time.time() - TASK_INDEX_TTL_SECONDS
+
+
+def parse_cursor(cursor: str) -> Tuple[float, str]:
+    """
+    Split a cursor from list_task_ids into the (enqueued_at, task_id) of the
+    last task of the previous page. Raises ValueError for a malformed cursor.
+    """
+    score, separator, task_id = cursor.partition(":")
+    if not separator or not task_id:
+        raise ValueError(f"Invalid cursor {cursor!r}")
+    return float(score), task_id
+
+
+def list_task_ids(user_id: int, cursor: Optional[str] = None, limit: int = 20) -> Tuple[List[Tuple[str, float]], Optional[str]]:
+    """
+    Page through a user's tasks, newest first.
+
+    Tasks enqueued at the same time are ordered by task id, and the cursor
+    holds both, so ties between pages are neither skipped nor repeated.
+
+    Args:
+        user_id: ID of the user
+        cursor: Opaque cursor returned by the previous page, None for the first page
+        limit: Maximum number of tasks to return
+
+    Returns:
+        A list of (task_id, enqueued_at) pairs and the cursor for the next page,
+        or None when there are no more tasks.
+    """
+    after = parse_cursor(cursor) if cursor else None
+    max_score = repr(after[0]) if after else "+inf"
+    min_score = time.time() - TASK_INDEX_TTL_SECONDS
+
+    # One extra entry tells whether another page exists. The range includes
+    # the cursor's score, so the tasks sharing it that were already returned
+    # come first and are skipped; rarely more than one batch.
+    wanted = limit + 1
+    entries = []
+    offset = 0
+    while len(entries) < wanted:
+        batch = redis_client.zrevrangebyscore(
+            _index_key(user_id), max_score, min_score, start=offset, num=wanted, withscores=True
+        )
+        for task_id, score in batch:
+            if after and score == after[0] and task_id >= after[1]:
+                continue
+            entries.append((task_id, score))
+        if len(batch) < wanted:
+            break
+        offset += wanted
+
+    next_cursor = None
+    if len(entries) > limit:
+        entries = entries[:limit]
+        task_id, score = entries[-1]
+        next_cursor = f"{score!r}:{task_id}"
+
+    return entries, next_cursor
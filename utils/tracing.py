@@ -0,0 +1,148 @@
+"""
+Distributed tracing of tools tasks, from the API request through the Celery
+worker to the events streamed over the WebSocket.
+
+run_tool_task opens the root span. The W3C trace context (the traceparent
+header) travels to the worker in the Celery message headers, stamped by
+before_task_publish in celery_app/signals.py or carried in the fair queue
+envelope. The worker continues the trace with a span for the task and one for
+every TaskStreamer.stage, and adds the trace_id to each streamed event so a
+client can look the generation up.
+
+Tracing needs the optional OpenTelemetry packages:
+
+    pip install opentelemetry-sdk opentelemetry-exporter-otlp-proto-http
+
+TRACING_EXPORTER selects where spans go:
+    none  tracing is off (the default), every helper here is a no-op
+    otlp  OTLP over HTTP to OTEL_EXPORTER_OTLP_ENDPOINT, e.g. a local collector
+    file  one JSON span per line appended to TRACING_FILE_PATH
+"""
+
+import logging
+import os
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+try:
+    from opentelemetry import context as otel_context, propagate, trace
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+    from opentelemetry.trace import Status, StatusCode
+except ImportError:  # optional dependency
+    trace = None
+
+logger = logging.getLogger(__name__)
+
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "none").lower()
+TRACING_FILE_PATH = os.getenv("TRACING_FILE_PATH", "/tmp/traces.jsonl")
+
+TRACER_NAME = "woopdi"
+
+_enabled = False
+
+
+def _exporter():
+    if TRACING_EXPORTER == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        return OTLPSpanExporter()
+    if TRACING_EXPORTER == "file":
+        return ConsoleSpanExporter(
+            out=open(TRACING_FILE_PATH, "a"),
+            formatter=lambda span: span.to_json(indent=None) + "\n",
+        )
+    raise ValueError(f"Unknown TRACING_EXPORTER: {TRACING_EXPORTER}")
+
+
+def configure_tracing(service_name: str) -> bool:
+    """
+    Install the tracer provider of this process. Call once per process, after
+    forking, since the span processor exports from a background thread.
+
+    Returns:
+        bool: True when spans are exported
+    """
+    global _enabled
+    if TRACING_EXPORTER == "none":
+        return False
+    if trace is None:
+        logger.warning("TRACING_EXPORTER is set but opentelemetry is not installed, tracing is off")
+        return False
+    try:
+        provider = TracerProvider(resource=Resource.create({"service.name": service_name}))
+        provider.add_span_processor(BatchSpanProcessor(_exporter()))
+        trace.set_tracer_provider(provider)
+    except Exception as e:
+        logger.error(f"Failed to configure tracing, it is off: {e}")
+        return False
+    _enabled = True
+    return True
+
+
+def tracing_enabled() -> bool:
+    return _enabled
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Optional[Any]]:
+    """Run the block in a child span of the current one. Yields None when tracing is off."""
+    if not _enabled:
+        yield None
+        return
+    attributes = {key: value for key, value in attributes.items() if value is not None}
+    with trace.get_tracer(TRACER_NAME).start_as_current_span(name, attributes=attributes) as current:
+        yield current
+
+
+def start_span(name: str, carrier: Optional[Dict[str, Any]] = None, **attributes: Any):
+    """
+    Start a span continuing the trace in carrier and make it current, for spans
+    that begin and end in different callbacks (Celery signals).
+
+    Returns:
+        An opaque handle for end_span(), None when tracing is off
+    """
+    if not _enabled:
+        return None
+    parent = propagate.extract(carrier or {})
+    attributes = {key: value for key, value in attributes.items() if value is not None}
+    current = trace.get_tracer(TRACER_NAME).start_span(name, context=parent, attributes=attributes)
+    token = otel_context.attach(trace.set_span_in_context(current, parent))
+    return current, token
+
+
+def end_span(handle, error: Optional[BaseException] = None, **attributes: Any) -> None:
+    if handle is None:
+        return
+    current, token = handle
+    for key, value in attributes.items():
+        if value is not None:
+            current.set_attribute(key, value)
+    if error is not None:
+        current.record_exception(error)
+        current.set_status(Status(StatusCode.ERROR, str(error)))
+    current.end()
+    try:
+        otel_context.detach(token)
+    except Exception:
+        # Detached from another context than it was attached in, nothing to restore
+        pass
+
+
+def inject_headers() -> Dict[str, str]:
+    """The W3C trace context of the current span, empty when there is none."""
+    carrier: Dict[str, str] = {}
+    if _enabled:
+        propagate.inject(carrier)
+    return carrier
+
+
+def current_trace_id() -> Optional[str]:
+    """Hex trace id of the current span, None when tracing is off or no span is active."""
+    if not _enabled:
+        return None
+    span_context = trace.get_current_span().get_span_context()
+    if not span_context.is_valid:
+        return None
+    return format(span_context.trace_id, "032x")